@@ -1,15 +1,18 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends
 from typing import Optional
-import fitz  # PyMuPDF
-from app.services.vision_engine import vision_engine
+from app.services.vision_engine import VisionEngine
+from app.core.lifespan import get_vision_engine
 from app.models.chat import ChatResponse
+from app.core.tracing import span, traced
 
 router = APIRouter()
 
 @router.post("/", response_model=ChatResponse)
+@traced("analyze")
 async def analyze_plan(
     file: UploadFile = File(...),
-    message: Optional[str] = Form(None)
+    message: Optional[str] = Form(None),
+    vision_engine: VisionEngine = Depends(get_vision_engine)
 ):
     """
     Analyze architectural floor plans (PDF or Image) using Vision AI.
@@ -22,8 +25,10 @@ async def analyze_plan(
         image_bytes = None
 
         if content_type == "application/pdf":
+            import fitz  # PyMuPDF, loaded on first PDF upload
+
             # Convert PDF to Image (First Page)
-            with fitz.open(stream=file_bytes, filetype="pdf") as doc:
+            with span("analyze.render_pdf"), fitz.open(stream=file_bytes, filetype="pdf") as doc:
                 if doc.page_count < 1:
                     raise HTTPException(status_code=400, detail="Empty PDF")
                 
@@ -40,7 +45,8 @@ async def analyze_plan(
             raise HTTPException(status_code=400, detail=f"Unsupported file type: {content_type}")
 
         # Send to Vision Engine with user prompt if provided
-        analysis_result = vision_engine.analyze_image(image_bytes, prompt=message or "")
+        with span("analyze.vision", model=vision_engine.model):
+            analysis_result = vision_engine.analyze_image(image_bytes, prompt=message or "")
         
         return ChatResponse(
             response=analysis_result,
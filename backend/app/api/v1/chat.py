@@ -2,37 +2,47 @@ import uuid
 import logging
 from datetime import datetime, timezone
 from typing import List
-from fastapi import APIRouter, HTTPException, Depends, Request
-from slowapi import Limiter
-from slowapi.util import get_remote_address
+from fastapi import APIRouter, HTTPException, Depends
 from app.core.security import verify_token
+from app.core.rate_limit import rate_limit
+from app.core.lifespan import get_rag_engine, get_llm_engine
 from app.core.database import supabase
 from app.core.config import settings
+from app.core.tracing import span, traced
 from app.models.chat import ChatRequest, ChatResponse, ChatHistoryItem, Message, ProposalSaveRequest, ProposalUpdateRequest
 from app.services.rag_engine import RAGEngine
 from app.services.llm_engine import LLMEngine
+from app.services.message_writer import message_writer
+from app.services.conversation_memory import conversation_memory, truncate_to_tokens
 
 logger = logging.getLogger(__name__)
-limiter = Limiter(key_func=get_remote_address)
 
 router = APIRouter()
-rag_engine = RAGEngine()
-llm_engine = LLMEngine()
 
 
-@router.post("/", response_model=ChatResponse)
-@limiter.limit("20/minute")
-async def chat(request: Request, chat_request: ChatRequest, user_data: dict = Depends(verify_token)):
+@router.post("/", response_model=ChatResponse, dependencies=[Depends(rate_limit("llm"))])
+@traced("chat")
+async def chat(
+    chat_request: ChatRequest,
+    user_data: dict = Depends(verify_token),
+    rag_engine: RAGEngine = Depends(get_rag_engine),
+    llm_engine: LLMEngine = Depends(get_llm_engine)
+):
     """
     Send message and get AI response
     Pattern: AUTH → ACCESS → DATA → LLM → API
-    Rate Limited: 20 messages per minute
+    Rate Limited: per-user "llm" token bucket (RATE_LIMIT_LLM_PER_MINUTE)
     """
     user_id = user_data.get('sub')
 
     # Generate new conversation_id if not provided
     conversation_id = chat_request.conversation_id
-    if not conversation_id:
+    conversation_context = ""
+    if conversation_id:
+        # Load memory before this turn's message is queued
+        with span("chat.memory"):
+            conversation_context = await conversation_memory.build_context(conversation_id, user_id)
+    else:
         conversation_id = str(uuid.uuid4())
         if settings.DEBUG:
             logger.debug(f"New conversation created: {conversation_id}")
@@ -52,7 +62,7 @@ async def chat(request: Request, chat_request: ChatRequest, user_data: dict = De
             logger.error(f"Error creating session: {e}")
             raise HTTPException(status_code=500, detail="Failed to create conversation session")
 
-    # 1. Save user message to database
+    # 1. Queue user message for write-behind persistence
     user_payload = {
         "conversation_id": conversation_id,
         "content": chat_request.message,
@@ -61,10 +71,7 @@ async def chat(request: Request, chat_request: ChatRequest, user_data: dict = De
         "attachment": [att.model_dump() for att in chat_request.attachments] if chat_request.attachments else None
     }
 
-    try:
-        supabase.table("messages").insert(user_payload).execute()
-    except Exception as e:
-        logger.error(f"Error saving user message: {e}")
+    message_writer.enqueue("messages", user_payload)
 
     # 2. Get RAG context with mode-based filtering
     sources = await rag_engine.retrieve(chat_request.message, user_id, mode=chat_request.mode)
@@ -105,21 +112,21 @@ Description: {p.get('description', 'No description')}
         except Exception as e:
             logger.error(f"Error fetching project context: {e}")
 
-    # 3. Generate AI response (with project context and mode)
-    # 3. Generate AI response (with project context and mode)
-    # If reply_context exists, prepend it to the prompt for the LLM, but RAG already used just the message
-    full_prompt = chat_request.message
+    # 3. Generate AI response (with project context, conversation memory and mode)
+    # reply_context is client-supplied, so it gets a hard cap like the rest of memory
     if chat_request.reply_context:
-        full_prompt = f"{chat_request.reply_context}\n\nUSER FOLLOW-UP: {chat_request.message}"
+        reply_context = truncate_to_tokens(chat_request.reply_context, settings.MEMORY_TOKEN_BUDGET // 2)
+        conversation_context += f"\n\nMESSAGE BEING REPLIED TO:\n{reply_context}"
 
     ai_result = await llm_engine.generate(
-        full_prompt, 
+        chat_request.message, 
         sources, 
         project_context,
-        mode=chat_request.mode
+        mode=chat_request.mode,
+        conversation_context=conversation_context.strip()
     )
 
-    # 4. Save AI response to database
+    # 4. Queue AI response for write-behind persistence
     ai_payload = {
         "conversation_id": conversation_id,  # Use the valid conversation_id
         "content": ai_result["text"],
@@ -128,10 +135,8 @@ Description: {p.get('description', 'No description')}
         "proposal": ai_result.get("proposal")
     }
 
-    try:
-        supabase.table("messages").insert(ai_payload).execute()
-    except Exception as e:
-        logger.error(f"Error saving AI message: {e}")
+    message_writer.enqueue("messages", ai_payload)
+    conversation_memory.schedule_refresh(conversation_id, user_id)
 
     # 5. Return response to frontend
     return ChatResponse(
@@ -168,6 +173,9 @@ async def get_history(user_data: dict = Depends(verify_token)):
     """Get list of past conversations"""
     user_id = user_data.get('sub')
     
+    # Make sure this user's latest turns are visible before reading
+    await message_writer.flush()
+    
     # Fetch all messages for user, ordered oldest first to get first user message
     response = supabase.table("messages")\
         .select("conversation_id, content, created_at, role")\
@@ -270,6 +278,9 @@ async def delete_conversation(conversation_id: str, user_data: dict = Depends(ve
     user_id = user_data.get('sub')
     
     try:
+        # Pending writes would otherwise land after the delete
+        await message_writer.flush()
+        
         # Delete all messages for this conversation
         supabase.table("messages")\
             .delete()\
@@ -284,6 +295,14 @@ async def delete_conversation(conversation_id: str, user_data: dict = Depends(ve
             .eq("user_id", user_id)\
             .execute()
         
+        # Delete the rolling summary for this conversation
+        supabase.table("conversation_summaries")\
+            .delete()\
+            .eq("conversation_id", conversation_id)\
+            .eq("user_id", user_id)\
+            .execute()
+        
+        conversation_memory.forget(conversation_id, user_id)
         return {"success": True}
     except Exception as e:
         logger.error(f"Error deleting conversation: {e}")
@@ -296,6 +315,9 @@ async def get_conversation(conversation_id: str, user_data: dict = Depends(verif
     """Get messages for a specific conversation"""
     user_id = user_data.get('sub')
     
+    # Make sure the latest turns are visible before reading
+    await message_writer.flush()
+    
     response = supabase.table("messages")\
         .select("*")\
         .eq("conversation_id", conversation_id)\
@@ -311,7 +333,9 @@ async def save_proposal(request: ProposalSaveRequest, user_data: dict = Depends(
     user_id = user_data.get('sub')
     
     try:
+        # ID is assigned here so the row can be returned before it is written
         data = {
+            "id": str(uuid.uuid4()),
             "user_id": user_id,
             "conversation_id": request.conversation_id,
             "title": request.title,
@@ -319,14 +343,7 @@ async def save_proposal(request: ProposalSaveRequest, user_data: dict = Depends(
             "content": request.content
         }
         
-        # ✅ FIXED: Removed curly braces
-        response = (
-            supabase.table("saved_proposals")
-            .insert(data)
-            .execute()
-        )
-        
-        return response.data[0]
+        return message_writer.enqueue("saved_proposals", data)
     except Exception as e:
         logger.error(f"Error saving proposal: {e}")
         raise HTTPException(status_code=500, detail="Failed to save proposal")
@@ -335,6 +352,8 @@ async def save_proposal(request: ProposalSaveRequest, user_data: dict = Depends(
 async def get_saved_proposals(conversation_id: str, user_data: dict = Depends(verify_token)):
     user_id = user_data.get('sub')
     
+    await message_writer.flush()
+    
     response = supabase.table("saved_proposals")\
         .select("*")\
         .eq("conversation_id", conversation_id)\
@@ -349,6 +368,8 @@ async def delete_proposal(id: str, user_data: dict = Depends(verify_token)):
     user_id = user_data.get('sub')
     
     try:
+        await message_writer.flush()
+        
         result = supabase.table("saved_proposals")\
             .delete()\
             .eq("id", id)\
@@ -376,6 +397,8 @@ async def update_proposal(id: str, request: ProposalUpdateRequest, user_data: di
             "updated_at": datetime.now(timezone.utc).isoformat()
         }
 
+        await message_writer.flush()
+
         result = supabase.table("saved_proposals")\
             .update(data)\
             .eq("id", id)\
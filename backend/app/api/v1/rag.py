@@ -1,10 +1,10 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from app.services.rag_engine import RAGEngine
 from app.core.database import supabase
+from app.core.lifespan import get_rag_engine
 
 router = APIRouter()
-rag_engine = RAGEngine()
 
 class LawLookupRequest(BaseModel):
     query: str
@@ -17,7 +17,7 @@ class LawLookupResponse(BaseModel):
     relevance: float
 
 @router.post("/lookup", response_model=LawLookupResponse)
-async def lookup_law(request: LawLookupRequest):
+async def lookup_law(request: LawLookupRequest, rag_engine: RAGEngine = Depends(get_rag_engine)):
     """
     Perform a targeted lookup for a specific law or code citation.
     Uses rag_documents table for semantic search.
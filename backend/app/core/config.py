@@ -8,6 +8,7 @@ class Settings(BaseSettings):
     SUPABASE_SERVICE_ROLE_KEY: str
     SUPABASE_JWT_SECRET: str
     SUPABASE_WEBHOOK_SECRET: Optional[str] = None  # For webhook signature verification
+    SUPABASE_JWKS_URL: Optional[str] = None  # Defaults to {SUPABASE_URL}/auth/v1/.well-known/jwks.json
 
     # AI Services
     GROQ_API_KEY: str
@@ -20,6 +21,73 @@ class Settings(BaseSettings):
     DEBUG: bool = False  # Set to True in .env for development
     FRONTEND_URL: str = "http://localhost:3000"  # Production frontend URL
 
+    # Write-behind message persistence
+    MESSAGE_BATCH_SIZE: int = 100         # Flush as soon as this many rows are queued
+    MESSAGE_FLUSH_INTERVAL_MS: int = 20   # ...or after this long, whichever comes first
+    MESSAGE_WRITE_RETRIES: int = 3
+
+    # Conversation memory (rolling summary + recent turns)
+    MEMORY_RECENT_MESSAGES: int = 6       # Last N messages sent verbatim
+    MEMORY_TOKEN_BUDGET: int = 1200       # Cap for summary + recent turns in the prompt
+    MEMORY_SUMMARY_MODEL: str = "llama-3.1-8b-instant"
+
+    # Auth caches
+    TOKEN_CACHE_SIZE: int = 10000         # Verified tokens kept until their exp
+    JWKS_CACHE_TTL_SECONDS: int = 600
+    JWKS_MIN_REFRESH_SECONDS: int = 30    # Throttle refetches for unknown key IDs
+
+    # Rate limiting (token buckets per user)
+    RATE_LIMIT_REDIS_URL: Optional[str] = None  # Shared store; in-memory per worker if unset
+    RATE_LIMIT_DEFAULT_PER_MINUTE: int = 120
+    RATE_LIMIT_DEFAULT_BURST: int = 60
+    RATE_LIMIT_LLM_PER_MINUTE: int = 20
+    RATE_LIMIT_LLM_BURST: int = 5
+
+    # Embeddings
+    EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"
+    EMBEDDING_BACKEND: str = "local"      # local | onnx | onnx-int8 | sidecar
+    EMBEDDING_SIDECAR_BACKEND: str = "local"  # Backend the sidecar itself runs (local | onnx | onnx-int8)
+    EMBEDDING_ONNX_DIR: str = "models/minilm-onnx"  # Output of scripts/export_onnx_embeddings.py
+    EMBEDDING_THREADS: int = 0            # ONNX intra-op threads (0 = runtime default)
+    EMBEDDING_SOCKET_PATH: str = "/tmp/rule7-embeddings.sock"
+    EMBEDDING_MAX_BATCH: int = 64         # Sidecar: max texts encoded together
+    EMBEDDING_BATCH_WAIT_MS: int = 5      # Sidecar: how long to collect requests into a batch
+
+    # Embedding model migration (database/embedding_shadow.sql, scripts/reembed_corpus.py)
+    SHADOW_EMBEDDING_MODEL: Optional[str] = None  # Model whose vectors fill rag_documents_shadow
+    SHADOW_DUAL_READ_RATE: float = 0.0    # Share of live searches also run on the other index and compared
+    EMBEDDING_CUTOVER: bool = False       # Serve search from the shadow index / SHADOW_EMBEDDING_MODEL
+
+    # Startup
+    PRELOAD_ENGINES: bool = True  # False: load models/clients on first use (auth/users/projects-only workers)
+    WARMUP_RPC: bool = True  # Run one search_documents call during warm-up
+    STARTUP_RETRIES: int = 3  # Engine build/warm-up retries (backoff 2s, 4s, ...) before /health fails
+
+    # Corpus snapshots (data-pipeline/snapshot.py); unset = search rag_documents in Supabase
+    CORPUS_SNAPSHOT_DIR: Optional[str] = None
+    CORPUS_SNAPSHOT_POLL_SECONDS: int = 30  # How often to check CURRENT for a new version
+    CORPUS_RESULT_CACHE_SIZE: int = 2048    # Search results cached per corpus version
+
+    # Prometheus /metrics (scrapers send it as a bearer token); unset = endpoint disabled
+    METRICS_TOKEN: Optional[str] = None
+
+    # Tracing
+    TRACING_ENABLED: bool = True  # Per-request spans, returned as a Server-Timing header
+    TRACE_EXPORT_FILE: Optional[str] = None  # Append OTLP/JSON traces here (e.g. traces.jsonl)
+
+    # Logging (queued, written by a background thread)
+    LOG_QUEUE_SIZE: int = 10000           # Records beyond this are dropped, never blocking a request
+    LOG_SAMPLE_RATES: str = "app.retrieval=0.05"  # logger=rate,...; WARNING+ is never sampled
+    LOG_RETRIEVAL_DEBUG: bool = False     # Per-document hybrid search events as JSON lines
+
+    # On-demand profiling (admins only: X-Profile header or ?profile=)
+    PROFILING_ENABLED: bool = True
+    PROFILE_ADMIN_ROLE: str = "admin"     # Matched against app_metadata.role / user_role claims
+    PROFILE_PER_MINUTE: int = 6           # Global budget shared by all admins
+    PROFILE_BURST: int = 2
+    PROFILE_INTERVAL_MS: float = 1.0      # Sampling interval
+    PROFILE_DIR: str = "profiles"
+
     class Config:
         env_file = ".env"
         case_sensitive = True
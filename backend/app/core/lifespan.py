@@ -0,0 +1,171 @@
+"""
+Application lifespan: builds the AI engines once, in a defined order, and
+warms them up before the instance reports ready.
+
+Warm-up runs in the background so the /health liveness check answers while
+the embedding model loads; /health/ready only passes once it has finished.
+A failed build or warm-up is retried with backoff (STARTUP_RETRIES); if it
+still fails, app.state.startup_error is set and /health returns 503, so the
+orchestrator restarts the instance instead of leaving it never ready.
+
+With PRELOAD_ENGINES=False (workers that only serve auth/users/projects)
+nothing heavy is loaded at startup; each engine is built on first use.
+"""
+
+import asyncio
+import logging
+import threading
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request, status
+from app.core.config import settings
+from app.services.corpus_snapshot import corpus
+from app.services.message_writer import message_writer
+
+logger = logging.getLogger(__name__)
+
+WARMUP_QUERY = "minimum ceiling height of habitable rooms"
+
+
+def _build_rag_engine(app: FastAPI):
+    from app.services.rag_engine import RAGEngine
+    return RAGEngine()
+
+
+def _build_llm_engine(app: FastAPI):
+    from app.services.llm_engine import LLMEngine
+    # Share the app's RAGEngine instead of building a second one
+    return LLMEngine(_get_or_build(app, "rag_engine"))
+
+
+def _build_vision_engine(app: FastAPI):
+    from app.services.vision_engine import VisionEngine
+    return VisionEngine()
+
+
+ENGINE_FACTORIES = {
+    "rag_engine": _build_rag_engine,
+    "llm_engine": _build_llm_engine,
+    "vision_engine": _build_vision_engine,
+}
+
+_build_lock = threading.RLock()
+
+
+def _get_or_build(app: FastAPI, name: str):
+    """Return an engine from app.state, constructing it on first use."""
+    engine = getattr(app.state, name, None)
+    if engine is None:
+        with _build_lock:
+            engine = getattr(app.state, name, None)
+            if engine is None:
+                engine = ENGINE_FACTORIES[name](app)
+                setattr(app.state, name, engine)
+    return engine
+
+
+def _build_engines(app: FastAPI):
+    """Load the embedding model and create the Groq/Supabase-backed engines."""
+    for name in ENGINE_FACTORIES:
+        _get_or_build(app, name)
+
+
+def _warm_up(app: FastAPI):
+    """Run a first encode (and optionally a first search RPC) off the request path."""
+    from app.core.database import supabase
+
+    embedding_service = app.state.rag_engine.search_service.embedding_service
+    # First encode pays for lazy kernel/thread-pool initialization
+    query_embedding = embedding_service.embed(WARMUP_QUERY)
+
+    from app.services.rag_engine import shadow_index
+    if shadow_index.serving:
+        # After an embedding cut-over, queries go through the shadow model
+        shadow_index.embed(WARMUP_QUERY)
+
+    if settings.WARMUP_RPC:
+        try:
+            supabase.rpc(
+                "search_documents",
+                {"query_embedding": query_embedding, "match_count": 1}
+            ).execute()
+        except Exception as e:
+            # Search still works without a warm connection; don't block readiness
+            logger.warning(f"Warm-up RPC failed: {e}")
+
+
+async def _start_engines(app: FastAPI):
+    for attempt in range(settings.STARTUP_RETRIES + 1):
+        try:
+            # Engines built by an earlier attempt are kept (_get_or_build)
+            await asyncio.to_thread(_build_engines, app)
+            if corpus.enabled:
+                await _load_corpus()
+            await asyncio.to_thread(_warm_up, app)
+            app.state.ready = True
+            logger.info("Engines loaded and warmed up - instance ready")
+            return
+        except Exception as e:
+            if attempt < settings.STARTUP_RETRIES:
+                delay = 2 ** (attempt + 1)
+                logger.error(f"Engine startup failed (attempt {attempt + 1}), retrying in {delay}s: {e}")
+                await asyncio.sleep(delay)
+            else:
+                logger.error(f"Engine startup failed after {attempt + 1} attempts: {e}")
+                app.state.startup_error = str(e) or type(e).__name__
+
+
+async def _load_corpus():
+    try:
+        await asyncio.to_thread(corpus.refresh)
+    except Exception as e:
+        # Search falls back to Supabase until the watcher loads a good snapshot
+        logger.error(f"Corpus snapshot load failed: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    message_writer.start()
+    startup_task = None
+    corpus_task = asyncio.create_task(corpus.watch()) if corpus.enabled else None
+    if settings.PRELOAD_ENGINES:
+        app.state.ready = False
+        app.state.startup_error = None
+        startup_task = asyncio.create_task(_start_engines(app))
+    else:
+        app.state.ready = True
+
+    yield
+
+    if startup_task:
+        startup_task.cancel()
+    if corpus_task:
+        corpus_task.cancel()
+    # Flush any buffered messages before the worker exits
+    await message_writer.stop()
+
+
+def _require_ready(request: Request):
+    if not getattr(request.app.state, "ready", False):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Service is warming up",
+            headers={"Retry-After": "5"},
+        )
+
+
+def get_rag_engine(request: Request):
+    """Dependency: the shared RAGEngine (built at startup or on first use)."""
+    _require_ready(request)
+    return _get_or_build(request.app, "rag_engine")
+
+
+def get_llm_engine(request: Request):
+    """Dependency: the shared LLMEngine (built at startup or on first use)."""
+    _require_ready(request)
+    return _get_or_build(request.app, "llm_engine")
+
+
+def get_vision_engine(request: Request):
+    """Dependency: the shared VisionEngine (built at startup or on first use)."""
+    _require_ready(request)
+    return _get_or_build(request.app, "vision_engine")
@@ -0,0 +1,143 @@
+"""
+Non-blocking logging.
+
+Loggers only enqueue records; a QueueListener thread formats and writes
+them, so a slow stdout never stalls the event loop. Records are formatted
+in the listener (lazy %-style args are never rendered on the request path)
+and the queue is bounded: when it is full, records are dropped and
+counted instead of blocking.
+
+Per-logger sampling (LOG_SAMPLE_RATES) thins high-volume debug channels;
+WARNING and above are never sampled out.
+
+The retrieval channel ("app.retrieval") carries per-document hybrid-search
+events as JSON lines. It is off unless LOG_RETRIEVAL_DEBUG is set.
+"""
+
+import atexit
+import json
+import logging
+import queue
+import random
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, List
+from app.core.config import settings
+
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Structured debug channel for per-document retrieval events
+RETRIEVAL_LOGGER = "app.retrieval"
+
+# Loggers uvicorn configures before the app is imported
+UVICORN_LOGGERS = ("uvicorn", "uvicorn.error", "uvicorn.access")
+
+
+def parse_sample_rates(spec: str) -> Dict[str, float]:
+    """"app.retrieval=0.05,uvicorn.access=0.1" -> {"app.retrieval": 0.05, ...}"""
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, rate = item.partition("=")
+        rates[name.strip()] = max(0.0, min(1.0, float(rate)))
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a fraction of records per logger (longest matching prefix wins)."""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        # Longest prefix first so "app.retrieval.x" matches "app.retrieval" before "app"
+        self.rates = sorted(rates.items(), key=lambda item: -len(item[0]))
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        for prefix, rate in self.rates:
+            if record.name == prefix or record.name.startswith(prefix + "."):
+                return rate >= 1.0 or random.random() < rate
+        return True
+
+
+class LazyQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener thread.
+
+    The stock prepare() renders msg % args on the caller's thread; the queue
+    never leaves this process, so the record can be passed through as-is.
+    """
+
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LazyQueueHandler.dropped += 1
+
+
+class StructuredFormatter(logging.Formatter):
+    """One JSON object per record: message as "event", plus extra={"fields": {...}}."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": self.formatTime(record),
+            "logger": record.name,
+            "level": record.levelname,
+            "event": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        return json.dumps(entry, default=str)
+
+
+_listeners: List[QueueListener] = []
+
+
+def _route_through_queue(logger: logging.Logger, handlers: List[logging.Handler], sampler: SamplingFilter):
+    """Replace the logger's handlers with a queue feeding `handlers` on a listener thread."""
+    handler = LazyQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE))
+    handler.addFilter(sampler)
+    logger.handlers = [handler]
+    listener = QueueListener(handler.queue, *handlers, respect_handler_level=True)
+    listener.start()
+    _listeners.append(listener)
+
+
+def setup_logging():
+    """Configure app, retrieval and uvicorn logging to write off the event loop."""
+    if _listeners:
+        return
+
+    sampler = SamplingFilter(parse_sample_rates(settings.LOG_SAMPLE_RATES))
+
+    root = logging.getLogger()
+    root.setLevel(logging.DEBUG if settings.DEBUG else logging.INFO)
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(logging.Formatter(LOG_FORMAT))
+    _route_through_queue(root, [stream], sampler)
+
+    retrieval = logging.getLogger(RETRIEVAL_LOGGER)
+    retrieval.propagate = False
+    retrieval.setLevel(logging.DEBUG if settings.LOG_RETRIEVAL_DEBUG else logging.WARNING)
+    structured = logging.StreamHandler(sys.stdout)
+    structured.setFormatter(StructuredFormatter())
+    _route_through_queue(retrieval, [structured], sampler)
+
+    # Keep uvicorn's own formatters, just move the writes off the loop
+    for name in UVICORN_LOGGERS:
+        logger = logging.getLogger(name)
+        if logger.handlers:
+            _route_through_queue(logger, list(logger.handlers), sampler)
+
+    atexit.register(stop_logging)
+
+
+def stop_logging():
+    """Drain queued records and stop the listener threads."""
+    while _listeners:
+        _listeners.pop().stop()
+    if LazyQueueHandler.dropped:
+        sys.stderr.write(f"logging: dropped {LazyQueueHandler.dropped} records (queue full)\n")
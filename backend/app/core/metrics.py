@@ -0,0 +1,98 @@
+"""
+Prometheus metrics for the chat pipeline.
+
+Every stage of a chat turn records into a histogram here and /metrics
+exposes them. Observing a histogram is a lock + a few float adds, cheap
+enough to leave on in production.
+
+With several uvicorn workers, set PROMETHEUS_MULTIPROC_DIR to a shared
+empty directory so /metrics aggregates across workers.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+)
+
+# Sub-second buckets for in-process stages, longer tail for network calls
+FAST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+NETWORK_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# --- Latency histograms ---
+EMBEDDING_SECONDS = Histogram(
+    "rule7_embedding_seconds", "Query embedding time", ["backend"], buckets=FAST_BUCKETS
+)
+SEARCH_RPC_SECONDS = Histogram(
+    "rule7_search_rpc_seconds", "search_documents RPC time", ["rpc"], buckets=NETWORK_BUCKETS
+)
+LAW_FETCH_SECONDS = Histogram(
+    "rule7_law_fetch_seconds", "Hybrid search fetch time per law code", ["law_code"], buckets=NETWORK_BUCKETS
+)
+CONTEXT_PACKING_SECONDS = Histogram(
+    "rule7_context_packing_seconds", "Ranking, de-duplication and formatting of LLM context", buckets=FAST_BUCKETS
+)
+LLM_TTFT_SECONDS = Histogram(
+    "rule7_llm_time_to_first_token_seconds", "Groq time to first token", ["mode"], buckets=NETWORK_BUCKETS
+)
+LLM_TOTAL_SECONDS = Histogram(
+    "rule7_llm_total_seconds", "Groq total generation time", ["mode"], buckets=NETWORK_BUCKETS
+)
+DB_WRITE_SECONDS = Histogram(
+    "rule7_db_write_seconds", "Database write time", ["table"], buckets=NETWORK_BUCKETS
+)
+VISION_SECONDS = Histogram(
+    "rule7_vision_seconds", "Vision model call time", buckets=NETWORK_BUCKETS
+)
+
+# --- Embedding migration (dual-read against the shadow index) ---
+DUAL_READ_SECONDS = Histogram(
+    "rule7_dual_read_seconds", "Embed + search time per index on dual-read queries", ["index"],
+    buckets=NETWORK_BUCKETS
+)
+DUAL_READ_OVERLAP = Histogram(
+    "rule7_dual_read_topk_overlap", "Share of served top-k ids also in the other index's top-k",
+    buckets=(0.0, 0.2, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 1.0)
+)
+
+# --- Counters ---
+CACHE_REQUESTS = Counter(
+    "rule7_cache_requests_total", "Cache lookups", ["cache", "result"]
+)
+LAW_ROUTER_MATCHES = Counter(
+    "rule7_law_router_matches_total", "Law Router matches per law code", ["law_code"]
+)
+LLM_TOKENS = Counter(
+    "rule7_llm_tokens_total", "Groq token usage", ["model", "kind"]
+)
+
+
+@contextmanager
+def timed(histogram, **labels):
+    """Observe the duration of the wrapped block."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        target = histogram.labels(**labels) if labels else histogram
+        target.observe(time.perf_counter() - start)
+
+
+def record_cache(cache: str, hit: bool):
+    CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc()
+
+
+def render_metrics():
+    """Return (body, content_type) for the /metrics endpoint."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,146 @@
+"""
+On-demand profiling of a single request.
+
+An admin sends `X-Profile: <format>` (or `?profile=<format>`) and that one
+request runs under pyinstrument's sampling profiler:
+
+    speedscope / 1  save a speedscope JSON under PROFILE_DIR, path in X-Profile-File
+    inline          return the speedscope JSON as the response body
+    html            return pyinstrument's interactive HTML report
+
+Only callers whose JWT carries PROFILE_ADMIN_ROLE (app_metadata.role or a
+user_role claim) can trigger it; for everyone else the flag is ignored.
+Profiles are drawn from a global "profile" token bucket and only one runs
+per worker at a time, so the flag cannot be used to slow the API down.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from typing import Optional
+from fastapi import Request
+from fastapi.responses import HTMLResponse, JSONResponse, Response
+from jose import JWTError
+from app.core.config import settings
+from app.core.rate_limit import BUCKETS, store
+from app.core.security import TokenCache, _decode, token_cache
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Profile"
+FORMATS = {"1", "speedscope", "inline", "html"}
+
+_active = False
+
+
+def requested_format(request: Request) -> Optional[str]:
+    value = request.headers.get(PROFILE_HEADER) or request.query_params.get("profile")
+    if not value:
+        return None
+    value = value.strip().lower()
+    return value if value in FORMATS else None
+
+
+def _claims(request: Request) -> Optional[dict]:
+    authorization = request.headers.get("Authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+
+    claims = token_cache.get(TokenCache.key(token))
+    if claims is not None:
+        return claims
+    try:
+        return _decode(token)
+    except JWTError:
+        return None
+
+
+def is_admin(claims: Optional[dict]) -> bool:
+    if not claims:
+        return False
+    role = settings.PROFILE_ADMIN_ROLE
+    app_metadata = claims.get("app_metadata") or {}
+    roles = app_metadata.get("roles") or []
+    return app_metadata.get("role") == role or role in roles or claims.get("user_role") == role
+
+
+async def profile_request(request: Request, call_next) -> Response:
+    """Middleware body: profile the request if an admin asked for it, else pass through."""
+    global _active
+
+    fmt = requested_format(request) if settings.PROFILING_ENABLED else None
+    if fmt is None:
+        return await call_next(request)
+    # Auth dependencies have not run yet; decoding may fetch JWKS, so keep it off the event loop
+    if not is_admin(await asyncio.to_thread(_claims, request)):
+        return await call_next(request)
+
+    if _active:
+        skipped = "busy"
+    else:
+        # Claim the slot before the first await, so a concurrent request sees it taken
+        _active = True
+        try:
+            skipped = None
+            try:
+                allowed, _ = await store.take("profile:global", BUCKETS["profile"])
+                skipped = None if allowed else "rate-limited"
+            except Exception as e:
+                logger.error(f"Profile limiter unavailable: {e}")
+                skipped = "limiter-unavailable"
+
+            if skipped is None:
+                try:
+                    from pyinstrument import Profiler
+                except ImportError:
+                    skipped = "pyinstrument-not-installed"
+
+            if skipped is None:
+                profiler = Profiler(interval=settings.PROFILE_INTERVAL_MS / 1000, async_mode="enabled")
+                profiler.start()
+                try:
+                    response = await call_next(request)
+                    # Drain streaming bodies inside the profiled window
+                    body = b"".join([chunk async for chunk in response.body_iterator])
+                finally:
+                    profiler.stop()
+        finally:
+            _active = False
+
+    if skipped is not None:
+        response = await call_next(request)
+        response.headers["X-Profile-Skipped"] = skipped
+        return response
+
+    logger.info(f"Profiled {request.method} {request.url.path} ({profiler.last_session.duration:.3f}s)")
+
+    if fmt == "html":
+        return HTMLResponse(profiler.output_html(), headers={"X-Profiled-Status": str(response.status_code)})
+
+    from pyinstrument.renderers import SpeedscopeRenderer
+
+    speedscope = profiler.output(SpeedscopeRenderer())
+    if fmt == "inline":
+        return JSONResponse(json.loads(speedscope), headers={"X-Profiled-Status": str(response.status_code)})
+
+    path = await asyncio.to_thread(_save, request, speedscope)
+    profiled = Response(content=body, status_code=response.status_code)
+    # Copy the raw header list so repeated headers (Set-Cookie) all survive
+    profiled.raw_headers = [
+        (name, value) for name, value in response.raw_headers if name != b"content-length"
+    ] + [(b"content-length", str(len(body)).encode())]
+    profiled.headers["X-Profile-File"] = path
+    return profiled
+
+
+def _save(request: Request, speedscope: str) -> str:
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", request.url.path).strip("_") or "root"
+    path = os.path.join(settings.PROFILE_DIR, f"{time.strftime('%Y%m%dT%H%M%S')}-{request.method}-{slug}.speedscope.json")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(speedscope)
+    return path
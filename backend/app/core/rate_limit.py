@@ -0,0 +1,144 @@
+"""
+Per-user token-bucket rate limiting.
+
+Buckets are keyed by the JWT `sub`, so users behind one proxy don't share a
+limit, and are stored in Redis so every uvicorn worker draws from the same
+bucket. Without RATE_LIMIT_REDIS_URL an in-memory store is used (tests and
+single-worker development).
+"""
+
+import logging
+import math
+import time
+from dataclasses import dataclass
+from typing import Dict, Tuple
+from fastapi import Depends, HTTPException, Request, status
+from app.core.config import settings
+from app.core.security import verify_token
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Bucket:
+    capacity: int        # Burst size
+    refill_rate: float   # Tokens per second
+
+
+# Cheap endpoints (history, projects, lookups) vs. endpoints that call Groq
+BUCKETS: Dict[str, Bucket] = {
+    "default": Bucket(settings.RATE_LIMIT_DEFAULT_BURST, settings.RATE_LIMIT_DEFAULT_PER_MINUTE / 60),
+    "llm": Bucket(settings.RATE_LIMIT_LLM_BURST, settings.RATE_LIMIT_LLM_PER_MINUTE / 60),
+    # One global bucket (not per user) for admin-triggered request profiling
+    "profile": Bucket(settings.PROFILE_BURST, settings.PROFILE_PER_MINUTE / 60),
+}
+
+
+class MemoryBucketStore:
+    """In-process token buckets. Limits are per worker."""
+
+    MAX_KEYS = 100000
+    IDLE_SECONDS = 600
+
+    def __init__(self):
+        self._state: Dict[str, Tuple[float, float]] = {}
+
+    async def take(self, key: str, bucket: Bucket, cost: int = 1) -> Tuple[bool, float]:
+        # No awaits below, so the read-modify-write is atomic on the event loop
+        now = time.monotonic()
+        tokens, updated = self._state.get(key, (bucket.capacity, now))
+        tokens = min(bucket.capacity, tokens + (now - updated) * bucket.refill_rate)
+
+        if len(self._state) >= self.MAX_KEYS and key not in self._state:
+            # Buckets idle this long have refilled, so forgetting them changes nothing
+            self._state = {k: v for k, v in self._state.items() if now - v[1] < self.IDLE_SECONDS}
+
+        if tokens >= cost:
+            self._state[key] = (tokens - cost, now)
+            return True, 0.0
+
+        self._state[key] = (tokens, now)
+        return False, (cost - tokens) / bucket.refill_rate
+
+
+class RedisBucketStore:
+    """Token buckets shared by all workers, updated atomically in Redis."""
+
+    # Uses Redis server time so worker clock skew can't mint tokens
+    SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local cost = tonumber(ARGV[3])
+    local t = redis.call('TIME')
+    local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+
+    local allowed = 0
+    local retry_after = 0
+    if tokens >= cost then
+        tokens = tokens - cost
+        allowed = 1
+    else
+        retry_after = (cost - tokens) / rate
+    end
+
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+    return {allowed, tostring(retry_after)}
+    """
+
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+
+        self._redis = redis.from_url(url)
+        self._script = self._redis.register_script(self.SCRIPT)
+
+    async def take(self, key: str, bucket: Bucket, cost: int = 1) -> Tuple[bool, float]:
+        allowed, retry_after = await self._script(
+            keys=[f"ratelimit:{key}"],
+            args=[bucket.capacity, bucket.refill_rate, cost]
+        )
+        return bool(allowed), float(retry_after)
+
+
+def create_store():
+    if settings.RATE_LIMIT_REDIS_URL:
+        return RedisBucketStore(settings.RATE_LIMIT_REDIS_URL)
+    if not settings.DEBUG:
+        logger.warning("RATE_LIMIT_REDIS_URL not configured - rate limits are per worker")
+    return MemoryBucketStore()
+
+
+store = create_store()
+
+
+def rate_limit(bucket_name: str, cost: int = 1):
+    """
+    Dependency that charges `cost` tokens from the caller's bucket.
+    Usage: dependencies=[Depends(rate_limit("llm"))]
+    """
+    bucket = BUCKETS[bucket_name]
+
+    async def dependency(request: Request, user_data: dict = Depends(verify_token)):
+        caller = user_data.get('sub') or (request.client.host if request.client else "anonymous")
+        key = f"{bucket_name}:{caller}"
+
+        try:
+            allowed, retry_after = await store.take(key, bucket, cost)
+        except Exception as e:
+            # Fail open: a limiter outage must not take the API down
+            logger.error(f"Rate limiter unavailable: {e}")
+            return
+
+        if not allowed:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Rate limit exceeded",
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+    return dependency
@@ -1,36 +1,181 @@
-from fastapi import HTTPException, Security, status
+from fastapi import HTTPException, Request, Security, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import jwt, JWTError
 from app.core.config import settings
+from app.core.metrics import record_cache
+from collections import OrderedDict
+from typing import Optional
+import hashlib
+import hmac
 import logging
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
 # Define the security scheme (Bearer Token)
 security = HTTPBearer()
 
+# Algorithms Supabase signs access tokens with
+SYMMETRIC_ALGORITHMS = ["HS256"]
+ASYMMETRIC_ALGORITHMS = ["RS256", "ES256"]
 
-def verify_token(credentials: HTTPAuthorizationCredentials = Security(security)) -> dict:
+
+class TokenCache:
+    """
+    Verified claims keyed by SHA-256 of the token.
+    Entries expire at the token's own `exp`, so a cached token is never
+    accepted after it would have failed verification.
+    """
+
+    def __init__(self, max_size: int = settings.TOKEN_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            claims = self._entries.get(key)
+            if claims is None:
+                return None
+            if claims.get("exp", 0) <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return claims
+
+    def set(self, key: str, claims: dict):
+        # Tokens without exp are verified every time rather than cached forever
+        if not claims.get("exp"):
+            return
+        with self._lock:
+            self._entries[key] = claims
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+class JWKSCache:
+    """
+    Supabase's asymmetric signing keys, fetched from the project's JWKS
+    endpoint and kept in memory. Unknown key IDs trigger a refetch (at most
+    once per JWKS_MIN_REFRESH_SECONDS) so key rotation is picked up.
+    """
+
+    def __init__(self):
+        self.url = settings.SUPABASE_JWKS_URL or f"{settings.SUPABASE_URL.rstrip('/')}/auth/v1/.well-known/jwks.json"
+        self._keys: dict = {}
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+
+    def get_key(self, kid: Optional[str]) -> Optional[dict]:
+        now = time.time()
+        key = self._keys.get(kid)
+        if key and now - self._fetched_at < settings.JWKS_CACHE_TTL_SECONDS:
+            return key
+
+        with self._lock:
+            stale = now - self._fetched_at >= settings.JWKS_CACHE_TTL_SECONDS
+            unknown = kid not in self._keys and now - self._fetched_at >= settings.JWKS_MIN_REFRESH_SECONDS
+            if stale or unknown:
+                self._refresh()
+            return self._keys.get(kid)
+
+    def _refresh(self):
+        import requests
+
+        try:
+            response = requests.get(self.url, timeout=5)
+            response.raise_for_status()
+            self._keys = {k.get("kid"): k for k in response.json().get("keys", [])}
+            if settings.DEBUG:
+                logger.debug(f"Fetched {len(self._keys)} JWKS signing keys")
+        except Exception as e:
+            # Keep serving previously fetched keys if the endpoint is down
+            logger.error(f"JWKS fetch failed: {e}")
+        finally:
+            self._fetched_at = time.time()
+
+
+token_cache = TokenCache()
+jwks_cache = JWKSCache()
+
+
+def _decode(token: str) -> dict:
+    """Verify signature and claims, picking the key from the token header."""
+    header = jwt.get_unverified_header(token)
+    algorithm = header.get("alg")
+
+    if algorithm in SYMMETRIC_ALGORITHMS:
+        key = settings.SUPABASE_JWT_SECRET
+    elif algorithm in ASYMMETRIC_ALGORITHMS:
+        key = jwks_cache.get_key(header.get("kid"))
+        if key is None:
+            raise JWTError("Unknown signing key")
+    else:
+        raise JWTError(f"Unsupported algorithm: {algorithm}")
+
+    return jwt.decode(
+        token,
+        key,
+        algorithms=[algorithm],
+        audience="authenticated"
+    )
+
+
+def verify_metrics_token(request: Request):
+    """
+    Gate for /metrics: the scraper must send METRICS_TOKEN as a bearer token.
+    Without METRICS_TOKEN the endpoint does not exist.
+    """
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), settings.METRICS_TOKEN.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+def verify_token(request: Request, credentials: HTTPAuthorizationCredentials = Security(security)) -> dict:
     """
     1. Grabs the token from the request header.
-    2. Decodes it using your SUPABASE_JWT_SECRET.
-    3. If valid, returns the user data.
-    4. If fake or expired, throws an error.
+    2. Reuses claims already verified for this request or a recent one.
+    3. Otherwise decodes it using your SUPABASE_JWT_SECRET (HS256) or the
+       project's JWKS keys (RS256/ES256).
+    4. If valid, returns the user data.
+    5. If fake or expired, throws an error.
     """
+    # Router-level and endpoint-level dependencies share one verification
+    cached = getattr(request.state, "user", None)
+    if cached is not None:
+        return cached
+
     token = credentials.credentials
+    cache_key = TokenCache.key(token)
+
+    payload = token_cache.get(cache_key)
+    record_cache("token", payload is not None)
+    if payload is not None:
+        request.state.user = payload
+        return payload
 
     try:
-        payload = jwt.decode(
-            token,
-            settings.SUPABASE_JWT_SECRET,
-            algorithms=["HS256"],
-            audience="authenticated"
-        )
-        
+        payload = _decode(token)
+
         # Only log user ID in debug mode (never the token!)
         if settings.DEBUG:
             logger.debug(f"Token validated for user: {payload.get('sub')}")
-        
+
+        token_cache.set(cache_key, payload)
+        request.state.user = payload
         return payload
 
     except jwt.ExpiredSignatureError:
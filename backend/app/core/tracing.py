@@ -0,0 +1,172 @@
+"""
+Lightweight per-request span tracing.
+
+Each HTTP request gets a Trace held in a context variable; code on the
+request path opens spans with `span("name")` or the `@traced("name")`
+decorator. The middleware turns the finished trace into a Server-Timing
+header so browser devtools show which stage made a request slow.
+
+Set TRACE_EXPORT_FILE to also append every trace as one OTLP/JSON line
+(the OpenTelemetry collector's file format), written off the event loop.
+"""
+
+import contextvars
+import functools
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Span:
+    __slots__ = ("name", "span_id", "parent_id", "start_ns", "end_ns", "attributes")
+
+    def __init__(self, name: str, parent_id: Optional[str], attributes: dict):
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+
+class Trace:
+    """All spans recorded while handling one request."""
+
+    def __init__(self, name: str, attributes: dict):
+        self.trace_id = os.urandom(16).hex()
+        self.root = Span(name, None, attributes)
+        self.spans: List[Span] = []
+
+    def server_timing(self) -> str:
+        """Server-Timing value; repeated stages (e.g. per-law fetches) are summed."""
+        totals: Dict[str, float] = {}
+        for s in self.spans:
+            totals[s.name] = totals.get(s.name, 0.0) + s.duration_ms
+        parts = [f"{name};dur={ms:.1f}" for name, ms in totals.items()]
+        parts.append(f"total;dur={self.root.duration_ms:.1f}")
+        return ", ".join(parts)
+
+
+_current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("trace", default=None)
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("span", default=None)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Record a child span of the current request; a no-op outside a request."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+
+    parent = _current_span.get() or trace.root
+    current = Span(name, parent.span_id, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    finally:
+        current.end_ns = time.time_ns()
+        _current_span.reset(token)
+        trace.spans.append(current)
+
+
+def traced(name: str):
+    """Decorator form of span() for async functions."""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with span(name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def start_trace(name: str, **attributes) -> Optional[contextvars.Token]:
+    if not settings.TRACING_ENABLED:
+        return None
+    return _current_trace.set(Trace(name, attributes))
+
+
+def finish_trace(token: Optional[contextvars.Token], **attributes) -> Optional[Trace]:
+    if token is None:
+        return None
+    trace = _current_trace.get()
+    _current_trace.reset(token)
+    trace.root.end_ns = time.time_ns()
+    trace.root.attributes.update(attributes)
+    if exporter is not None:
+        exporter.export(trace)
+    return trace
+
+
+class FileSpanExporter:
+    """Appends traces as OTLP/JSON lines from a background thread."""
+
+    def __init__(self, path: str, service_name: str = "rule7-api"):
+        self.path = path
+        self.service_name = service_name
+        self._queue: "queue.SimpleQueue[Trace]" = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, trace: Trace):
+        self._queue.put(trace)
+
+    def _run(self):
+        while True:
+            trace = self._queue.get()
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(self._to_otlp(trace)) + "\n")
+            except Exception as e:
+                logger.warning(f"Trace export failed: {e}")
+
+    def _to_otlp(self, trace: Trace) -> dict:
+        spans = [self._span(trace.trace_id, s) for s in [trace.root, *trace.spans]]
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [_attribute("service.name", self.service_name)]},
+                "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}],
+            }]
+        }
+
+    @staticmethod
+    def _span(trace_id: str, s: Span) -> dict:
+        record = {
+            "traceId": trace_id,
+            "spanId": s.span_id,
+            "name": s.name,
+            "kind": 2 if s.parent_id is None else 1,  # SERVER for the request, INTERNAL below it
+            "startTimeUnixNano": str(s.start_ns),
+            "endTimeUnixNano": str(s.end_ns or s.start_ns),
+            "attributes": [_attribute(k, v) for k, v in s.attributes.items()],
+        }
+        if s.parent_id:
+            record["parentSpanId"] = s.parent_id
+        return record
+
+
+def _attribute(key: str, value) -> dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+# Global instance (None unless TRACE_EXPORT_FILE is set)
+exporter = FileSpanExporter(settings.TRACE_EXPORT_FILE) if settings.TRACE_EXPORT_FILE else None
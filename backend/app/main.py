@@ -1,33 +1,30 @@
 import os
 from fastapi import FastAPI, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
+from fastapi.responses import JSONResponse, Response
 from app.api.v1 import chat, analyze, auth, projects, users, project_files, rag
-from app.core.security import verify_token
+from app.core.security import verify_metrics_token, verify_token
+from app.core.rate_limit import rate_limit
 from app.core.config import settings
+from app.core.lifespan import lifespan
+from app.services.corpus_snapshot import corpus
+from app.core.metrics import render_metrics
+from app.core.tracing import start_trace, finish_trace
+from app.core.logging_setup import setup_logging
+from app.core.profiling import profile_request
 import logging
 
-# Configure logging based on DEBUG setting
-logging.basicConfig(
-    level=logging.DEBUG if settings.DEBUG else logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
+# Configure logging based on DEBUG setting (queued, non-blocking)
+setup_logging()
 logger = logging.getLogger(__name__)
 
-# Initialize rate limiter
-limiter = Limiter(key_func=get_remote_address)
-
 app = FastAPI(
     title="Rule VII SaaS API",
     description="AI Architectural Mentor Backend",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
-# Attach limiter to app state
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
 # CORS - Secure configuration
 # In development (DEBUG=True), allow localhost
@@ -46,7 +43,7 @@ app.add_middleware(
     allow_origins=allowed_origins,
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-    allow_headers=["Authorization", "Content-Type"],
+    allow_headers=["Authorization", "Content-Type", "X-Profile"],
 )
 
 # Request logging middleware - only logs non-sensitive info
@@ -56,39 +53,60 @@ async def log_requests(request: Request, call_next):
     if settings.DEBUG:
         logger.debug(f"📨 {request.method} {request.url.path}")
     
-    response = await call_next(request)
+    # Per-request spans, surfaced to devtools via Server-Timing
+    trace_token = start_trace(
+        f"{request.method} {request.url.path}",
+        **{"http.method": request.method, "http.target": request.url.path}
+    )
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+    finally:
+        trace = finish_trace(trace_token, **{"http.status_code": status_code})
+    
+    if trace is not None:
+        response.headers["Server-Timing"] = trace.server_timing()
     
     if settings.DEBUG:
         logger.debug(f"📤 Response: {response.status_code}")
     
     return response
 
+# Admin-only: run this one request under the sampling profiler (see app/core/profiling.py)
+@app.middleware("http")
+async def profile_requests(request: Request, call_next):
+    return await profile_request(request, call_next)
+
 # --- PROTECTED ROUTES (Lock these) ---
+# Every protected route draws from the caller's "default" bucket;
+# endpoints that call Groq also draw from the "llm" bucket (POST /chat/
+# declares it on the route, every /analyze route via the router).
 app.include_router(
     chat.router,
     prefix="/api/v1/chat",
     tags=["chat"],
-    dependencies=[Depends(verify_token)]
+    dependencies=[Depends(verify_token), Depends(rate_limit("default"))]
 )
 app.include_router(
     analyze.router,
     prefix="/api/v1/analyze",
     tags=["analyze"],
-    dependencies=[Depends(verify_token)]
+    dependencies=[Depends(verify_token), Depends(rate_limit("default")), Depends(rate_limit("llm"))]
 )
 
 app.include_router(
     rag.router,
     prefix="/api/v1/rag",
     tags=["rag"],
-    dependencies=[Depends(verify_token)]
+    dependencies=[Depends(verify_token), Depends(rate_limit("default"))]
 )
 
 app.include_router(
     projects.router,
     prefix="/api/v1/projects",
     tags=["projects"],
-    dependencies=[Depends(verify_token)]
+    dependencies=[Depends(verify_token), Depends(rate_limit("default"))]
 )
 
 # Project Files (upload, get, delete)
@@ -96,14 +114,14 @@ app.include_router(
     project_files.router,
     prefix="/api/v1/projects",
     tags=["project-files"],
-    dependencies=[Depends(verify_token)]
+    dependencies=[Depends(verify_token), Depends(rate_limit("default"))]
 )
 
 app.include_router(
     users.router,
     prefix="/api/v1/users",
     tags=["users"],
-    dependencies=[Depends(verify_token)]
+    dependencies=[Depends(verify_token), Depends(rate_limit("default"))]
 )
 
 
@@ -118,4 +136,23 @@ async def root():
 
 @app.get("/health")
 async def health():
+    """Liveness: the process is up and serving, and engine startup has not given up."""
+    # The error itself is only logged: this endpoint is public
+    if getattr(app.state, "startup_error", None):
+        return JSONResponse(status_code=503, content={"status": "startup_failed"})
     return {"status": "healthy"}
+
+
+@app.get("/health/ready")
+async def ready():
+    """Readiness: engines are loaded and warmed up, safe to route traffic here."""
+    if not getattr(app.state, "ready", False):
+        return JSONResponse(status_code=503, content={"status": "warming_up"})
+    return {"status": "ready", "corpus_version": corpus.version}
+
+
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(verify_metrics_token)])
+async def metrics():
+    """Prometheus scrape endpoint (bearer METRICS_TOKEN; 404 when unset)."""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
@@ -0,0 +1,276 @@
+"""
+Conversation Memory Service
+Server-side memory for follow-up questions: a compact rolling summary of
+older turns plus the last few messages, read from `messages`.
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.core.database import supabase
+from app.core.metrics import record_cache
+from app.services.message_writer import message_writer
+
+logger = logging.getLogger(__name__)
+
+
+SUMMARY_PROMPT = """You maintain a running summary of a conversation between an architect and an AI mentor on Philippine building codes.
+Merge the NEW MESSAGES into the CURRENT SUMMARY.
+Keep: project facts (location, occupancy, areas, floors), questions asked, conclusions and code citations given.
+Drop: greetings, formatting, repeated explanations.
+Write plain prose, no headings, under {max_words} words."""
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token for English text)."""
+    return (len(text) + 3) // 4
+
+
+def truncate_to_tokens(text: str, max_tokens: int, keep: str = "head") -> str:
+    """Trim text to roughly max_tokens, keeping its head or its tail."""
+    max_chars = max_tokens * 4
+    if len(text) <= max_chars:
+        return text
+    if keep == "tail":
+        return "..." + text[-max_chars:]
+    return text[:max_chars] + "..."
+
+
+class ConversationMemory:
+    """
+    Builds bounded conversation context and refreshes the rolling summary
+    in the background after each turn.
+
+    Summaries live in the `conversation_summaries` table and are cached
+    in-process; `covered_until` marks the newest message folded in, so each
+    refresh only summarizes what is new.
+
+    conversation_id comes from the client, so every read is scoped to the
+    caller's user_id, and a refresh only writes a summary for a session the
+    caller owns.
+    """
+
+    CACHE_SIZE = 1024
+
+    def __init__(self):
+        self.recent_messages = settings.MEMORY_RECENT_MESSAGES
+        self.token_budget = settings.MEMORY_TOKEN_BUDGET
+        self.summary_model = settings.MEMORY_SUMMARY_MODEL
+        self._client = None
+        self._cache: "OrderedDict[Tuple[str, str], dict]" = OrderedDict()
+        self._refreshing: Dict[Tuple[str, str], asyncio.Task] = {}
+
+    @property
+    def client(self):
+        if self._client is None:
+            from groq import Groq
+
+            self._client = Groq(api_key=settings.GROQ_API_KEY)
+        return self._client
+
+    async def build_context(self, conversation_id: str, user_id: str) -> str:
+        """
+        Get the conversation so far as prompt text, capped at the token budget.
+        Call this before queueing the current user message.
+        """
+        try:
+            # Previous turns may still be in the write-behind buffer. Read them
+            # from there (before the fetch, so a row written meanwhile is not
+            # missed) rather than flushing every conversation's rows here
+            unwritten = message_writer.pending_for(user_id, conversation_id)
+
+            summary = await self._get_summary(conversation_id, user_id)
+            recent = await asyncio.to_thread(self._fetch_recent, conversation_id, user_id)
+            recent = self._merge_unwritten(recent, unwritten)
+        except Exception as e:
+            logger.error(f"Failed to load conversation memory: {e}")
+            return ""
+
+        if not summary.get("summary") and not recent:
+            return ""
+
+        # Recent turns get whatever the summary leaves, newest first
+        summary_text = truncate_to_tokens(summary.get("summary", ""), self.token_budget // 3)
+        remaining = self.token_budget - estimate_tokens(summary_text)
+        turns = []
+        for msg in reversed(recent):
+            line = f"{msg['role'].upper()}: {msg['content']}"
+            cost = estimate_tokens(line)
+            if cost > remaining:
+                if remaining > 50:
+                    turns.append(truncate_to_tokens(line, remaining))
+                break
+            turns.append(line)
+            remaining -= cost
+        turns.reverse()
+
+        parts = []
+        if summary_text:
+            parts.append(f"SUMMARY OF EARLIER CONVERSATION:\n{summary_text}")
+        if turns:
+            parts.append("RECENT MESSAGES:\n" + "\n\n".join(turns))
+        return "\n\n".join(parts)
+
+    def schedule_refresh(self, conversation_id: str, user_id: str):
+        """Refresh the rolling summary in the background (one task per conversation)."""
+        key = (user_id, conversation_id)
+        running = self._refreshing.get(key)
+        if running and not running.done():
+            return
+        task = asyncio.get_running_loop().create_task(self.refresh(conversation_id, user_id))
+        self._refreshing[key] = task
+        task.add_done_callback(lambda _: self._refreshing.pop(key, None))
+
+    async def refresh(self, conversation_id: str, user_id: str):
+        """Fold messages that have left the recent window into the summary."""
+        try:
+            await message_writer.flush()
+
+            # The summary row is keyed by conversation_id alone: never write
+            # one for a session, or over a row, that belongs to someone else
+            if not await asyncio.to_thread(self._may_write, conversation_id, user_id):
+                logger.warning(f"Skipping summary refresh: conversation {conversation_id} is not owned by the caller")
+                return
+
+            # Bypass the cache: another worker may have refreshed it
+            summary = await self._get_summary(conversation_id, user_id, fresh=True)
+            pending = await asyncio.to_thread(
+                self._fetch_since, conversation_id, user_id, summary.get("covered_until")
+            )
+
+            # Only summarize what no longer fits in the recent window
+            to_fold = pending[:-self.recent_messages] if self.recent_messages else pending
+            if not to_fold:
+                return
+
+            new_summary = await asyncio.to_thread(
+                self._summarize, summary.get("summary", ""), to_fold
+            )
+            record = {
+                "conversation_id": conversation_id,
+                "user_id": user_id,
+                "summary": new_summary,
+                "covered_until": to_fold[-1]["created_at"],
+            }
+            await asyncio.to_thread(
+                lambda: supabase.table("conversation_summaries").upsert(record).execute()
+            )
+            self._remember((user_id, conversation_id), record)
+
+            if settings.DEBUG:
+                logger.debug(
+                    f"Conversation summary refreshed for {conversation_id}: "
+                    f"{len(to_fold)} messages folded, ~{estimate_tokens(new_summary)} tokens"
+                )
+        except Exception as e:
+            logger.error(f"Conversation summary refresh failed: {e}")
+
+    def forget(self, conversation_id: str, user_id: str):
+        """Drop cached memory for a deleted conversation."""
+        self._cache.pop((user_id, conversation_id), None)
+
+    async def _get_summary(self, conversation_id: str, user_id: str, fresh: bool = False) -> dict:
+        key = (user_id, conversation_id)
+        if not fresh:
+            hit = key in self._cache
+            record_cache("conversation_summary", hit)
+            if hit:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        result = await asyncio.to_thread(
+            lambda: supabase.table("conversation_summaries")
+            .select("summary, covered_until")
+            .eq("conversation_id", conversation_id)
+            .eq("user_id", user_id)
+            .limit(1)
+            .execute()
+        )
+        record = result.data[0] if result.data else {}
+        self._remember(key, record)
+        return record
+
+    def _remember(self, key: Tuple[str, str], record: dict):
+        self._cache[key] = record
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+    def _may_write(self, conversation_id: str, user_id: str) -> bool:
+        """The caller owns the session and any existing summary row."""
+        session = supabase.table("sessions")\
+            .select("id")\
+            .eq("id", conversation_id)\
+            .eq("user_id", user_id)\
+            .limit(1)\
+            .execute()
+        if not session.data:
+            return False
+        existing = supabase.table("conversation_summaries")\
+            .select("user_id")\
+            .eq("conversation_id", conversation_id)\
+            .limit(1)\
+            .execute()
+        return not existing.data or existing.data[0].get("user_id") == user_id
+
+    def _fetch_recent(self, conversation_id: str, user_id: str) -> List[dict]:
+        result = supabase.table("messages")\
+            .select("role, content, created_at")\
+            .eq("conversation_id", conversation_id)\
+            .eq("user_id", user_id)\
+            .order("created_at", desc=True)\
+            .limit(self.recent_messages)\
+            .execute()
+        return list(reversed(result.data or []))
+
+    def _merge_unwritten(self, recent: List[dict], unwritten: List[dict]) -> List[dict]:
+        """Fetched messages plus buffered ones not in the table yet, oldest first."""
+        # created_at to the second: Postgres may print fewer fraction digits
+        seen = {(m["role"], m["content"], m["created_at"][:19]) for m in recent}
+        merged = recent + [
+            {"role": m["role"], "content": m["content"], "created_at": m["created_at"]}
+            for m in unwritten
+            if (m["role"], m["content"], m["created_at"][:19]) not in seen
+        ]
+        merged.sort(key=lambda m: m["created_at"])
+        return merged[-self.recent_messages:] if self.recent_messages else merged
+
+    def _fetch_since(self, conversation_id: str, user_id: str, covered_until: Optional[str]) -> List[dict]:
+        query = supabase.table("messages")\
+            .select("role, content, created_at")\
+            .eq("conversation_id", conversation_id)\
+            .eq("user_id", user_id)
+        if covered_until:
+            query = query.gt("created_at", covered_until)
+        result = query.order("created_at", desc=False).execute()
+        return result.data or []
+
+    def _summarize(self, current_summary: str, messages: List[dict]) -> str:
+        summary_tokens = self.token_budget // 3
+        transcript = "\n\n".join(
+            f"{m['role'].upper()}: {truncate_to_tokens(m['content'], summary_tokens)}"
+            for m in messages
+        )
+        try:
+            response = self.client.chat.completions.create(
+                model=self.summary_model,
+                messages=[
+                    {"role": "system", "content": SUMMARY_PROMPT.format(max_words=int(summary_tokens * 0.75))},
+                    {"role": "user", "content": f"CURRENT SUMMARY:\n{current_summary or '(none)'}\n\nNEW MESSAGES:\n{transcript}"}
+                ],
+                temperature=0.1,
+                max_tokens=summary_tokens
+            )
+            summary = response.choices[0].message.content.strip()
+        except Exception as e:
+            # Keep memory bounded even when the summarizer is unavailable
+            logger.warning(f"Summary model failed, falling back to truncation: {e}")
+            summary = f"{current_summary}\n\n{transcript}".strip()
+
+        return truncate_to_tokens(summary, summary_tokens, keep="tail")
+
+
+# Global instance
+conversation_memory = ConversationMemory()
@@ -0,0 +1,238 @@
+"""
+In-process corpus snapshots (see data-pipeline/snapshot.py for the format).
+
+With CORPUS_SNAPSHOT_DIR set, vector search and the Law Router's per-law
+fetches are served from a memory-mapped snapshot instead of Supabase. A
+background task polls the directory's CURRENT pointer. When it moves, the
+new snapshot is loaded off the event loop and swapped in with a single
+reference assignment. Requests already running keep the snapshot they
+started with.
+
+Everything derived from the corpus lives on the snapshot object: the
+per-law row index, document-type masks, the lexical index (loaded on the
+first lexical_search(), which retrieval does not call yet) and the search
+result cache. A swap therefore replaces all of it at once, and nothing can
+serve a mix of two corpus versions.
+
+numpy is imported inside the methods that need it: this module is imported
+by every worker, most of which never load a snapshot.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Must match data-pipeline/snapshot.py
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:\.[0-9]+)*")
+SUPPORTED_FORMAT = 1
+
+# BM25 parameters for lexical_search()
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+class CorpusSnapshot:
+    """One immutable corpus version: mmapped vectors, columnar metadata, lazy lexical index."""
+
+    def __init__(self, path: Path):
+        import numpy as np
+
+        self.path = Path(path)
+        with open(self.path / "manifest.json", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("format") != SUPPORTED_FORMAT:
+            raise ValueError(f"Unsupported snapshot format {self.manifest.get('format')} in {self.path}")
+
+        self.version: str = self.manifest["version"]
+        self.embedding_model: Optional[str] = self.manifest.get("embedding_model")
+        self.embeddings = np.load(self.path / "embeddings.npy", mmap_mode="r")
+        with open(self.path / "columns.json", encoding="utf-8") as f:
+            self.columns: Dict[str, list] = json.load(f)
+        self.count = len(self.columns["id"])
+
+        self._law_rows: Dict[str, List[int]] = {}
+        for row, law_code in enumerate(self.columns["law_code"]):
+            self._law_rows.setdefault(law_code, []).append(row)
+        self._type_masks: Dict[Tuple[str, ...], "np.ndarray"] = {}
+
+        self._lexical: Optional[tuple] = None
+        self._lexical_lock = threading.Lock()
+
+        self._results: "OrderedDict[tuple, List[dict]]" = OrderedDict()
+        self._results_lock = threading.Lock()
+
+    def warm(self):
+        """Fault the vectors into the page cache before this snapshot takes traffic."""
+        import numpy as np
+
+        if self.count:
+            self.embeddings @ np.zeros(self.embeddings.shape[1], dtype=np.float32)
+
+    def row(self, index: int, with_embedding: bool = False) -> dict:
+        doc = {name: values[index] for name, values in self.columns.items()}
+        if with_embedding:
+            doc["embedding"] = self.embeddings[index].tolist()
+        return doc
+
+    def _type_mask(self, document_types: List[str]) -> "np.ndarray":
+        import numpy as np
+
+        key = tuple(sorted(document_types))
+        mask = self._type_masks.get(key)
+        if mask is None:
+            mask = np.isin(np.array(self.columns["document_type"], dtype=object), key)
+            self._type_masks[key] = mask
+        return mask
+
+    def search(
+        self,
+        query_embedding: List[float],
+        top_k: int = 5,
+        document_types: Optional[List[str]] = None
+    ) -> List[dict]:
+        """Cosine top-k, the same rows search_documents(_filtered) would return."""
+        import numpy as np
+
+        if not self.count:
+            return []
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        scores = self.embeddings @ (query / norm if norm else query)
+        if document_types:
+            scores = np.where(self._type_mask(document_types), scores, -np.inf)
+
+        k = min(top_k, self.count)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [
+            {**self.row(int(i)), "similarity": float(scores[i])}
+            for i in top if np.isfinite(scores[i])
+        ]
+
+    def law_rows(self, law_code: str, contains: Optional[str] = None, limit: int = 8) -> List[dict]:
+        """
+        Rows of one law code, with embeddings. `contains` filters like
+        ILIKE '%...%' (case-insensitive substring).
+        """
+        needle = contains.lower() if contains else None
+        rows = []
+        for index in self._law_rows.get(law_code, ()):
+            if needle and needle not in self.columns["content"][index].lower():
+                continue
+            rows.append(self.row(index, with_embedding=True))
+            if len(rows) >= limit:
+                break
+        return rows
+
+    def _lexical_index(self) -> tuple:
+        """(terms, offsets, postings, tf, doc_lengths, avg_length), loaded on first use."""
+        import numpy as np
+
+        with self._lexical_lock:
+            if self._lexical is None:
+                with open(self.path / "lexical_terms.json", encoding="utf-8") as f:
+                    terms = {term: t for t, term in enumerate(json.load(f))}
+                doc_lengths = np.load(self.path / "doc_lengths.npy", mmap_mode="r")
+                avg_length = float(doc_lengths.mean()) if len(doc_lengths) else 0.0
+                self._lexical = (
+                    terms,
+                    np.load(self.path / "lexical_offsets.npy", mmap_mode="r"),
+                    np.load(self.path / "lexical_postings.npy", mmap_mode="r"),
+                    np.load(self.path / "lexical_tf.npy", mmap_mode="r"),
+                    doc_lengths,
+                    avg_length or 1.0,  # All content empty: no postings, but never divide by zero
+                )
+            return self._lexical
+
+    def lexical_search(self, query: str, top_k: int = 10) -> List[Tuple[int, float]]:
+        """BM25 over the snapshot's inverted index: [(row, score), ...]."""
+        import numpy as np
+
+        terms, offsets, postings, term_freqs, doc_lengths, avg_length = self._lexical_index()
+        scores: Dict[int, float] = {}
+        for term in set(TOKEN_PATTERN.findall(query.lower())):
+            t = terms.get(term)
+            if t is None:
+                continue
+            start, end = int(offsets[t]), int(offsets[t + 1])
+            idf = math.log(1 + (self.count - (end - start) + 0.5) / ((end - start) + 0.5))
+            rows = postings[start:end]
+            tf = term_freqs[start:end].astype(np.float32)
+            lengths = doc_lengths[rows]
+            weights = idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * lengths / avg_length))
+            for row, weight in zip(rows.tolist(), weights.tolist()):
+                scores[row] = scores.get(row, 0.0) + weight
+        return sorted(scores.items(), key=lambda item: -item[1])[:top_k]
+
+    def cached_results(self, key: tuple) -> Optional[List[dict]]:
+        with self._results_lock:
+            results = self._results.get(key)
+            if results is not None:
+                self._results.move_to_end(key)
+            return results
+
+    def cache_results(self, key: tuple, results: List[dict]):
+        with self._results_lock:
+            self._results[key] = results
+            self._results.move_to_end(key)
+            while len(self._results) > settings.CORPUS_RESULT_CACHE_SIZE:
+                self._results.popitem(last=False)
+
+
+class CorpusStore:
+    """Holds the snapshot currently being served and swaps in new versions."""
+
+    def __init__(self):
+        self.snapshot: Optional[CorpusSnapshot] = None
+        self._refresh_lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(settings.CORPUS_SNAPSHOT_DIR)
+
+    @property
+    def version(self) -> Optional[str]:
+        snapshot = self.snapshot
+        return snapshot.version if snapshot else None
+
+    def refresh(self) -> bool:
+        """Load the snapshot CURRENT points at, if it is new. Blocking: call off the loop."""
+        root = Path(settings.CORPUS_SNAPSHOT_DIR)
+        with self._refresh_lock:
+            try:
+                version = (root / "CURRENT").read_text(encoding="utf-8").strip()
+            except FileNotFoundError:
+                if self.snapshot is None:
+                    logger.warning(f"No corpus snapshot in {root} yet; using Supabase search")
+                return False
+            if version == self.version:
+                return False
+
+            snapshot = CorpusSnapshot(root / version)
+            snapshot.warm()
+            previous, self.snapshot = self.version, snapshot
+            logger.info(f"Corpus snapshot {previous} -> {snapshot.version} ({snapshot.count} rows)")
+            return True
+
+    async def watch(self):
+        """Load the current snapshot, then poll for new ones until cancelled."""
+        while True:
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                # Keep serving the snapshot we have
+                logger.error(f"Corpus snapshot refresh failed: {e}")
+            await asyncio.sleep(settings.CORPUS_SNAPSHOT_POLL_SECONDS)
+
+
+# Global instance
+corpus = CorpusStore()
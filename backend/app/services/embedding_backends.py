@@ -0,0 +1,166 @@
+"""
+Embedding Backends
+Interchangeable implementations behind EmbeddingService, selected with
+EMBEDDING_BACKEND:
+
+    local      - SentenceTransformer on PyTorch (reference implementation)
+    onnx       - ONNX Runtime, fp32 export of the same model
+    onnx-int8  - ONNX Runtime, dynamically quantized int8 weights
+    sidecar    - shared embedding process over a Unix socket
+
+Export the ONNX models with scripts/export_onnx_embeddings.py and check
+them against the reference with scripts/embedding_parity.py.
+"""
+
+import logging
+import os
+from abc import ABC, abstractmethod
+from typing import List
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+ONNX_FP32_FILE = "model.onnx"
+ONNX_INT8_FILE = "model.int8.onnx"
+
+
+class EmbeddingBackend(ABC):
+    """Interface every backend implements; a backend missing a method fails when built."""
+
+    name = "base"
+
+    @property
+    @abstractmethod
+    def dimension(self) -> int:
+        ...
+
+    @abstractmethod
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts; vectors are L2-normalized, like the reference model."""
+
+
+class InProcessBackend(EmbeddingBackend):
+    """Backends that run the model in this process and can return arrays."""
+
+    @abstractmethod
+    def encode(self, texts: List[str]):
+        """Embed texts into an (n, dimension) float32 numpy array."""
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        return self.encode(texts).tolist()
+
+
+class SentenceTransformerBackend(InProcessBackend):
+    name = "local"
+
+    def __init__(self, model_name: str = settings.EMBEDDING_MODEL):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name)
+        logger.info(f"Embedding model loaded (device: {self.model.device})")
+
+    @property
+    def dimension(self) -> int:
+        return self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts: List[str]):
+        return self.model.encode(texts, convert_to_numpy=True)
+
+
+class OnnxEmbeddingBackend(InProcessBackend):
+    """
+    MiniLM on ONNX Runtime: tokenize, run the transformer, mean-pool over
+    the attention mask and L2-normalize (the same pipeline as the
+    SentenceTransformer model, without PyTorch).
+    """
+
+    MAX_SEQ_LENGTH = 256  # all-MiniLM-L6-v2 truncates at 256 word pieces
+
+    def __init__(self, model_dir: str = settings.EMBEDDING_ONNX_DIR, quantized: bool = False):
+        try:
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise RuntimeError(
+                "ONNX embedding backend needs onnxruntime and tokenizers (pip install onnxruntime)"
+            ) from e
+
+        self.name = "onnx-int8" if quantized else "onnx"
+        model_path = os.path.join(model_dir, ONNX_INT8_FILE if quantized else ONNX_FP32_FILE)
+        if not os.path.exists(model_path):
+            raise RuntimeError(
+                f"{model_path} not found - run scripts/export_onnx_embeddings.py first"
+            )
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self.MAX_SEQ_LENGTH)
+        self.tokenizer.enable_padding()
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if settings.EMBEDDING_THREADS:
+            options.intra_op_num_threads = settings.EMBEDDING_THREADS
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self._input_names = {i.name for i in self.session.get_inputs()}
+        self._dimension = self.session.get_outputs()[0].shape[-1]
+        logger.info(f"ONNX embedding model loaded: {model_path}")
+
+    @property
+    def dimension(self) -> int:
+        return self._dimension
+
+    def encode(self, texts: List[str]):
+        import numpy as np
+
+        if not texts:
+            return np.zeros((0, self.dimension), dtype=np.float32)
+
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+
+        token_embeddings = self.session.run(None, feeds)[0]
+
+        # Mean pooling over real tokens, then L2 normalize
+        mask = attention_mask[..., None].astype(np.float32)
+        summed = (token_embeddings * mask).sum(axis=1)
+        pooled = summed / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return (pooled / np.clip(norms, 1e-12, None)).astype(np.float32)
+
+
+class SidecarBackend(EmbeddingBackend):
+    name = "sidecar"
+
+    def __init__(self, socket_path: str = settings.EMBEDDING_SOCKET_PATH):
+        from app.services.embedding_sidecar import SidecarEmbeddingClient
+
+        self.client = SidecarEmbeddingClient(socket_path)
+        self._dimension = None
+        logger.info(f"Using embedding sidecar at {socket_path}")
+
+    @property
+    def dimension(self) -> int:
+        if self._dimension is None:
+            self._dimension = len(self.embed_batch(["dimension probe"])[0])
+        return self._dimension
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        return self.client.embed_batch(texts)
+
+
+def create_backend(name: str = settings.EMBEDDING_BACKEND) -> EmbeddingBackend:
+    """Build the backend named by EMBEDDING_BACKEND (or `name`)."""
+    if name == "local":
+        return SentenceTransformerBackend()
+    if name == "onnx":
+        return OnnxEmbeddingBackend(quantized=False)
+    if name == "onnx-int8":
+        return OnnxEmbeddingBackend(quantized=True)
+    if name == "sidecar":
+        return SidecarBackend()
+    raise ValueError(f"Unknown embedding backend: {name}")
@@ -0,0 +1,227 @@
+"""
+Embedding Sidecar
+One process owns the embedding model and serves embeddings to
+every API worker over a Unix socket, batching requests across workers.
+
+Run it next to the API:
+    python -m app.services.embedding_sidecar
+and start the workers with EMBEDDING_BACKEND=sidecar.
+
+Wire format (both directions, big-endian header):
+    request:  u32 length + JSON {"texts": [...]}
+    response: u32 count + u32 dim + count*dim float32 (little-endian)
+              count == 0xFFFFFFFF means error; dim is then the byte length
+              of a UTF-8 error message that follows.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import struct
+import sys
+import threading
+from array import array
+from typing import List, Optional, Tuple
+from app.core.config import settings
+from app.core.logging_setup import setup_logging
+
+logger = logging.getLogger(__name__)
+
+HEADER = struct.Struct("!I")
+RESPONSE_HEADER = struct.Struct("!II")
+ERROR_MARKER = 0xFFFFFFFF
+
+
+# ==========================================
+# CLIENT (used by API workers)
+# ==========================================
+
+class SidecarEmbeddingClient:
+    """
+    Blocking client for the sidecar. Keeps one connection per thread and
+    reconnects once if the sidecar restarted.
+    """
+
+    def __init__(self, socket_path: str = settings.EMBEDDING_SOCKET_PATH, timeout: float = 10.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        payload = json.dumps({"texts": texts}).encode("utf-8")
+        try:
+            return self._request(payload)
+        except (ConnectionError, BrokenPipeError, socket.timeout):
+            self._close()
+            return self._request(payload)
+
+    def _connection(self) -> socket.socket:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            conn.settimeout(self.timeout)
+            conn.connect(self.socket_path)
+            self._local.conn = conn
+        return conn
+
+    def _close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _request(self, payload: bytes) -> List[List[float]]:
+        conn = self._connection()
+        conn.sendall(HEADER.pack(len(payload)) + payload)
+
+        count, dim = RESPONSE_HEADER.unpack(self._recv_exactly(conn, RESPONSE_HEADER.size))
+        if count == ERROR_MARKER:
+            message = self._recv_exactly(conn, dim).decode("utf-8")
+            raise RuntimeError(f"Embedding sidecar error: {message}")
+
+        values = array("f")
+        values.frombytes(self._recv_exactly(conn, count * dim * values.itemsize))
+        if sys.byteorder != "little":
+            values.byteswap()
+
+        flat = values.tolist()
+        return [flat[i * dim:(i + 1) * dim] for i in range(count)]
+
+    @staticmethod
+    def _recv_exactly(conn: socket.socket, size: int) -> bytes:
+        chunks = bytearray()
+        while len(chunks) < size:
+            chunk = conn.recv(size - len(chunks))
+            if not chunk:
+                raise ConnectionError("Embedding sidecar closed the connection")
+            chunks.extend(chunk)
+        return bytes(chunks)
+
+
+# ==========================================
+# SERVER (owns the model)
+# ==========================================
+
+class EmbeddingSidecar:
+    """
+    Collects requests from all connections into micro-batches: the first
+    request opens a batch window of EMBEDDING_BATCH_WAIT_MS, and the batch
+    is encoded as soon as the window closes or EMBEDDING_MAX_BATCH texts
+    are waiting.
+    """
+
+    def __init__(
+        self,
+        socket_path: str = settings.EMBEDDING_SOCKET_PATH,
+        max_batch: int = settings.EMBEDDING_MAX_BATCH,
+        batch_wait_ms: int = settings.EMBEDDING_BATCH_WAIT_MS
+    ):
+        self.socket_path = socket_path
+        self.max_batch = max_batch
+        self.batch_wait = batch_wait_ms / 1000
+        self._queue: "asyncio.Queue[Tuple[List[str], asyncio.Future]]" = None
+        self._backend = None
+
+    def load_model(self):
+        from app.services.embedding_backends import create_backend
+
+        logger.info(f"Loading embedding backend: {settings.EMBEDDING_SIDECAR_BACKEND}")
+        self._backend = create_backend(settings.EMBEDDING_SIDECAR_BACKEND)
+        self._backend.encode(["warm up"])
+
+    async def serve(self):
+        self._queue = asyncio.Queue()
+        await asyncio.to_thread(self.load_model)
+
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        os.chmod(self.socket_path, 0o660)
+        logger.info(f"Embedding sidecar listening on {self.socket_path}")
+
+        batcher = asyncio.create_task(self._batch_loop())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                try:
+                    (length,) = HEADER.unpack(await reader.readexactly(HEADER.size))
+                    payload = json.loads(await reader.readexactly(length))
+                except asyncio.IncompleteReadError:
+                    break
+
+                future = loop.create_future()
+                await self._queue.put((payload.get("texts", []), future))
+                try:
+                    writer.write(await future)
+                except Exception as e:
+                    message = str(e).encode("utf-8")
+                    writer.write(RESPONSE_HEADER.pack(ERROR_MARKER, len(message)) + message)
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def _batch_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            pending = len(batch[0][0])
+            deadline = loop.time() + self.batch_wait
+
+            while pending < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(item)
+                pending += len(item[0])
+
+            texts = [text for item_texts, _ in batch for text in item_texts]
+            try:
+                vectors = await asyncio.to_thread(self._encode, texts)
+            except Exception as e:
+                logger.error(f"Batch encode failed: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            offset = 0
+            for item_texts, future in batch:
+                rows = vectors[offset:offset + len(item_texts)]
+                offset += len(item_texts)
+                if not future.done():
+                    future.set_result(
+                        RESPONSE_HEADER.pack(rows.shape[0], rows.shape[1]) + rows.astype("<f4").tobytes()
+                    )
+
+            if settings.DEBUG:
+                logger.debug(f"Encoded batch of {len(texts)} texts from {len(batch)} requests")
+
+    def _encode(self, texts: List[str]):
+        import numpy as np
+
+        if not texts:
+            return np.zeros((0, self._backend.dimension), dtype=np.float32)
+        return self._backend.encode(texts)
+
+
+def main(socket_path: Optional[str] = None):
+    setup_logging()
+    sidecar = EmbeddingSidecar(socket_path or settings.EMBEDDING_SOCKET_PATH)
+    asyncio.run(sidecar.serve())
+
+
+if __name__ == "__main__":
+    main()
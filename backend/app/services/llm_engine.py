@@ -4,11 +4,13 @@ Handles AI response generation using Groq.
 """
 
 import logging
+import time
 from typing import List, Optional, Dict, Any
-from groq import Groq
 from app.models.citation import SourceNode
 from app.core.config import settings
 from app.services.rag_engine import RAGEngine
+from app.core.metrics import LLM_TTFT_SECONDS, LLM_TOTAL_SECONDS, LLM_TOKENS
+from app.core.tracing import span, traced
 
 logger = logging.getLogger(__name__)
 
@@ -138,21 +140,26 @@ class LLMEngine:
     Integrates with RAGEngine for context-aware responses.
     """
     
-    def __init__(self):
+    def __init__(self, rag_engine: Optional[RAGEngine] = None):
+        from groq import Groq  # Loaded on first use of the LLM subsystem
+
         self.api_key = settings.GROQ_API_KEY
         self.client = Groq(api_key=self.api_key)
-        self.rag_engine = RAGEngine()
+        # Share the app's RAGEngine instead of building a second one
+        self.rag_engine = rag_engine or RAGEngine()
         self.model = "llama-3.3-70b-versatile"  # Updated (3.1 deprecated)
         
         if settings.DEBUG:
             logger.info(f"LLM Engine initialized with model: {self.model}")
     
+    @traced("llm.generate")
     async def generate(
         self, 
         prompt: str, 
         sources: List[SourceNode],
         project_context: str = "",
-        mode: str = "quick_answer"
+        mode: str = "quick_answer",
+        conversation_context: str = ""
     ) -> Dict[str, Any]:
         """
         Generate AI response with RAG context.
@@ -162,6 +169,7 @@ class LLMEngine:
             sources: Retrieved source documents (for citation)
             project_context: Additional project-specific context
             mode: Chat mode (quick_answer, plan_draft, compliance)
+            conversation_context: Bounded summary + recent turns of this conversation
             
         Returns:
             Dict with 'text' and optional 'proposal'
@@ -184,22 +192,45 @@ class LLMEngine:
                 full_context += f"KNOWLEDGE BASE CONTEXT:\n{rag_context}\n\n"
             if project_context:
                 full_context += f"PROJECT CONTEXT:\n{project_context}\n\n"
+            if conversation_context:
+                full_context += f"CONVERSATION SO FAR:\n{conversation_context}\n\n"
             
             # 4. Create the user message with context
             user_message = f"{full_context}USER QUESTION: {prompt}"
             
             # 5. Call Groq API with mode-specific settings
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_message}
-                ],
-                temperature=temperature,
-                max_tokens=max_tokens
-            )
+            # Streamed so time-to-first-token can be measured separately
+            request_start = time.perf_counter()
+            with span("llm.groq", model=self.model, mode=mode) as groq_span:
+                stream = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_message}
+                    ],
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    stream=True
+                )
+            
+                parts = []
+                usage = None
+                for chunk in stream:
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if delta:
+                        if not parts:
+                            ttft = time.perf_counter() - request_start
+                            LLM_TTFT_SECONDS.labels(mode=mode).observe(ttft)
+                            if groq_span is not None:
+                                groq_span.attributes["ttft_ms"] = round(ttft * 1000, 1)
+                        parts.append(delta)
+                    x_groq = getattr(chunk, "x_groq", None)
+                    if x_groq is not None and getattr(x_groq, "usage", None):
+                        usage = x_groq.usage
+                LLM_TOTAL_SECONDS.labels(mode=mode).observe(time.perf_counter() - request_start)
+                self._record_usage(usage)
             
-            ai_text = response.choices[0].message.content
+            ai_text = "".join(parts)
             
             # 5. Detect if response should include a proposal
             proposal = self._extract_proposal(prompt, ai_text)
@@ -219,6 +250,15 @@ class LLMEngine:
                 "proposal": None
             }
     
+    def _record_usage(self, usage):
+        """Count prompt/completion tokens reported on the final stream chunk."""
+        if usage is None:
+            return
+        for kind in ("prompt", "completion"):
+            tokens = getattr(usage, f"{kind}_tokens", None)
+            if tokens:
+                LLM_TOKENS.labels(model=self.model, kind=kind).inc(tokens)
+    
     def _extract_proposal(self, prompt: str, response: str) -> Optional[Dict[str, Any]]:
         """
         Detect if the response should include a formal proposal.
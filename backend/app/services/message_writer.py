@@ -0,0 +1,168 @@
+"""
+Message Writer Service
+Write-behind buffer for chat persistence.
+
+Rows are queued in memory and flushed to Supabase as bulk inserts every
+few milliseconds (or as soon as a batch fills up), so saving a message
+never blocks the response that produced it.
+"""
+
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from app.core.config import settings
+from app.core.database import supabase
+from app.core.metrics import timed, DB_WRITE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class MessageWriter:
+    """
+    Batches inserts per table and writes them in the background.
+    Failed batches are retried with backoff; a batch that keeps failing is
+    replayed row by row so one bad row cannot drop its neighbours.
+    """
+
+    def __init__(
+        self,
+        batch_size: int = settings.MESSAGE_BATCH_SIZE,
+        flush_interval_ms: int = settings.MESSAGE_FLUSH_INTERVAL_MS,
+        max_retries: int = settings.MESSAGE_WRITE_RETRIES
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_retries = max_retries
+
+        self._pending: Dict[str, List[dict]] = defaultdict(list)
+        self._pending_count = 0
+        self._in_flight: Dict[str, List[dict]] = {}
+        self._has_rows: Optional[asyncio.Event] = None
+        self._batch_full: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    def start(self):
+        """Start the background flush loop on the running event loop."""
+        if self._task and not self._task.done():
+            return
+        self._has_rows = asyncio.Event()
+        self._batch_full = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        if self._pending_count:
+            self._has_rows.set()
+
+    async def stop(self):
+        """Stop the flush loop and write out everything still buffered."""
+        if self._task:
+            # Wake the loop and let it finish any write in flight: cancelling
+            # it mid-_write would lose the batch already taken off the buffer
+            self._stopping = True
+            self._has_rows.set()
+            self._batch_full.set()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._stopping = False
+        await self.flush()
+
+    def enqueue(self, table: str, row: dict) -> dict:
+        """
+        Queue a row for insertion and return it.
+
+        `created_at` is stamped here so rows written in the same batch keep
+        their real order (the column default would give them all one NOW()).
+        """
+        row.setdefault("created_at", datetime.now(timezone.utc).isoformat())
+        self._pending[table].append(row)
+        self._pending_count += 1
+
+        if not self._task or self._task.done():
+            self.start()
+        self._has_rows.set()
+        if self._pending_count >= self.batch_size:
+            self._batch_full.set()
+        return row
+
+    def pending_for(self, user_id: str, conversation_id: str, table: str = "messages") -> List[dict]:
+        """One conversation's rows that are queued or still being written, oldest first."""
+        rows = self._in_flight.get(table, []) + self._pending.get(table, [])
+        return [
+            row for row in rows
+            if row.get("conversation_id") == conversation_id and row.get("user_id") == user_id
+        ]
+
+    async def flush(self):
+        """Write all buffered rows now."""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+
+        async with self._flush_lock:
+            if not self._pending_count:
+                return
+            pending, self._pending = self._pending, defaultdict(list)
+            self._pending_count = 0
+            if self._batch_full:
+                self._batch_full.clear()
+
+            # Visible to pending_for() until the writes have finished
+            self._in_flight = pending
+            try:
+                for table, rows in pending.items():
+                    await self._write(table, rows)
+            finally:
+                self._in_flight = {}
+
+    async def _run(self):
+        while not self._stopping:
+            await self._has_rows.wait()
+            self._has_rows.clear()
+            if self._stopping:
+                break
+
+            # Give the batch a few ms to fill up unless it already has
+            if self._pending_count < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._batch_full.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Message flush failed: {e}")
+
+    async def _write(self, table: str, rows: List[dict]):
+        for attempt in range(self.max_retries + 1):
+            try:
+                await asyncio.to_thread(self._insert, table, rows)
+                if settings.DEBUG:
+                    logger.debug(f"Flushed {len(rows)} rows to {table}")
+                return
+            except Exception as e:
+                if attempt < self.max_retries:
+                    await asyncio.sleep(0.1 * (2 ** attempt))
+                else:
+                    logger.warning(f"Bulk insert into {table} failed after {attempt + 1} attempts: {e}")
+
+        # Isolate the bad row(s) instead of losing the whole batch
+        for row in rows:
+            try:
+                await asyncio.to_thread(self._insert, table, [row])
+            except Exception as e:
+                logger.error(f"Dropping {table} row after repeated failures: {e}")
+
+    @staticmethod
+    def _insert(table: str, rows: List[dict]):
+        with timed(DB_WRITE_SECONDS, table=table):
+            supabase.table(table).insert(rows).execute()
+
+
+# Global instance
+message_writer = MessageWriter()
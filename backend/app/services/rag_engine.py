@@ -3,23 +3,47 @@ RAG Engine Service
 Handles vector search and document retrieval from Supabase.
 """
 
+import asyncio
 import logging
+import random
+import re
+import threading
+import time
 from typing import List, Optional
-from sentence_transformers import SentenceTransformer
+from app.services.embedding_backends import SentenceTransformerBackend, create_backend
 from app.models.citation import SourceNode
 from app.core.database import supabase
 from app.core.config import settings
+from app.core.tracing import span, traced
+from app.core.logging_setup import RETRIEVAL_LOGGER
+from app.core.metrics import (
+    timed, record_cache, EMBEDDING_SECONDS, SEARCH_RPC_SECONDS, LAW_FETCH_SECONDS,
+    CONTEXT_PACKING_SECONDS, LAW_ROUTER_MATCHES, DUAL_READ_SECONDS, DUAL_READ_OVERLAP,
+)
+from app.services.corpus_snapshot import CorpusSnapshot, corpus
 
 logger = logging.getLogger(__name__)
+# Sampled, structured channel for per-law / per-document hybrid search events
+retrieval_log = logging.getLogger(RETRIEVAL_LOGGER)
+
+# Fallback for rows ingested before section_ref was stored, in priority order
+SECTION_PATTERNS = (
+    re.compile(r'\[Reference:\s*([^\]]+)\]', re.IGNORECASE),
+    re.compile(r'Section\s+(\d+[\.\d]*)', re.IGNORECASE),
+    re.compile(r'Article\s+(\d+)', re.IGNORECASE),
+)
 
 
 class EmbeddingService:
     """
     Singleton service for text embeddings.
     Loads model once, reuses for all requests.
+    
+    The model runs on the backend named by EMBEDDING_BACKEND
+    (local PyTorch, ONNX Runtime fp32/int8, or the shared sidecar).
     """
     _instance = None
-    _model = None
+    _backend = None
     
     def __new__(cls):
         if cls._instance is None:
@@ -27,14 +51,65 @@ class EmbeddingService:
         return cls._instance
     
     def __init__(self):
-        if EmbeddingService._model is None:
-            logger.info("Loading embedding model...")
-            EmbeddingService._model = SentenceTransformer('all-MiniLM-L6-v2')
-            logger.info(f"Embedding model loaded (device: {EmbeddingService._model.device})")
+        if EmbeddingService._backend is None:
+            logger.info(f"Loading embedding backend: {settings.EMBEDDING_BACKEND}")
+            EmbeddingService._backend = create_backend(settings.EMBEDDING_BACKEND)
     
     def embed(self, text: str) -> List[float]:
         """Convert text to embedding vector."""
-        return EmbeddingService._model.encode(text).tolist()
+        return self.embed_batch([text])[0]
+    
+    def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Convert several texts to embedding vectors in one call."""
+        with span("rag.embed"), timed(EMBEDDING_SECONDS, backend=settings.EMBEDDING_BACKEND):
+            return EmbeddingService._backend.embed_batch(texts)
+
+
+class ShadowIndex:
+    """
+    rag_documents_shadow: the corpus embedded with SHADOW_EMBEDDING_MODEL.
+    
+    Filled in the background by scripts/reembed_corpus.py. Until
+    EMBEDDING_CUTOVER is set it is only read by dual-read comparisons;
+    after cut-over it serves search and the old column becomes the
+    comparison side.
+    """
+    _backend = None
+    _lock = threading.Lock()
+    
+    @property
+    def enabled(self) -> bool:
+        return bool(settings.SHADOW_EMBEDDING_MODEL)
+    
+    @property
+    def serving(self) -> bool:
+        return self.enabled and settings.EMBEDDING_CUTOVER
+    
+    def embed(self, text: str) -> List[float]:
+        if ShadowIndex._backend is None:
+            with ShadowIndex._lock:
+                if ShadowIndex._backend is None:
+                    logger.info(f"Loading shadow embedding model: {settings.SHADOW_EMBEDDING_MODEL}")
+                    ShadowIndex._backend = SentenceTransformerBackend(settings.SHADOW_EMBEDDING_MODEL)
+        with span("rag.embed", index="shadow"), timed(EMBEDDING_SECONDS, backend="shadow"):
+            return ShadowIndex._backend.embed_batch([text])[0]
+    
+    def search(self, query_embedding: List[float], top_k: int, document_types: Optional[List[str]] = None) -> List[dict]:
+        with timed(SEARCH_RPC_SECONDS, rpc="search_documents_shadow"):
+            result = supabase.rpc(
+                "search_documents_shadow",
+                {
+                    "query_embedding": query_embedding,
+                    "target_model": settings.SHADOW_EMBEDDING_MODEL,
+                    "match_count": top_k,
+                    "doc_types": document_types
+                }
+            ).execute()
+        return result.data or []
+
+
+# Global instance
+shadow_index = ShadowIndex()
 
 
 class VectorSearchService:
@@ -44,57 +119,69 @@ class VectorSearchService:
     
     def __init__(self):
         self.embedding_service = EmbeddingService()
+        self._dual_reads = set()
+    
+    @property
+    def active_model(self) -> str:
+        """Model whose vectors are being served."""
+        return settings.SHADOW_EMBEDDING_MODEL if shadow_index.serving else settings.EMBEDDING_MODEL
+    
+    def embed_query(self, query: str) -> List[float]:
+        """Query vector comparable with the served index's vectors."""
+        return shadow_index.embed(query) if shadow_index.serving else self.embedding_service.embed(query)
     
+    def usable_snapshot(self) -> Optional[CorpusSnapshot]:
+        """The loaded corpus snapshot, unless it holds another model's vectors."""
+        snapshot = corpus.snapshot
+        if snapshot is not None and snapshot.embedding_model != self.active_model:
+            return None
+        return snapshot
+    
+    @traced("rag.vector_search")
     async def search(
         self, 
         query: str, 
         top_k: int = 5,
         similarity_threshold: float = 0.3,
-        document_types: Optional[List[str]] = None
+        document_types: Optional[List[str]] = None,
+        snapshot: Optional[CorpusSnapshot] = None
     ) -> List[dict]:
         """
-        Search for similar documents in Supabase.
+        Search for similar documents in Supabase, or in the loaded corpus snapshot.
         
         Args:
             query: The search query
             top_k: Number of results to return
             similarity_threshold: Minimum similarity score
             document_types: Optional list of document types to filter by
+            snapshot: Corpus snapshot to search (defaults to the one being served)
             
         Returns:
             List of matching documents with similarity scores
         """
+        snapshot = snapshot or self.usable_snapshot()
+        if snapshot is not None:
+            return self._search_snapshot(snapshot, query, top_k, similarity_threshold, document_types)
+        
         try:
-            # 1. Embed the query
-            query_embedding = self.embedding_service.embed(query)
-            
-            # 2. Search in Supabase using RPC function
-            # Use filtered search if document_types specified
-            if document_types:
-                result = supabase.rpc(
-                    "search_documents_filtered",
-                    {
-                        "query_embedding": query_embedding,
-                        "match_count": top_k,
-                        "doc_types": document_types
-                    }
-                ).execute()
+            start = time.perf_counter()
+            # 1. Embed the query, 2. search the served index in Supabase
+            if shadow_index.serving:
+                data = shadow_index.search(shadow_index.embed(query), top_k, document_types)
             else:
-                result = supabase.rpc(
-                    "search_documents",
-                    {
-                        "query_embedding": query_embedding,
-                        "match_count": top_k
-                    }
-                ).execute()
+                data = self._rpc_search(self.embedding_service.embed(query), top_k, document_types)
+            served_seconds = time.perf_counter() - start
+            
+            if shadow_index.enabled and random.random() < settings.SHADOW_DUAL_READ_RATE:
+                self._schedule_dual_read(query, top_k, document_types, data, served_seconds)
             
-            if not result.data:
+            if not data:
                 logger.debug(f"No results found for query: {query[:50]}...")
                 return []
             
             # 3. Filter by similarity threshold
             filtered = [
-                doc for doc in result.data 
+                doc for doc in data 
                 if doc.get('similarity', 0) >= similarity_threshold
             ]
             
@@ -106,6 +193,85 @@ class VectorSearchService:
         except Exception as e:
             logger.error(f"Vector search failed: {e}")
             return []
+    
+    def _rpc_search(self, query_embedding: List[float], top_k: int, document_types: Optional[List[str]]) -> List[dict]:
+        """search_documents(_filtered) over rag_documents.embedding."""
+        # Use filtered search if document_types specified
+        if document_types:
+            with timed(SEARCH_RPC_SECONDS, rpc="search_documents_filtered"):
+                result = supabase.rpc(
+                    "search_documents_filtered",
+                    {
+                        "query_embedding": query_embedding,
+                        "match_count": top_k,
+                        "doc_types": document_types
+                    }
+                ).execute()
+        else:
+            with timed(SEARCH_RPC_SECONDS, rpc="search_documents"):
+                result = supabase.rpc(
+                    "search_documents",
+                    {
+                        "query_embedding": query_embedding,
+                        "match_count": top_k
+                    }
+                ).execute()
+        return result.data or []
+    
+    def _schedule_dual_read(self, query: str, top_k: int, document_types, served: List[dict], served_seconds: float):
+        task = asyncio.create_task(self._dual_read(query, top_k, document_types, served, served_seconds))
+        self._dual_reads.add(task)
+        task.add_done_callback(self._dual_reads.discard)
+    
+    async def _dual_read(self, query: str, top_k: int, document_types, served: List[dict], served_seconds: float):
+        """Run the same search on the index not being served; record latency and top-k overlap."""
+        def other_search():
+            if shadow_index.serving:
+                return self._rpc_search(self.embedding_service.embed(query), top_k, document_types)
+            return shadow_index.search(shadow_index.embed(query), top_k, document_types)
+        
+        try:
+            start = time.perf_counter()
+            other = await asyncio.to_thread(other_search)
+            other_seconds = time.perf_counter() - start
+        except Exception as e:
+            logger.warning("Dual-read comparison failed: %s", e)
+            return
+        
+        served_index, other_index = ("shadow", "primary") if shadow_index.serving else ("primary", "shadow")
+        served_ids = [doc.get('id') for doc in served]
+        other_ids = {doc.get('id') for doc in other}
+        overlap = len(other_ids.intersection(served_ids)) / len(served_ids) if served_ids else 1.0
+        DUAL_READ_SECONDS.labels(index=served_index).observe(served_seconds)
+        DUAL_READ_SECONDS.labels(index=other_index).observe(other_seconds)
+        DUAL_READ_OVERLAP.observe(overlap)
+        if retrieval_log.isEnabledFor(logging.DEBUG):
+            retrieval_log.debug("dual_read", extra={"fields": {
+                "served": served_index, "overlap": round(overlap, 3), "top_k": top_k,
+                f"{served_index}_ms": round(served_seconds * 1000, 1),
+                f"{other_index}_ms": round(other_seconds * 1000, 1),
+            }})
+    
+    def _search_snapshot(
+        self,
+        snapshot: CorpusSnapshot,
+        query: str,
+        top_k: int,
+        similarity_threshold: float,
+        document_types: Optional[List[str]]
+    ) -> List[dict]:
+        """In-process search; results are cached per corpus version."""
+        key = (query, top_k, tuple(document_types or ()))
+        results = snapshot.cached_results(key)
+        record_cache("retrieval", results is not None)
+        if results is None:
+            query_embedding = self.embed_query(query)
+            with timed(SEARCH_RPC_SECONDS, rpc="snapshot"):
+                results = snapshot.search(query_embedding, top_k, document_types)
+            snapshot.cache_results(key, results)
+        
+        # Copies: callers adjust similarity in place
+        return [dict(doc) for doc in results if doc.get('similarity', 0) >= similarity_threshold]
 
 
 class RAGEngine:
@@ -142,6 +308,9 @@ class RAGEngine:
         }
     }
     
+    # Similarity bonus for documents fetched directly via the Law Router
+    HYBRID_BOOST = 0.15
+    
     # Law Router - Maps keywords/intents to prioritized law codes
     LAW_ROUTING_RULES = {
         # Fire safety keywords -> RA 9514
@@ -513,6 +682,36 @@ class RAGEngine:
     def __init__(self):
         self.search_service = VectorSearchService()
     
+    def _law_rows(
+        self,
+        snapshot: Optional[CorpusSnapshot],
+        law_code: str,
+        contains: Optional[str] = None,
+        limit: int = 8
+    ) -> List[dict]:
+        """Chunks of one law code (with embeddings), from the snapshot when one is loaded."""
+        if snapshot is not None:
+            return snapshot.law_rows(law_code, contains=contains, limit=limit)
+        # After cut-over, similarity must use the shadow model's vectors
+        embedding = 'rag_documents_shadow(embedding)' if shadow_index.serving else 'embedding'
+        query = supabase.table('rag_documents') \
+            .select(f'id, content, source, law_code, document_type, section_ref, chunk_index, {embedding}') \
+            .eq('law_code', law_code)
+        if shadow_index.serving:
+            # Embedded filter: vectors from another model come back as no vector
+            query = query.eq('rag_documents_shadow.model', settings.SHADOW_EMBEDDING_MODEL)
+        if contains:
+            query = query.ilike('content', f'%{contains}%')
+        rows = query.limit(limit).execute().data or []
+        if shadow_index.serving:
+            for row in rows:
+                shadow = row.pop('rag_documents_shadow', None)
+                if isinstance(shadow, list):
+                    shadow = shadow[0] if shadow else None
+                row['embedding'] = shadow.get('embedding') if shadow else None
+        return rows
+    
+    @traced("rag.retrieve")
     async def retrieve(
         self, 
         query: str, 
@@ -531,6 +730,9 @@ class RAGEngine:
             List of SourceNode citations
         """
         try:
+            # One corpus version for the whole request, even if a new one is swapped in meanwhile
+            snapshot = self.search_service.usable_snapshot()
+            
             # Get mode-specific configuration
             config = self.get_mode_config(mode)
             top_k = config["top_k"]
@@ -553,7 +755,8 @@ class RAGEngine:
                 query, 
                 top_k=top_k, 
                 similarity_threshold=similarity_threshold,
-                document_types=doc_types
+                document_types=doc_types,
+                snapshot=snapshot
             )
             
             # HYBRID SEARCH: If Law Router detected specific laws, fetch those directly
@@ -565,24 +768,25 @@ class RAGEngine:
                     if normalized not in normalized_laws:
                         normalized_laws.append(normalized)
                 
-                logger.info(f"HYBRID SEARCH: Priority laws detected: {normalized_laws}")
+                logger.info("HYBRID SEARCH: Priority laws detected: %s", normalized_laws)
+                for law_code in normalized_laws:
+                    LAW_ROUTER_MATCHES.labels(law_code=law_code).inc()
                 try:
-                    query_embedding = self.search_service.embedding_service.embed(query)
+                    query_embedding = self.search_service.embed_query(query)
                     
                     # Search specifically for documents from priority law codes
                     for law_code in normalized_laws[:4]:  # Limit to top 4 laws
-                        logger.info(f"HYBRID SEARCH: Fetching docs for law_code='{law_code}'")
-                        law_results = supabase.table('rag_documents') \
-                            .select('id, content, source, law_code, document_type, section_ref, chunk_index, embedding') \
-                            .eq('law_code', law_code) \
-                            .limit(8) \
-                            .execute()
+                        with span("rag.law_fetch", law_code=law_code), timed(LAW_FETCH_SECONDS, law_code=law_code):
+                            law_docs = self._law_rows(snapshot, law_code, limit=8)
                         
-                        logger.info(f"HYBRID SEARCH: Found {len(law_results.data) if law_results.data else 0} docs for {law_code}")
+                        if retrieval_log.isEnabledFor(logging.DEBUG):
+                            retrieval_log.debug("hybrid_law_fetch", extra={"fields": {
+                                "stage": "retrieve", "law_code": law_code, "docs": len(law_docs)
+                            }})
                         
-                        if law_results.data:
+                        if law_docs:
                             existing_ids = {r.get('id') for r in results}
-                            for doc in law_results.data:
+                            for doc in law_docs:
                                 if doc.get('id') not in existing_ids:
                                     # Calculate similarity manually
                                     import json
@@ -593,19 +797,23 @@ class RAGEngine:
                                             stored_embed = json.loads(stored_embed)
                                         sim = float(np.dot(query_embedding, stored_embed) / 
                                                   (np.linalg.norm(query_embedding) * np.linalg.norm(stored_embed)))
-                                        doc['similarity'] = min(1.0, sim + 0.15)  # Boost by 15%
+                                        doc['similarity'] = min(1.0, sim + self.HYBRID_BOOST)
                                         del doc['embedding']  # Don't need to keep this
                                         results.append(doc)
                                         existing_ids.add(doc.get('id'))
-                                        logger.info(f"HYBRID SEARCH: Added doc from {law_code} with sim={doc['similarity']:.3f}")
+                                        if retrieval_log.isEnabledFor(logging.DEBUG):
+                                            retrieval_log.debug("hybrid_doc_added", extra={"fields": {
+                                                "stage": "retrieve", "law_code": law_code,
+                                                "doc_id": doc.get('id'), "similarity": round(doc['similarity'], 3)
+                                            }})
                     
                     # Re-sort by similarity
                     results = sorted(results, key=lambda x: x.get('similarity', 0), reverse=True)
                     results = results[:top_k]  # Trim to top_k
-                    logger.info(f"HYBRID SEARCH: Final results count: {len(results)}")
+                    logger.info("HYBRID SEARCH: Final results count: %d", len(results))
                     
                 except Exception as e:
-                    logger.warning(f"Hybrid law search failed: {e}")
+                    logger.warning("Hybrid law search failed: %s", e)
                     # Fall back to just boosting existing results
                     for doc in results:
                         doc_law_code = doc.get('law_code', '')
@@ -624,8 +832,8 @@ class RAGEngine:
                 source_file = doc.get('source', 'Unknown')
                 similarity = doc.get('similarity', 0.0)
                 
-                # Try to extract section from content metadata
-                section = self._extract_section(content)
+                # Stored at ingest by the section-aware chunker; older rows fall back to a scan
+                section = doc.get('section_ref') or self._extract_section(content)
                 
                 sources.append(SourceNode(
                     document=source_file,
@@ -645,6 +853,7 @@ class RAGEngine:
             logger.error(f"RAG retrieval failed: {e}")
             return []
     
+    @traced("rag.get_context")
     async def get_context(
         self, 
         query: str, 
@@ -663,6 +872,8 @@ class RAGEngine:
             Formatted context string with sources
         """
         try:
+            snapshot = self.search_service.usable_snapshot()
+            
             # Use mode-specific configuration
             config = self.get_mode_config(mode)
             top_k = config["top_k"]
@@ -729,9 +940,9 @@ class RAGEngine:
                 content_keywords.append("classification")
             
             if priority_laws:
-                logger.info(f"GET_CONTEXT: Law Router matched: {priority_laws}")
+                logger.info("GET_CONTEXT: Law Router matched: %s", priority_laws)
             
-            results = await self.search_service.search(query, top_k=top_k, document_types=doc_types)
+            results = await self.search_service.search(query, top_k=top_k, document_types=doc_types, snapshot=snapshot)
             
             # HYBRID SEARCH: If Law Router detected specific laws, fetch those directly
             if priority_laws:
@@ -742,48 +953,38 @@ class RAGEngine:
                     if normalized not in normalized_laws:
                         normalized_laws.append(normalized)
                 
-                logger.info(f"GET_CONTEXT: Fetching law-specific documents for {normalized_laws[:4]}")
+                logger.info("GET_CONTEXT: Fetching law-specific documents for %s", normalized_laws[:4])
                 try:
-                    query_embedding = self.search_service.embedding_service.embed(query)
+                    query_embedding = self.search_service.embed_query(query)
                     
                     # Search specifically for documents from priority law codes
                     for law_code in normalized_laws[:4]:  # Limit to top 4 laws
+                        fetch_start = time.perf_counter()
                         # Try content-filtered search first for specific queries
-                        law_results = None
+                        law_docs = []
                         
                         # Add content filter based on query keywords
                         if content_keywords:
+                            existing = set()
                             for keyword in content_keywords:
-                                filtered_results = supabase.table('rag_documents') \
-                                    .select('id, content, source, law_code, document_type, section_ref, chunk_index, embedding') \
-                                    .eq('law_code', law_code) \
-                                    .ilike('content', f'%{keyword}%') \
-                                    .limit(4) \
-                                    .execute()
-                                if filtered_results.data:
-                                    if law_results is None:
-                                        law_results = filtered_results
-                                    else:
-                                        # Merge results
-                                        existing = {d['id'] for d in law_results.data}
-                                        for d in filtered_results.data:
-                                            if d['id'] not in existing:
-                                                law_results.data.append(d)
-                                                existing.add(d['id'])
+                                for d in self._law_rows(snapshot, law_code, contains=keyword, limit=4):
+                                    if d['id'] not in existing:
+                                        law_docs.append(d)
+                                        existing.add(d['id'])
                         
                         # Fallback to regular search if no filtered results
-                        if not law_results or not law_results.data:
-                            law_results = supabase.table('rag_documents') \
-                                .select('id, content, source, law_code, document_type, section_ref, chunk_index, embedding') \
-                                .eq('law_code', law_code) \
-                                .limit(8) \
-                                .execute()
+                        if not law_docs:
+                            law_docs = self._law_rows(snapshot, law_code, limit=8)
+                        LAW_FETCH_SECONDS.labels(law_code=law_code).observe(time.perf_counter() - fetch_start)
                         
-                        logger.info(f"GET_CONTEXT: Found {len(law_results.data) if law_results.data else 0} docs for {law_code}")
+                        if retrieval_log.isEnabledFor(logging.DEBUG):
+                            retrieval_log.debug("hybrid_law_fetch", extra={"fields": {
+                                "stage": "get_context", "law_code": law_code, "docs": len(law_docs)
+                            }})
                         
-                        if law_results.data:
+                        if law_docs:
                             existing_ids = {r.get('id') for r in results}
-                            for doc in law_results.data:
+                            for doc in law_docs:
                                 if doc.get('id') not in existing_ids:
                                     # Calculate similarity manually
                                     import json
@@ -794,23 +995,28 @@ class RAGEngine:
                                             stored_embed = json.loads(stored_embed)
                                         sim = float(np.dot(query_embedding, stored_embed) / 
                                                   (np.linalg.norm(query_embedding) * np.linalg.norm(stored_embed)))
-                                        doc['similarity'] = min(1.0, sim + 0.15)  # Boost by 15%
+                                        doc['similarity'] = min(1.0, sim + self.HYBRID_BOOST)
                                         del doc['embedding']  # Don't need to keep this
                                         results.append(doc)
                                         existing_ids.add(doc.get('id'))
-                                        logger.info(f"GET_CONTEXT: Added doc from {law_code}")
+                                        if retrieval_log.isEnabledFor(logging.DEBUG):
+                                            retrieval_log.debug("hybrid_doc_added", extra={"fields": {
+                                                "stage": "get_context", "law_code": law_code,
+                                                "doc_id": doc.get('id'), "similarity": round(doc['similarity'], 3)
+                                            }})
                     
                     # Re-sort by similarity
                     results = sorted(results, key=lambda x: x.get('similarity', 0), reverse=True)
                     results = results[:top_k]  # Trim to top_k
                     
                 except Exception as e:
-                    logger.warning(f"GET_CONTEXT: Hybrid law search failed: {e}")
+                    logger.warning("GET_CONTEXT: Hybrid law search failed: %s", e)
             
             if not results:
                 return ""
             
             # === RELEVANCE RANKING IMPROVEMENTS ===
+            packing_start = time.perf_counter()
             
             # 1. Sort by similarity (ensure consistent ordering)
             results = sorted(results, key=lambda x: x.get('similarity', 0), reverse=True)
@@ -836,6 +1042,7 @@ class RAGEngine:
             results = unique_results
             
             if not results:
+                CONTEXT_PACKING_SECONDS.observe(time.perf_counter() - packing_start)
                 return ""
             
             # Format context with source attribution including section reference
@@ -861,6 +1068,7 @@ class RAGEngine:
                     
                 context_parts.append(f"{attribution}\n{content}")
             
+            CONTEXT_PACKING_SECONDS.observe(time.perf_counter() - packing_start)
             return "\n\n---\n\n".join(context_parts)
             
         except Exception as e:
@@ -868,19 +1076,9 @@ class RAGEngine:
             return ""
     
     def _extract_section(self, content: str) -> str:
-        """Extract section reference from chunk content."""
-        import re
-        
-        # Look for section patterns in the content
-        patterns = [
-            r'\[Reference:\s*([^\]]+)\]',
-            r'Section\s+(\d+[\.\d]*)',
-            r'SECTION\s+(\d+[\.\d]*)',
-            r'Article\s+(\d+)',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, content, re.IGNORECASE)
+        """Extract section reference from chunk content (rows without a stored section_ref)."""
+        for pattern in SECTION_PATTERNS:
+            match = pattern.search(content)
             if match:
                 return match.group(0).strip()
         
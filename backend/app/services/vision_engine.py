@@ -5,13 +5,15 @@ Handles image analysis using Groq's Llama 3.2 Vision model.
 import base64
 import logging
 from typing import Optional, Union, BinaryIO
-from groq import Groq
 from app.core.config import settings
+from app.core.metrics import timed, VISION_SECONDS
 
 logger = logging.getLogger(__name__)
 
 class VisionEngine:
     def __init__(self):
+        from groq import Groq  # Loaded on first use of the vision subsystem
+
         self.client = Groq(api_key=settings.GROQ_API_KEY)
         # Using Llama 4 Scout Vision (Newest multimodal model)
         self.model = "meta-llama/llama-4-scout-17b-16e-instruct" 
@@ -43,31 +45,29 @@ class VisionEngine:
             if settings.DEBUG:
                 logger.info(f"Sending image to Vision Model: {self.model}")
 
-            chat_completion = self.client.chat.completions.create(
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": prompt},
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/png;base64,{base64_image}",
+            with timed(VISION_SECONDS):
+                chat_completion = self.client.chat.completions.create(
+                    messages=[
+                        {
+                            "role": "user",
+                            "content": [
+                                {"type": "text", "text": prompt},
+                                {
+                                    "type": "image_url",
+                                    "image_url": {
+                                        "url": f"data:image/png;base64,{base64_image}",
+                                    },
                                 },
-                            },
-                        ],
-                    }
-                ],
-                model=self.model,
-                temperature=0.3,
-                max_tokens=1024,
-            )
+                            ],
+                        }
+                    ],
+                    model=self.model,
+                    temperature=0.3,
+                    max_tokens=1024,
+                )
 
             return chat_completion.choices[0].message.content
 
         except Exception as e:
             logger.error(f"Vision analysis failed: {str(e)}")
             return f"Error analyzing image: {str(e)}"
-
-# Global instance
-vision_engine = VisionEngine()
@@ -0,0 +1,29 @@
+-- ==========================================
+-- ROLLING CONVERSATION SUMMARIES
+-- ==========================================
+-- Run this in your Supabase SQL Editor
+-- Stores one compact summary per conversation. The backend folds turns
+-- that leave the recent-message window into `summary` after each reply;
+-- `covered_until` is the created_at of the newest message folded in.
+
+CREATE TABLE IF NOT EXISTS conversation_summaries (
+    conversation_id UUID PRIMARY KEY,
+    user_id UUID REFERENCES auth.users(id) ON DELETE CASCADE,
+    summary TEXT NOT NULL DEFAULT '',
+    covered_until TIMESTAMPTZ,
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_conversation_summaries_user_id ON conversation_summaries(user_id);
+
+-- Recent-window reads: last N messages of a conversation
+CREATE INDEX IF NOT EXISTS idx_messages_conversation_created
+ON messages(conversation_id, created_at DESC);
+
+ALTER TABLE conversation_summaries ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Users can view own conversation summaries" ON conversation_summaries;
+
+CREATE POLICY "Users can view own conversation summaries"
+ON conversation_summaries FOR SELECT
+USING (auth.uid() = user_id);
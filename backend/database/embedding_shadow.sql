@@ -0,0 +1,66 @@
+-- ==========================================
+-- SHADOW EMBEDDING INDEX (MODEL MIGRATION)
+-- ==========================================
+-- Run this in your Supabase SQL Editor
+-- Holds vectors from the model being migrated to (SHADOW_EMBEDDING_MODEL),
+-- filled in the background by scripts/reembed_corpus.py while the API keeps
+-- serving rag_documents.embedding. Rows follow their chunk: re-ingesting or
+-- deleting a chunk drops its shadow vector, and the next job run fills it in.
+--
+-- Set the vector dimension for the new model (384 = MiniLM, 768 = base-size
+-- models) in the table, the index and the search function below.
+
+CREATE TABLE IF NOT EXISTS rag_documents_shadow (
+    id TEXT PRIMARY KEY REFERENCES rag_documents(id) ON DELETE CASCADE,
+    embedding vector(384) NOT NULL,
+    model TEXT NOT NULL,
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_rag_documents_shadow_embedding
+ON rag_documents_shadow USING hnsw (embedding vector_cosine_ops);
+
+-- Same shape as search_documents_filtered, ranked by the shadow vectors.
+-- Only rows from target_model: while a migration to another model is
+-- running the table holds vectors from two models, which don't compare.
+DROP FUNCTION IF EXISTS search_documents_shadow(vector, int, text[]);
+CREATE OR REPLACE FUNCTION search_documents_shadow(
+    query_embedding vector(384),
+    target_model text,
+    match_count int DEFAULT 5,
+    doc_types text[] DEFAULT NULL
+)
+RETURNS TABLE (
+    id text,
+    content text,
+    source text,
+    document_type text,
+    law_code text,
+    section_ref text,
+    chunk_index int4,
+    similarity float
+)
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    RETURN QUERY
+    SELECT
+        rd.id,
+        rd.content,
+        rd.source,
+        rd.document_type,
+        rd.law_code,
+        rd.section_ref,
+        rd.chunk_index,
+        1 - (sh.embedding <=> query_embedding) AS similarity
+    FROM rag_documents_shadow sh
+    JOIN rag_documents rd ON rd.id = sh.id
+    WHERE sh.model = target_model
+      AND (doc_types IS NULL OR rd.document_type = ANY(doc_types))
+    ORDER BY sh.embedding <=> query_embedding
+    LIMIT match_count;
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION search_documents_shadow TO authenticated;
+GRANT EXECUTE ON FUNCTION search_documents_shadow TO anon;
@@ -0,0 +1,15 @@
+-- ==========================================
+-- SECTION METADATA ON RAG DOCUMENTS
+-- ==========================================
+-- Run this in your Supabase SQL Editor before re-running the ingest
+-- pipeline. The section-aware chunker stores, per chunk:
+-- - section_ref: "Section 10.2.5" (already used for citations)
+-- - section_key: "section:10.2.5", normalized (Roman numerals -> digits)
+-- - metadata:    {"heading_path": ["RULE 10 - ...", "SECTION 10.2.5. ..."], "page_start": 42}
+
+ALTER TABLE rag_documents ADD COLUMN IF NOT EXISTS section_key TEXT NOT NULL DEFAULT '';
+ALTER TABLE rag_documents ADD COLUMN IF NOT EXISTS metadata JSONB NOT NULL DEFAULT '{}'::jsonb;
+
+-- Direct section lookups, e.g. "RA 9514 Section 10.2.5"
+CREATE INDEX IF NOT EXISTS idx_rag_documents_law_section
+ON rag_documents(law_code, section_key);
@@ -0,0 +1,478 @@
+# ==========================================
+# In-memory fakes for offline benchmarks and evaluation
+# ==========================================
+# FakeSupabase          table()/rpc() subset backed by Python lists, with
+#                       injected per-call latency and per-call counters
+# FakeGroq              chat.completions.create() that emits tokens at a
+#                       configurable rate (streaming and non-streaming)
+# HashEmbeddingBackend  deterministic hashed bag-of-words vectors, so runs
+#                       need no model download
+#
+# install_fakes() swaps these in and must run BEFORE anything under app/
+# is imported (app modules bind `supabase` at import time).
+# ==========================================
+
+import json
+import math
+import os
+import re
+import sys
+import threading
+import time
+import types
+import uuid
+import zlib
+from collections import Counter
+from datetime import datetime, timezone
+from functools import partial
+from pathlib import Path
+from types import SimpleNamespace
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+# Settings the app refuses to start without; real values are never needed
+ENV_DEFAULTS = {
+    "SUPABASE_URL": "http://supabase.invalid",
+    "SUPABASE_SERVICE_ROLE_KEY": "bench-service-role",
+    "SUPABASE_JWT_SECRET": "bench-jwt-secret",
+    "GROQ_API_KEY": "bench-groq",
+    "HUGGINGFACE_TOKEN": "bench-hf",
+    "RUNPOD_API_KEY": "bench-runpod",
+}
+
+# Overrides so the benchmark measures the pipeline, not our own throttling
+ENV_OVERRIDES = {
+    "DEBUG": "False",
+    "RATE_LIMIT_REDIS_URL": "",
+    "RATE_LIMIT_DEFAULT_PER_MINUTE": "100000000",
+    "RATE_LIMIT_DEFAULT_BURST": "100000000",
+    "RATE_LIMIT_LLM_PER_MINUTE": "100000000",
+    "RATE_LIMIT_LLM_BURST": "100000000",
+    "TRACE_EXPORT_FILE": "",
+}
+
+RAG_COLUMNS = ["id", "content", "source", "document_type", "law_code", "section_ref", "chunk_index"]
+
+
+def install_fakes(supabase, groq_factory=None, env_overrides=None):
+    """Point app.core.database and the groq package at the fakes."""
+    for key, value in ENV_DEFAULTS.items():
+        os.environ.setdefault(key, value)
+    for key, value in {**ENV_OVERRIDES, **(env_overrides or {})}.items():
+        os.environ[key] = value
+
+    database = types.ModuleType("app.core.database")
+    database.supabase = supabase
+    sys.modules["app.core.database"] = database
+
+    if groq_factory is not None:
+        groq = types.ModuleType("groq")
+        groq.Groq = groq_factory
+        sys.modules["groq"] = groq
+
+
+# ------------------------------------------
+# Supabase
+# ------------------------------------------
+
+class FakeResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class FakeQuery:
+    """Chainable subset of the postgrest query builder."""
+
+    def __init__(self, client, table: str):
+        self.client = client
+        self.table = table
+        self.action = "select"
+        self.columns = None
+        self.count = None
+        self.payload = None
+        self.on_conflict = "id"
+        self.filters = []
+        self.ordering = []
+        self.start = 0
+        self.stop = None
+        self.single_row = False
+
+    # --- actions ---
+    def select(self, columns: str = "*", count=None):
+        self.action = "select"
+        self.columns = None if columns.strip() == "*" else [c.strip() for c in columns.split(",")]
+        self.count = count
+        return self
+
+    def insert(self, rows):
+        self.action, self.payload = "insert", rows
+        return self
+
+    def upsert(self, rows, on_conflict: str = "id", **_):
+        self.action, self.payload, self.on_conflict = "upsert", rows, on_conflict
+        return self
+
+    def update(self, values: dict):
+        self.action, self.payload = "update", values
+        return self
+
+    def delete(self):
+        self.action = "delete"
+        return self
+
+    # --- filters ---
+    def _filter(self, column, predicate):
+        self.filters.append((column, predicate))
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, lambda v: v == value)
+
+    def neq(self, column, value):
+        return self._filter(column, lambda v: v != value)
+
+    def gt(self, column, value):
+        return self._filter(column, lambda v: v is not None and v > value)
+
+    def gte(self, column, value):
+        return self._filter(column, lambda v: v is not None and v >= value)
+
+    def lt(self, column, value):
+        return self._filter(column, lambda v: v is not None and v < value)
+
+    def lte(self, column, value):
+        return self._filter(column, lambda v: v is not None and v <= value)
+
+    def in_(self, column, values):
+        values = set(values)
+        return self._filter(column, lambda v: v in values)
+
+    def is_(self, column, value):
+        if value in (None, "null"):
+            return self._filter(column, lambda v: v is None)
+        return self._filter(column, lambda v: v == value)
+
+    def ilike(self, column, pattern: str):
+        regex = re.compile(
+            "".join(".*" if ch == "%" else "." if ch == "_" else re.escape(ch) for ch in pattern),
+            re.IGNORECASE | re.DOTALL,
+        )
+        return self._filter(column, lambda v: v is not None and regex.fullmatch(str(v)) is not None)
+
+    # --- shaping ---
+    def order(self, column, desc: bool = False, **_):
+        self.ordering.append((column, desc))
+        return self
+
+    def limit(self, count: int):
+        self.stop = self.start + count
+        return self
+
+    def range(self, start: int, end: int):
+        self.start, self.stop = start, end + 1
+        return self
+
+    def single(self):
+        self.single_row = True
+        return self
+
+    maybe_single = single
+
+    def _matches(self, row) -> bool:
+        return all(predicate(row.get(column)) for column, predicate in self.filters)
+
+    def _project(self, row) -> dict:
+        if self.columns is None:
+            return dict(row)
+        return {c: row.get(c) for c in self.columns}
+
+    def execute(self):
+        self.client._record(f"table:{self.table}:{self.action}", self.client.latency_ms)
+        with self.client.lock:
+            rows = self.client.tables.setdefault(self.table, [])
+
+            if self.action in ("insert", "upsert"):
+                payload = self.payload if isinstance(self.payload, list) else [self.payload]
+                written = []
+                for item in payload:
+                    row = {"id": str(uuid.uuid4()), "created_at": _now(), **item}
+                    if self.action == "upsert":
+                        keys = [k.strip() for k in self.on_conflict.split(",")]
+                        rows[:] = [r for r in rows if any(r.get(k) != row.get(k) for k in keys)]
+                    rows.append(row)
+                    written.append(dict(row))
+                self.client._invalidate(self.table)
+                return FakeResponse(written)
+
+            matched = [r for r in rows if self._matches(r)]
+
+            if self.action == "update":
+                for r in matched:
+                    r.update(self.payload)
+                self.client._invalidate(self.table)
+                return FakeResponse([dict(r) for r in matched])
+
+            if self.action == "delete":
+                rows[:] = [r for r in rows if not self._matches(r)]
+                self.client._invalidate(self.table)
+                return FakeResponse([dict(r) for r in matched])
+
+            for column, desc in reversed(self.ordering):
+                matched.sort(key=lambda r: (r.get(column) is None, r.get(column)), reverse=desc)
+            total = len(matched)
+            data = [self._project(r) for r in matched[self.start:self.stop]]
+
+        if self.single_row:
+            return FakeResponse(data[0] if data else None, total)
+        return FakeResponse(data, total if self.count else None)
+
+
+class FakeRPC:
+    def __init__(self, client, name: str, params: dict):
+        self.client = client
+        self.name = name
+        self.params = params
+
+    def execute(self):
+        self.client._record(f"rpc:{self.name}", self.client.rpc_latency_ms)
+        handler = self.client.rpc_handlers.get(self.name)
+        if handler is None:
+            raise RuntimeError(f"FakeSupabase: unknown rpc {self.name}")
+        return FakeResponse(handler(self.client, **self.params))
+
+
+def _search_documents(client, query_embedding, match_count=5, doc_types=None):
+    ids, rows, matrix = client.vector_index()
+    if matrix is None:
+        return []
+    import numpy as np
+
+    scores = matrix @ np.asarray(query_embedding, dtype=np.float32)
+    if doc_types:
+        allowed = np.array([r.get("document_type") in doc_types for r in rows])
+        scores = np.where(allowed, scores, -np.inf)
+    k = min(match_count, len(rows))
+    top = np.argpartition(-scores, k - 1)[:k]
+    top = top[np.argsort(-scores[top])]
+    return [
+        {**{c: rows[i].get(c) for c in RAG_COLUMNS}, "similarity": float(scores[i])}
+        for i in top if np.isfinite(scores[i])
+    ]
+
+
+class FakeSupabase:
+    """
+    Enough of the supabase-py client for the API and the RAG engine.
+
+    Every execute() sleeps for the configured latency (the real client is
+    synchronous, so this blocks exactly like a network round trip would)
+    and is counted in `calls`.
+    """
+
+    rpc_handlers = {
+        "search_documents": _search_documents,
+        "search_documents_filtered": _search_documents,
+    }
+
+    def __init__(self, tables: dict = None, latency_ms: float = 0.0, rpc_latency_ms: float = None):
+        self.tables = {name: list(rows) for name, rows in (tables or {}).items()}
+        self.latency_ms = latency_ms
+        self.rpc_latency_ms = latency_ms if rpc_latency_ms is None else rpc_latency_ms
+        self.lock = threading.RLock()
+        self.calls = Counter()
+        self._index = None
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    from_ = table
+
+    def rpc(self, name: str, params: dict = None) -> FakeRPC:
+        return FakeRPC(self, name, params or {})
+
+    def reset_calls(self):
+        with self.lock:
+            self.calls.clear()
+
+    def _record(self, key: str, latency_ms: float):
+        with self.lock:
+            self.calls[key] += 1
+        if latency_ms:
+            time.sleep(latency_ms / 1000)
+
+    def _invalidate(self, table: str):
+        if table == "rag_documents":
+            self._index = None
+
+    def vector_index(self):
+        """(ids, rows, normalized float32 matrix) over rag_documents, cached until a write."""
+        with self.lock:
+            if self._index is None:
+                import numpy as np
+
+                rows = [r for r in self.tables.get("rag_documents", []) if r.get("embedding")]
+                if not rows:
+                    self._index = ([], [], None)
+                else:
+                    vectors = [
+                        json.loads(r["embedding"]) if isinstance(r["embedding"], str) else r["embedding"]
+                        for r in rows
+                    ]
+                    matrix = np.asarray(vectors, dtype=np.float32)
+                    matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+                    self._index = ([r["id"] for r in rows], rows, matrix)
+            return self._index
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+# ------------------------------------------
+# Groq
+# ------------------------------------------
+
+FILLER_WORDS = (
+    "Under Section 805 of PD 1096 habitable rooms shall have a ceiling height of not less "
+    "than 2.40 meters measured from the floor to the ceiling and RA 9514 requires the "
+    "travel distance to an exit to comply with the occupancy classification"
+).split()
+
+
+class FakeGroq:
+    """Groq client stand-in: fixed time to first token, then a steady token rate."""
+
+    def __init__(self, api_key=None, ttft_ms: float = 250.0, tokens_per_second: float = 300.0,
+                 output_tokens: int = 300):
+        self.ttft_ms = ttft_ms
+        self.tokens_per_second = tokens_per_second
+        self.output_tokens = output_tokens
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    @classmethod
+    def factory(cls, **config):
+        """Callable with Groq's constructor signature, for install_fakes()."""
+        return partial(cls, **config)
+
+    def _create(self, model=None, messages=(), max_tokens=None, stream=False, **_):
+        self.calls += 1
+        count = min(self.output_tokens, max_tokens or self.output_tokens)
+        words = [FILLER_WORDS[i % len(FILLER_WORDS)] for i in range(count)]
+        usage = SimpleNamespace(
+            prompt_tokens=sum(len(str(m.get("content", ""))) for m in messages) // 4,
+            completion_tokens=count,
+        )
+        if stream:
+            return self._stream(words, usage)
+
+        time.sleep(self.ttft_ms / 1000 + count / self.tokens_per_second)
+        message = SimpleNamespace(content=" ".join(words), role="assistant")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="stop")], usage=usage)
+
+    def _stream(self, words, usage):
+        time.sleep(self.ttft_ms / 1000)
+        per_token = 1 / self.tokens_per_second
+        for i, word in enumerate(words):
+            if i:
+                time.sleep(per_token)
+            delta = SimpleNamespace(content=word if i == 0 else " " + word)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta, finish_reason=None)], x_groq=None)
+        done = SimpleNamespace(delta=SimpleNamespace(content=None), finish_reason="stop")
+        yield SimpleNamespace(choices=[done], x_groq=SimpleNamespace(usage=usage))
+
+
+# ------------------------------------------
+# Embeddings
+# ------------------------------------------
+
+TOKEN = re.compile(r"[a-z0-9]+")
+
+
+class HashEmbeddingBackend:
+    """
+    Hashed unigram + bigram vectors, L2-normalized.
+
+    Not semantically meaningful like MiniLM, but lexical overlap still
+    ranks sensibly, it costs microseconds and it is identical on every run.
+    """
+
+    name = "hash"
+
+    def __init__(self, dimension: int = 384, latency_ms: float = 0.0):
+        self._dimension = dimension
+        self.latency_ms = latency_ms
+
+    @property
+    def dimension(self) -> int:
+        return self._dimension
+
+    def _vector(self, text: str):
+        vector = [0.0] * self._dimension
+        tokens = TOKEN.findall(text.lower())
+        for feature in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+            h = zlib.crc32(feature.encode())
+            vector[h % self._dimension] += 1.0 if (h >> 16) & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+        return [v / norm for v in vector]
+
+    def embed_batch(self, texts):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        return [self._vector(t) for t in texts]
+
+
+# ------------------------------------------
+# Corpus
+# ------------------------------------------
+
+def synthetic_corpus(routing_rules: dict, embedder, docs_per_law: int = 24) -> list:
+    """rag_documents rows for every law code the Law Router can pick."""
+    keywords_by_law = {}
+    for keyword, laws in routing_rules.items():
+        for law in laws:
+            keywords_by_law.setdefault(law, []).append(keyword)
+
+    rows = []
+    for law_code, keywords in sorted(keywords_by_law.items()):
+        for i in range(docs_per_law):
+            keyword = keywords[i % len(keywords)]
+            content = (
+                f"SECTION {100 + i}. {keyword.title()} requirements under {law_code}. "
+                f"The {keyword} provisions of {law_code} apply to all buildings and structures. "
+                f"{' '.join(FILLER_WORDS[i % 7:i % 7 + 20])}."
+            )
+            rows.append({
+                "id": f"{law_code}-{i}".replace(" ", "_"),
+                "content": content,
+                "source": f"{law_code}.pdf",
+                "document_type": "statutory",
+                "law_code": law_code,
+                "section_ref": f"Section {100 + i}",
+                "chunk_index": i,
+            })
+    return attach_embeddings(rows, embedder)
+
+
+def load_corpus_snapshot(path: str, embedder=None) -> list:
+    """rag_documents rows from a JSONL export; embeds rows that have no vector."""
+    with open(path, encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    missing = [r for r in rows if not r.get("embedding")]
+    if missing:
+        if embedder is None:
+            raise ValueError(f"{len(missing)} rows in {path} have no embedding and no embedder was given")
+        attach_embeddings(missing, embedder)
+    return rows
+
+
+def attach_embeddings(rows: list, embedder, batch_size: int = 64) -> list:
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        for row, vector in zip(batch, embedder.embed_batch([r["content"] for r in batch])):
+            # pgvector columns come back from PostgREST as strings
+            row["embedding"] = json.dumps([round(v, 6) for v in vector])
+    return rows
@@ -0,0 +1,334 @@
+# ==========================================
+# API Benchmark Suite (offline, in-process)
+# ==========================================
+# Runs the real FastAPI app (lifespan, auth, rate limiting, RAG, LLM and
+# write-behind included) in-process over httpx's ASGI transport, with
+# Supabase, Groq and the embedding model replaced by the fakes in
+# bench_fakes.py. Latencies for the fakes are configurable, so the numbers
+# show our own overhead plus realistic I/O waits.
+#
+# Scenarios: /chat in every mode, /rag/lookup, /chat/history, /analyze.
+# Each runs closed-loop at every --concurrency level; results (throughput,
+# p50/p95/p99) go to stdout and, with --json, to a file that --compare can
+# diff against a previous commit's run.
+#
+# Usage (from backend/):
+#   python scripts/benchmark_api.py
+#   python scripts/benchmark_api.py --concurrency 1 8 32 --requests 200 --json bench.json
+#   python scripts/benchmark_api.py --json new.json --compare bench.json --max-regression 0.15
+# ==========================================
+
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bench_fakes import (  # noqa: E402
+    ENV_DEFAULTS,
+    FakeGroq,
+    FakeSupabase,
+    HashEmbeddingBackend,
+    install_fakes,
+    synthetic_corpus,
+)
+
+CHAT_QUERIES = [
+    "What is the minimum ceiling height for habitable rooms?",
+    "How many fire exits does a 3-storey office building need?",
+    "Ramp gradient requirements for PWD accessibility",
+    "Maximum travel distance to an exit in a coffee shop",
+    "Setback requirements for a commercial lot in Makati",
+    "Parking slot requirements for a restaurant",
+]
+
+# Smallest valid PNG (1x1); the fake vision model never looks at it
+PNG_BYTES = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082"
+)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def make_token(user_id: str) -> str:
+    from jose import jwt
+
+    claims = {"sub": user_id, "aud": "authenticated", "exp": int(time.time()) + 3600}
+    return jwt.encode(claims, ENV_DEFAULTS["SUPABASE_JWT_SECRET"], algorithm="HS256")
+
+
+def seed_history(supabase: FakeSupabase, users, conversations: int, messages: int):
+    """Past conversations so /chat/history has realistic work to do."""
+    rows = []
+    for user in users:
+        for c in range(conversations):
+            cid = f"{user}-conv-{c}"
+            for m in range(messages):
+                rows.append({
+                    "conversation_id": cid,
+                    "user_id": user,
+                    "role": "user" if m % 2 == 0 else "assistant",
+                    "content": CHAT_QUERIES[(c + m) % len(CHAT_QUERIES)],
+                    "created_at": f"2025-01-{1 + c % 28:02d}T00:{m % 60:02d}:00+00:00",
+                })
+    supabase.tables.setdefault("messages", []).extend(rows)
+
+
+class Worker:
+    """One closed-loop client: its own user, token and running conversation."""
+
+    def __init__(self, index: int):
+        self.user_id = f"bench-user-{index}"
+        self.headers = {"Authorization": f"Bearer {make_token(self.user_id)}"}
+        self.conversation_id = None
+        self.turn = index
+
+    def next_query(self) -> str:
+        self.turn += 1
+        return CHAT_QUERIES[self.turn % len(CHAT_QUERIES)]
+
+
+def chat_scenario(mode: str):
+    async def call(client, worker):
+        body = {"message": worker.next_query(), "mode": mode}
+        if worker.conversation_id:
+            body["conversation_id"] = worker.conversation_id
+        response = await client.post("/api/v1/chat/", json=body, headers=worker.headers)
+        if response.status_code == 200:
+            worker.conversation_id = response.json()["conversation_id"]
+        return response
+    return call
+
+
+async def rag_lookup(client, worker):
+    return await client.post("/api/v1/rag/lookup", json={"query": worker.next_query()}, headers=worker.headers)
+
+
+async def chat_history(client, worker):
+    return await client.get("/api/v1/chat/history", headers=worker.headers)
+
+
+async def analyze(client, worker):
+    return await client.post(
+        "/api/v1/analyze/",
+        files={"file": ("plan.png", PNG_BYTES, "image/png")},
+        data={"message": "Check egress widths"},
+        headers=worker.headers,
+    )
+
+
+def build_scenarios(modes):
+    scenarios = {f"chat:{mode}": chat_scenario(mode) for mode in modes}
+    scenarios.update({"rag_lookup": rag_lookup, "chat_history": chat_history, "analyze": analyze})
+    return scenarios
+
+
+async def run_level(client, call, concurrency: int, total: int, warmup: int):
+    workers = [Worker(i) for i in range(concurrency)]
+    for worker in workers[:1]:
+        for _ in range(warmup):
+            await call(client, worker)
+
+    latencies, errors = [], 0
+    remaining = total
+
+    async def loop(worker):
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            try:
+                response = await call(client, worker)
+                ok = response.status_code < 400
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            errors += 0 if ok else 1
+
+    wall_start = time.perf_counter()
+    await asyncio.gather(*(loop(w) for w in workers))
+    wall = time.perf_counter() - wall_start
+
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": len(latencies) / wall if wall else 0.0,
+        "mean_ms": sum(latencies) / len(latencies) * 1000,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+    }
+
+
+class StartupFailed(Exception):
+    """The app never became ready (engine startup gave up or --startup-timeout passed)."""
+
+
+async def run(args, supabase: FakeSupabase):
+    import httpx
+    from app.main import app
+
+    scenarios = build_scenarios(args.modes)
+    selected = args.scenarios or list(scenarios)
+    results = []
+
+    async with app.router.lifespan_context(app):
+        deadline = time.monotonic() + args.startup_timeout
+        while not getattr(app.state, "ready", False):
+            error = getattr(app.state, "startup_error", None)
+            if error:
+                raise StartupFailed(f"engine startup failed: {error}")
+            if time.monotonic() > deadline:
+                raise StartupFailed(f"app not ready after {args.startup_timeout:.0f}s (see the startup log above)")
+            await asyncio.sleep(0.05)
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            for name in selected:
+                for concurrency in args.concurrency:
+                    supabase.reset_calls()
+                    print(f"⏱️  {name} @ concurrency {concurrency}...")
+                    row = await run_level(client, scenarios[name], concurrency, args.requests, args.warmup)
+                    row["scenario"] = name
+                    row["db_calls_per_request"] = sum(supabase.calls.values()) / max(1, row["requests"])
+                    results.append(row)
+    return results
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def compare(results, baseline_path: str, max_regression: float) -> int:
+    with open(baseline_path) as f:
+        baseline = {(r["scenario"], r["concurrency"]): r for r in json.load(f)["results"]}
+
+    print("\n" + "=" * 78)
+    print(f"📊 COMPARISON vs {baseline_path}")
+    print("=" * 78)
+    print(f"{'scenario':<24}{'conc':>6}{'p95 before':>12}{'p95 now':>10}{'Δ p95':>9}{'Δ rps':>9}")
+    regressions = []
+    for row in results:
+        old = baseline.get((row["scenario"], row["concurrency"]))
+        if not old:
+            continue
+        p95_change = row["p95_ms"] / old["p95_ms"] - 1 if old["p95_ms"] else 0.0
+        rps_change = row["throughput_rps"] / old["throughput_rps"] - 1 if old["throughput_rps"] else 0.0
+        print(
+            f"{row['scenario']:<24}{row['concurrency']:>6}{old['p95_ms']:>12.1f}"
+            f"{row['p95_ms']:>10.1f}{p95_change:>+9.1%}{rps_change:>+9.1%}"
+        )
+        if p95_change > max_regression:
+            regressions.append(f"{row['scenario']} @ {row['concurrency']}: p95 {p95_change:+.1%}")
+
+    if regressions:
+        print("\n❌ REGRESSIONS:")
+        for regression in regressions:
+            print(f"   • {regression}")
+        return 1
+    print("\n✅ No p95 regression above threshold")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline API benchmark with fake Supabase and Groq")
+    parser.add_argument("--scenarios", nargs="+", help="Subset to run (default: all)")
+    parser.add_argument("--modes", nargs="+", default=["quick_answer", "plan_draft", "compliance", "deep_thinking"])
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=100, help="Requests per scenario and level")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--startup-timeout", type=float, default=120.0, help="Seconds to wait for the app to be ready")
+    parser.add_argument("--db-latency-ms", type=float, default=15.0)
+    parser.add_argument("--rpc-latency-ms", type=float, default=40.0)
+    parser.add_argument("--groq-ttft-ms", type=float, default=250.0)
+    parser.add_argument("--groq-tokens-per-second", type=float, default=300.0)
+    parser.add_argument("--groq-output-tokens", type=int, default=300)
+    parser.add_argument("--embedder", choices=["hash", "real"], default="hash",
+                        help="hash: fake vectors; real: EMBEDDING_BACKEND from settings")
+    parser.add_argument("--embed-latency-ms", type=float, default=5.0, help="Per-batch latency for the hash embedder")
+    parser.add_argument("--docs-per-law", type=int, default=24)
+    parser.add_argument("--history-conversations", type=int, default=20)
+    parser.add_argument("--history-messages", type=int, default=10)
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--compare", help="Baseline JSON from a previous run")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed p95 increase for --compare")
+    args = parser.parse_args()
+
+    supabase = FakeSupabase(latency_ms=args.db_latency_ms, rpc_latency_ms=args.rpc_latency_ms)
+    groq = FakeGroq.factory(
+        ttft_ms=args.groq_ttft_ms,
+        tokens_per_second=args.groq_tokens_per_second,
+        output_tokens=args.groq_output_tokens,
+    )
+    install_fakes(supabase, groq)
+
+    # Only now is it safe to import the app
+    from app.services.rag_engine import EmbeddingService, RAGEngine
+
+    if args.embedder == "hash":
+        EmbeddingService._backend = HashEmbeddingBackend(latency_ms=args.embed_latency_ms)
+    embedder = EmbeddingService()
+    print("📚 Building synthetic corpus...")
+    supabase.tables["rag_documents"] = synthetic_corpus(RAGEngine.LAW_ROUTING_RULES, embedder, args.docs_per_law)
+    seed_history(
+        supabase,
+        [f"bench-user-{i}" for i in range(max(args.concurrency))],
+        args.history_conversations,
+        args.history_messages,
+    )
+
+    try:
+        results = asyncio.run(run(args, supabase))
+    except StartupFailed as e:
+        print(f"❌ {e}")
+        return 2
+
+    print("\n" + "=" * 96)
+    print(f"{'scenario':<24}{'conc':>6}{'reqs':>7}{'err':>6}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'db/req':>8}")
+    print("-" * 96)
+    for row in results:
+        print(
+            f"{row['scenario']:<24}{row['concurrency']:>6}{row['requests']:>7}{row['errors']:>6}"
+            f"{row['throughput_rps']:>9.1f}{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}"
+            f"{row['p99_ms']:>10.1f}{row['db_calls_per_request']:>8.1f}"
+        )
+
+    report = {
+        "meta": {
+            "git_revision": git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "config": {k: v for k, v in vars(args).items() if k not in ("json", "compare")},
+        },
+        "results": results,
+    }
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n📄 Results written to {args.json}")
+
+    if args.compare:
+        return compare(results, args.compare, args.max_regression)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+# ==========================================
+# Embedding Backend Benchmark
+# ==========================================
+# Measures load time, per-batch latency (p50/p95) and throughput for each
+# embedding backend at several batch sizes, using query-like texts.
+#
+# Usage (from backend/):
+#   python scripts/embedding_benchmark.py --backends local onnx onnx-int8
+#   python scripts/embedding_benchmark.py --batch-sizes 1 8 32 --json bench.json
+# ==========================================
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.embedding_backends import create_backend  # noqa: E402
+
+SAMPLE_QUERIES = [
+    "What is the minimum ceiling height for habitable rooms?",
+    "How many fire exits does a 3-storey office building need?",
+    "Ramp gradient requirements for PWD accessibility under BP 344",
+    "Maximum travel distance to an exit in a mercantile occupancy",
+    "Setback requirements for a commercial lot in Makati",
+    "Sprinkler coverage area per head for light hazard occupancy",
+    "Minimum lot area for socialized housing single detached units",
+    "Parking slot requirements for a restaurant",
+]
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def bench_backend(name, batch_sizes, iterations):
+    start = time.perf_counter()
+    backend = create_backend(name)
+    backend.embed_batch(["warm up"])
+    load_seconds = time.perf_counter() - start
+
+    rows = []
+    for batch_size in batch_sizes:
+        texts = [SAMPLE_QUERIES[i % len(SAMPLE_QUERIES)] for i in range(batch_size)]
+        timings = []
+        for _ in range(iterations):
+            t0 = time.perf_counter()
+            backend.embed_batch(texts)
+            timings.append(time.perf_counter() - t0)
+
+        rows.append({
+            "backend": name,
+            "batch_size": batch_size,
+            "p50_ms": statistics.median(timings) * 1000,
+            "p95_ms": percentile(timings, 95) * 1000,
+            "texts_per_second": batch_size * len(timings) / sum(timings),
+        })
+    return load_seconds, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark embedding backends")
+    parser.add_argument("--backends", nargs="+", default=["local", "onnx", "onnx-int8"])
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 8, 32, 128])
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args()
+
+    results = {"load_seconds": {}, "runs": []}
+    for name in args.backends:
+        print(f"⏱️  Benchmarking {name}...")
+        load_seconds, rows = bench_backend(name, args.batch_sizes, args.iterations)
+        results["load_seconds"][name] = load_seconds
+        results["runs"].extend(rows)
+
+    print("\n" + "=" * 72)
+    print(f"{'backend':<12}{'batch':>8}{'p50 ms':>12}{'p95 ms':>12}{'texts/s':>14}")
+    print("-" * 72)
+    for row in results["runs"]:
+        print(
+            f"{row['backend']:<12}{row['batch_size']:>8}{row['p50_ms']:>12.2f}"
+            f"{row['p95_ms']:>12.2f}{row['texts_per_second']:>14.1f}"
+        )
+    print("-" * 72)
+    for name, seconds in results["load_seconds"].items():
+        print(f"   {name} load + first encode: {seconds:.2f}s")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n📄 Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
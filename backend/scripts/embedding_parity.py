@@ -0,0 +1,129 @@
+# ==========================================
+# Embedding Backend Parity Check
+# ==========================================
+# Compares a candidate embedding backend (onnx, onnx-int8) against the
+# reference SentenceTransformer model on our corpus:
+#   - cosine similarity between reference and candidate vectors per chunk
+#   - top-k neighbour overlap (does retrieval rank the same chunks?)
+#
+# Exits non-zero when the candidate falls below the agreement thresholds,
+# so it can gate a backend switch in CI.
+#
+# Usage (from backend/):
+#   python scripts/embedding_parity.py --backend onnx-int8 --limit 2000
+#   python scripts/embedding_parity.py --backend onnx --corpus chunks.txt
+# ==========================================
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.embedding_backends import create_backend  # noqa: E402
+
+# Minimum mean cosine / top-k overlap accepted per backend
+THRESHOLDS = {
+    "onnx": {"mean_cosine": 0.999, "topk_overlap": 0.98},
+    "onnx-int8": {"mean_cosine": 0.98, "topk_overlap": 0.90},
+}
+
+
+def load_corpus(corpus_file: str = None, limit: int = 2000):
+    """Chunks from a local file (one per line) or from rag_documents."""
+    if corpus_file:
+        with open(corpus_file, encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip()][:limit]
+
+    from app.core.database import supabase
+
+    print(f"📥 Fetching up to {limit} chunks from rag_documents...")
+    texts = []
+    last_id = None
+    while len(texts) < limit:
+        query = supabase.table("rag_documents").select("id, content").order("id").limit(min(1000, limit - len(texts)))
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        batch = query.execute().data
+        if not batch:
+            break
+        texts.extend(r["content"] for r in batch if r.get("content"))
+        last_id = batch[-1]["id"]
+    return texts
+
+
+def encode_all(backend, texts, batch_size=64):
+    import numpy as np
+
+    parts = [backend.encode(texts[i:i + batch_size]) for i in range(0, len(texts), batch_size)]
+    return np.vstack(parts).astype(np.float32)
+
+
+def compare(reference, candidate, k=10):
+    import numpy as np
+
+    cosines = np.sum(reference * candidate, axis=1) / (
+        np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1)
+    )
+
+    # Treat each chunk as a query against the rest of the corpus
+    k = min(k, len(reference) - 1)
+    overlaps = []
+    for i in range(len(reference)):
+        ref_scores = reference @ reference[i]
+        cand_scores = candidate @ candidate[i]
+        ref_scores[i] = cand_scores[i] = -np.inf
+        ref_top = set(np.argpartition(-ref_scores, k)[:k])
+        cand_top = set(np.argpartition(-cand_scores, k)[:k])
+        overlaps.append(len(ref_top & cand_top) / k)
+
+    return {
+        "mean_cosine": float(cosines.mean()),
+        "min_cosine": float(cosines.min()),
+        "p01_cosine": float(np.percentile(cosines, 1)),
+        "topk_overlap": float(np.mean(overlaps)),
+        "k": k,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check embedding backend parity")
+    parser.add_argument("--backend", default="onnx-int8", choices=sorted(THRESHOLDS))
+    parser.add_argument("--corpus", help="Text file with one chunk per line (default: rag_documents)")
+    parser.add_argument("--limit", type=int, default=2000)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    texts = load_corpus(args.corpus, args.limit)
+    if len(texts) < 2:
+        print("❌ Need at least 2 chunks to compare")
+        return 2
+
+    print(f"🔍 Embedding {len(texts)} chunks with reference and {args.backend}...")
+    reference = encode_all(create_backend("local"), texts)
+    candidate = encode_all(create_backend(args.backend), texts)
+    result = compare(reference, candidate, args.k)
+
+    print("\n" + "=" * 60)
+    print(f"📊 PARITY: local vs {args.backend} ({len(texts)} chunks)")
+    print("=" * 60)
+    print(f"   Mean cosine:        {result['mean_cosine']:.5f}")
+    print(f"   Min cosine:         {result['min_cosine']:.5f}")
+    print(f"   1st pct cosine:     {result['p01_cosine']:.5f}")
+    print(f"   Top-{result['k']} overlap:     {result['topk_overlap']:.3f}")
+
+    failed = [
+        f"{metric} {result[metric]:.4f} < {minimum}"
+        for metric, minimum in THRESHOLDS[args.backend].items()
+        if result[metric] < minimum
+    ]
+    if failed:
+        print("\n❌ PARITY FAILED: " + "; ".join(failed))
+        return 1
+
+    print("\n✅ PARITY OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+# ==========================================
+# Export the embedding model to ONNX (fp32 + int8)
+# ==========================================
+# Produces the files read by EMBEDDING_BACKEND=onnx / onnx-int8:
+#   <output>/model.onnx        fp32 transformer (token embeddings out)
+#   <output>/model.int8.onnx   dynamically quantized int8 weights
+#   <output>/tokenizer.json    fast tokenizer
+#
+# Usage (from backend/):
+#   pip install onnx onnxruntime
+#   python scripts/export_onnx_embeddings.py --output models/minilm-onnx
+# ==========================================
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.embedding_backends import ONNX_FP32_FILE, ONNX_INT8_FILE  # noqa: E402
+
+DEFAULT_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+
+def export(model_name: str, output_dir: str, opset: int = 14):
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    os.makedirs(output_dir, exist_ok=True)
+    fp32_path = os.path.join(output_dir, ONNX_FP32_FILE)
+    int8_path = os.path.join(output_dir, ONNX_INT8_FILE)
+
+    print(f"📥 Loading {model_name}...")
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+
+    sample = tokenizer(["Minimum ceiling height of habitable rooms"], return_tensors="pt")
+    inputs = (sample["input_ids"], sample["attention_mask"], sample["token_type_ids"])
+    dynamic = {0: "batch", 1: "sequence"}
+
+    print(f"🔧 Exporting fp32 model to {fp32_path}...")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            inputs,
+            fp32_path,
+            input_names=["input_ids", "attention_mask", "token_type_ids"],
+            output_names=["token_embeddings"],
+            dynamic_axes={
+                "input_ids": dynamic,
+                "attention_mask": dynamic,
+                "token_type_ids": dynamic,
+                "token_embeddings": dynamic,
+            },
+            opset_version=opset,
+        )
+
+    print(f"🔧 Quantizing to int8: {int8_path}...")
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+
+    tokenizer.backend_tokenizer.save(os.path.join(output_dir, "tokenizer.json"))
+
+    for path in (fp32_path, int8_path):
+        print(f"   {os.path.basename(path)}: {os.path.getsize(path) / 1e6:.1f} MB")
+    print("✅ Export complete. Verify with scripts/embedding_parity.py")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export MiniLM embeddings to ONNX")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--output", default="models/minilm-onnx")
+    parser.add_argument("--opset", type=int, default=14)
+    args = parser.parse_args()
+
+    export(args.model, args.output, args.opset)
@@ -0,0 +1,112 @@
+# ==========================================
+# Import-Time Report & Startup Budget Check
+# ==========================================
+# Imports a module (default: app.main) in a fresh interpreter under
+# `python -X importtime`, prints the most expensive modules, and fails if:
+#   - total import time exceeds --budget-ms, or
+#   - a heavy library (torch, sentence_transformers, fitz, groq, numpy, ...)
+#     was loaded by the import itself instead of on first use.
+#
+# Usage (from backend/, with .env present):
+#   python scripts/import_time_report.py
+#   python scripts/import_time_report.py --module app.main --budget-ms 1500 --top 25
+# ==========================================
+
+import argparse
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+# Libraries that must only load when their subsystem is first used
+HEAVY_MODULES = [
+    "torch",
+    "sentence_transformers",
+    "transformers",
+    "onnxruntime",
+    "fitz",
+    "groq",
+    "numpy",
+]
+
+LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure(module: str, runs: int = 3):
+    """Best-of-N cold import; returns (rows, loaded_heavy_modules)."""
+    probe = (
+        f"import sys, {module}; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    best = None
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", probe],
+            cwd=BACKEND_DIR,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            print(result.stderr[-2000:])
+            raise SystemExit(f"❌ Importing {module} failed")
+
+        rows = []
+        for line in result.stderr.splitlines():
+            match = LINE.match(line)
+            if match:
+                self_us, cumulative_us, indent, name = match.groups()
+                rows.append({
+                    "module": name,
+                    "self_ms": int(self_us) / 1000,
+                    "cumulative_ms": int(cumulative_us) / 1000,
+                    "depth": len(indent) // 2,
+                })
+        loaded = [m for m in result.stdout.strip().split(",") if m]
+        total = max((r["cumulative_ms"] for r in rows if r["module"] == module), default=0)
+        if best is None or total < best[0]:
+            best = (total, rows, loaded)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report import-time cost and enforce a startup budget")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--budget-ms", type=float, default=1500)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    total, rows, loaded = measure(args.module, args.runs)
+
+    print("=" * 72)
+    print(f"📦 IMPORT-TIME REPORT: {args.module}")
+    print("=" * 72)
+    print(f"{'cumulative ms':>14}{'self ms':>10}  module")
+    print("-" * 72)
+    # Top-level packages only (depth 0/1) give the per-subsystem picture
+    top_level = sorted((r for r in rows if r["depth"] <= 1), key=lambda r: -r["cumulative_ms"])
+    for row in top_level[:args.top]:
+        print(f"{row['cumulative_ms']:>14.1f}{row['self_ms']:>10.1f}  {row['module']}")
+    print("-" * 72)
+    print(f"Total: {total:.1f} ms (budget {args.budget_ms:.0f} ms)")
+
+    failures = []
+    if total > args.budget_ms:
+        failures.append(f"import took {total:.0f} ms, budget is {args.budget_ms:.0f} ms")
+    if loaded:
+        failures.append(f"heavy modules loaded at import: {', '.join(loaded)}")
+
+    if failures:
+        print("\n❌ STARTUP BUDGET FAILED:")
+        for failure in failures:
+            print(f"   • {failure}")
+        return 1
+
+    print("\n✅ Within startup budget, no heavy modules loaded at import")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
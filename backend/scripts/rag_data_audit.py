@@ -7,14 +7,23 @@
 # 1. Copy this entire script to a Colab cell
 # 2. Set your SUPABASE_URL and SUPABASE_KEY in the config section
 # 3. Run the cell to get a full quality report
+#
+# The audit streams the table once, in-process by default. When running it
+# as a script (not a notebook cell), RAGDataAuditor(workers=N) splits it
+# by id range across N processes.
 # ==========================================
 
 # --- INSTALL DEPENDENCIES (Colab) ---
 # !pip install supabase pandas -q
 
+import hashlib
 import re
+from abc import ABC, abstractmethod
+import time
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from itertools import repeat
 
 # --- CONFIGURATION ---
 # Replace with your actual Supabase credentials
@@ -26,226 +35,394 @@ from supabase import create_client
 
 supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
 
+AUDIT_COLUMNS = "id, content, source, document_type, law_code, section_ref, chunk_index"
+
 # ==========================================
 # DATA QUALITY CHECKS
 # ==========================================
+# Each check is a visitor: the auditor streams rag_documents once and hands
+# every record to every check, so memory stays flat however large the table
+# is. Only issues (and one small digest per record for duplicates) are kept.
+#
+# With workers > 1 the id space is split into ranges of equal row counts,
+# each audited by its own process with its own client; the per-range
+# checks are then merged in id order, so results match a serial run.
 
-class RAGDataAuditor:
-    """Audits rag_documents table for data quality issues."""
+class AuditCheck(ABC):
+    """One data-quality check, fed one record at a time."""
+    
+    title = ""
+    
+    @abstractmethod
+    def visit(self, record):
+        """Inspect one rag_documents record."""
+    
+    @abstractmethod
+    def merge(self, other):
+        """Fold in the findings of the same check over the next id range."""
+    
+    @abstractmethod
+    def finish(self, issues, stats):
+        """Move findings into the auditor's issues/stats and print a summary."""
+
+
+class MissingMetadataCheck(AuditCheck):
+    """Check for missing required fields."""
+    
+    title = "missing metadata"
+    FIELDS = ('law_code', 'section_ref', 'document_type', 'content')
+    
+    def __init__(self):
+        self.missing = {field: [] for field in self.FIELDS}
+    
+    def visit(self, record):
+        for field in self.FIELDS:
+            if not record.get(field) or record[field].strip() == '':
+                self.missing[field].append(record['id'])
+    
+    def merge(self, other):
+        for field, ids in other.missing.items():
+            self.missing[field].extend(ids)
+    
+    def finish(self, issues, stats):
+        for field, ids in self.missing.items():
+            if ids:
+                issues[f'missing_{field}'] = ids
+            print(f"   Missing {field}: {len(ids)}")
+
+
+class DocumentTypeCheck(AuditCheck):
+    """Check for non-standard document_type values."""
+    
+    title = "document_type values"
     
     # Valid document types (from your search_documents_filtered.sql)
     VALID_DOC_TYPES = {"statutory", "procedural", "heuristics", "specialized_planning"}
     
-    # Expected law_code patterns
-    LAW_CODE_PATTERN = re.compile(r"^(RA|PD|BP|IRR|NBCP|Rule)\s?[\dIVX]+", re.IGNORECASE)
+    def __init__(self):
+        self.invalid_types = []
+        self.type_distribution = defaultdict(int)
     
-    # OCR artifact patterns
-    OCR_ISSUES = [
-        (r'\s{3,}', 'Multiple consecutive spaces'),
-        (r'\n{3,}', 'Multiple consecutive newlines'),
-        (r'[•·■□]', 'Bullet character artifacts'),
-        (r'[âãäåæç]', 'Possible mojibake characters'),
-        (r'\x00', 'Null byte characters'),
-        (r'[\ufffd\ufffe\uffff]', 'Unicode replacement characters'),
-    ]
+    def visit(self, record):
+        doc_type = record.get('document_type', '')
+        self.type_distribution[doc_type or '(empty)'] += 1
+        
+        if doc_type and doc_type.lower() not in self.VALID_DOC_TYPES:
+            self.invalid_types.append({
+                'id': record['id'],
+                'document_type': doc_type,
+                'source': record.get('source', '')
+            })
     
-    def __init__(self):
-        self.records = []
-        self.issues = defaultdict(list)
-        self.stats = {}
+    def merge(self, other):
+        self.invalid_types.extend(other.invalid_types)
+        for doc_type, count in other.type_distribution.items():
+            self.type_distribution[doc_type] += count
     
-    def fetch_all_records(self):
-        """Fetch all records from rag_documents table."""
-        print("📥 Fetching records from rag_documents...")
-        
-        # Supabase has a default limit of 1000, so we paginate
-        all_records = []
-        offset = 0
-        batch_size = 1000
+    def finish(self, issues, stats):
+        if self.invalid_types:
+            issues['invalid_document_type'] = self.invalid_types
+        stats['document_type_distribution'] = dict(self.type_distribution)
         
-        while True:
-            response = supabase.table("rag_documents") \
-                .select("id, content, source, document_type, law_code, section_ref, chunk_index") \
-                .range(offset, offset + batch_size - 1) \
-                .execute()
-            
-            batch = response.data
-            if not batch:
-                break
-            
-            all_records.extend(batch)
-            offset += batch_size
-            print(f"   Fetched {len(all_records)} records...")
-        
-        self.records = all_records
-        self.stats['total_records'] = len(all_records)
-        print(f"✅ Total records fetched: {len(all_records)}\n")
-        return self
+        print(f"   Invalid document_types: {len(self.invalid_types)}")
+        print(f"   Distribution: {dict(self.type_distribution)}")
+
+
+class LawCodeCheck(AuditCheck):
+    """Check law_code follows expected format."""
     
-    def check_missing_metadata(self):
-        """Check for missing required fields."""
-        print("🔍 Checking for missing metadata...")
-        
-        missing_law_code = []
-        missing_section_ref = []
-        missing_doc_type = []
-        missing_content = []
-        
-        for record in self.records:
-            rid = record['id']
-            
-            if not record.get('law_code') or record['law_code'].strip() == '':
-                missing_law_code.append(rid)
-            
-            if not record.get('section_ref') or record['section_ref'].strip() == '':
-                missing_section_ref.append(rid)
-            
-            if not record.get('document_type') or record['document_type'].strip() == '':
-                missing_doc_type.append(rid)
-            
-            if not record.get('content') or record['content'].strip() == '':
-                missing_content.append(rid)
-        
-        if missing_law_code:
-            self.issues['missing_law_code'] = missing_law_code
-        if missing_section_ref:
-            self.issues['missing_section_ref'] = missing_section_ref
-        if missing_doc_type:
-            self.issues['missing_document_type'] = missing_doc_type
-        if missing_content:
-            self.issues['missing_content'] = missing_content
-        
-        print(f"   Missing law_code: {len(missing_law_code)}")
-        print(f"   Missing section_ref: {len(missing_section_ref)}")
-        print(f"   Missing document_type: {len(missing_doc_type)}")
-        print(f"   Missing content: {len(missing_content)}\n")
-        return self
+    title = "law_code format"
     
-    def check_invalid_document_types(self):
-        """Check for non-standard document_type values."""
-        print("🔍 Checking document_type values...")
-        
-        invalid_types = []
-        type_distribution = defaultdict(int)
-        
-        for record in self.records:
-            doc_type = record.get('document_type', '')
-            type_distribution[doc_type or '(empty)'] += 1
+    # Expected law_code patterns
+    LAW_CODE_PATTERN = re.compile(r"^(RA|PD|BP|IRR|NBCP|Rule)\s?[\dIVX]+", re.IGNORECASE)
+    
+    def __init__(self):
+        self.non_standard = []
+        self.code_distribution = defaultdict(int)
+    
+    def visit(self, record):
+        law_code = record.get('law_code', '')
+        if law_code:
+            self.code_distribution[law_code] += 1
             
-            if doc_type and doc_type.lower() not in self.VALID_DOC_TYPES:
-                invalid_types.append({
+            if not self.LAW_CODE_PATTERN.match(law_code):
+                self.non_standard.append({
                     'id': record['id'],
-                    'document_type': doc_type,
+                    'law_code': law_code,
                     'source': record.get('source', '')
                 })
-        
-        if invalid_types:
-            self.issues['invalid_document_type'] = invalid_types
-        
-        self.stats['document_type_distribution'] = dict(type_distribution)
-        
-        print(f"   Invalid document_types: {len(invalid_types)}")
-        print(f"   Distribution: {dict(type_distribution)}\n")
-        return self
     
-    def check_law_code_format(self):
-        """Check law_code follows expected format."""
-        print("🔍 Checking law_code format...")
-        
-        non_standard = []
-        code_distribution = defaultdict(int)
-        
-        for record in self.records:
-            law_code = record.get('law_code', '')
-            if law_code:
-                code_distribution[law_code] += 1
-                
-                if not self.LAW_CODE_PATTERN.match(law_code):
-                    non_standard.append({
-                        'id': record['id'],
-                        'law_code': law_code,
-                        'source': record.get('source', '')
-                    })
-        
-        if non_standard:
-            self.issues['non_standard_law_code'] = non_standard
-        
-        self.stats['law_code_distribution'] = dict(code_distribution)
-        
-        print(f"   Non-standard format: {len(non_standard)}")
-        print(f"   Unique law_codes: {len(code_distribution)}\n")
-        return self
+    def merge(self, other):
+        self.non_standard.extend(other.non_standard)
+        for law_code, count in other.code_distribution.items():
+            self.code_distribution[law_code] += count
     
-    def check_content_quality(self):
-        """Check content for quality issues."""
-        print("🔍 Checking content quality...")
-        
-        too_short = []  # < 50 chars
-        too_long = []   # > 10000 chars (likely bad chunking)
-        ocr_issues = []
-        
-        for record in self.records:
-            content = record.get('content', '')
-            rid = record['id']
-            content_len = len(content)
-            
-            # Length checks
-            if content_len < 50:
-                too_short.append({
-                    'id': rid,
-                    'length': content_len,
-                    'preview': content[:100],
-                    'source': record.get('source', '')
-                })
-            elif content_len > 10000:
-                too_long.append({
-                    'id': rid,
-                    'length': content_len,
-                    'source': record.get('source', '')
-                })
-            
-            # OCR artifact checks
-            for pattern, issue_name in self.OCR_ISSUES:
-                if re.search(pattern, content):
-                    ocr_issues.append({
-                        'id': rid,
-                        'issue': issue_name,
-                        'source': record.get('source', ''),
-                        'preview': content[:200]
-                    })
-                    break  # Only report first issue per record
-        
-        if too_short:
-            self.issues['content_too_short'] = too_short
-        if too_long:
-            self.issues['content_too_long'] = too_long
-        if ocr_issues:
-            self.issues['ocr_artifacts'] = ocr_issues
+    def finish(self, issues, stats):
+        if self.non_standard:
+            issues['non_standard_law_code'] = self.non_standard
+        stats['law_code_distribution'] = dict(self.code_distribution)
         
-        print(f"   Content too short (<50 chars): {len(too_short)}")
-        print(f"   Content too long (>10k chars): {len(too_long)}")
-        print(f"   OCR artifacts detected: {len(ocr_issues)}\n")
-        return self
+        print(f"   Non-standard format: {len(self.non_standard)}")
+        print(f"   Unique law_codes: {len(self.code_distribution)}")
+
+
+class ContentQualityCheck(AuditCheck):
+    """Check content for quality issues."""
     
-    def check_duplicates(self):
-        """Check for duplicate content."""
-        print("🔍 Checking for duplicates...")
-        
-        content_hash = defaultdict(list)
-        for record in self.records:
-            # Use first 500 chars as "fingerprint" (full content comparison is expensive)
-            fingerprint = record.get('content', '')[:500].strip()
-            content_hash[fingerprint].append(record['id'])
-        
-        duplicates = {k: v for k, v in content_hash.items() if len(v) > 1}
-        
-        if duplicates:
-            self.issues['duplicate_content'] = [
-                {'duplicate_ids': ids, 'preview': fp[:100]} 
-                for fp, ids in duplicates.items()
-            ]
+    title = "content quality"
+    
+    # OCR artifact patterns, in reporting priority: (group, pattern, issue)
+    OCR_ISSUES = [
+        ('spaces', r'\s{3,}', 'Multiple consecutive spaces'),
+        ('newlines', r'\n{3,}', 'Multiple consecutive newlines'),
+        ('bullets', r'[•·■□]', 'Bullet character artifacts'),
+        ('mojibake', r'[âãäåæç]', 'Possible mojibake characters'),
+        ('null', r'\x00', 'Null byte characters'),
+        ('replacement', r'[\ufffd\ufffe\uffff]', 'Unicode replacement characters'),
+    ]
+    # All patterns in one alternation: a single scan of the content finds
+    # every artifact kind, and match.lastgroup says which one matched. The
+    # leading lookahead on the characters an artifact can start with lets
+    # the regex engine skip straight to candidate positions.
+    OCR_START = r'[\s•·■□âãäåæç\x00\ufffd\ufffe\uffff]'
+    OCR_PATTERN = re.compile(
+        f"(?={OCR_START})(?:" + "|".join(f"(?P<{group}>{pattern})" for group, pattern, _ in OCR_ISSUES) + ")"
+    )
+    OCR_PRIORITY = {group: rank for rank, (group, _, _) in enumerate(OCR_ISSUES)}
+    OCR_NAMES = {group: issue for group, _, issue in OCR_ISSUES}
+    
+    @classmethod
+    def ocr_issue(cls, content):
+        """The highest-priority artifact in content, or None."""
+        best = None
+        for match in cls.OCR_PATTERN.finditer(content):
+            rank = cls.OCR_PRIORITY[match.lastgroup]
+            if best is None or rank < best:
+                best = rank
+                if rank == 0:
+                    break
+        return None if best is None else cls.OCR_ISSUES[best][2]
+    
+    def __init__(self):
+        self.too_short = []  # < 50 chars
+        self.too_long = []   # > 10000 chars (likely bad chunking)
+        self.ocr_issues = []
+    
+    def visit(self, record):
+        content = record.get('content') or ''
+        rid = record['id']
+        content_len = len(content)
+        
+        # Length checks
+        if content_len < 50:
+            self.too_short.append({
+                'id': rid,
+                'length': content_len,
+                'preview': content[:100],
+                'source': record.get('source', '')
+            })
+        elif content_len > 10000:
+            self.too_long.append({
+                'id': rid,
+                'length': content_len,
+                'source': record.get('source', '')
+            })
+        
+        # OCR artifact checks (only the first issue per record is reported)
+        issue_name = self.ocr_issue(content)
+        if issue_name:
+            self.ocr_issues.append({
+                'id': rid,
+                'issue': issue_name,
+                'source': record.get('source', ''),
+                'preview': content[:200]
+            })
+    
+    def merge(self, other):
+        self.too_short.extend(other.too_short)
+        self.too_long.extend(other.too_long)
+        self.ocr_issues.extend(other.ocr_issues)
+    
+    def finish(self, issues, stats):
+        if self.too_short:
+            issues['content_too_short'] = self.too_short
+        if self.too_long:
+            issues['content_too_long'] = self.too_long
+        if self.ocr_issues:
+            issues['ocr_artifacts'] = self.ocr_issues
+        
+        print(f"   Content too short (<50 chars): {len(self.too_short)}")
+        print(f"   Content too long (>10k chars): {len(self.too_long)}")
+        print(f"   OCR artifacts detected: {len(self.ocr_issues)}")
+
+
+class DuplicateCheck(AuditCheck):
+    """Check for duplicate content."""
+    
+    title = "duplicates"
+    
+    def __init__(self):
+        # 16-byte digest of the fingerprint -> first id; full text is never kept
+        self.first_seen = {}
+        self.duplicates = {}
+    
+    def visit(self, record):
+        # Use first 500 chars as "fingerprint" (full content comparison is expensive)
+        fingerprint = (record.get('content') or '')[:500].strip()
+        digest = hashlib.blake2b(fingerprint.encode('utf-8'), digest_size=16).digest()
+        first_id = self.first_seen.setdefault(digest, record['id'])
+        if first_id == record['id']:
+            return
+        cluster = self.duplicates.setdefault(digest, {'duplicate_ids': [first_id], 'preview': fingerprint[:100]})
+        cluster['duplicate_ids'].append(record['id'])
+    
+    def merge(self, other):
+        for digest, first_id in other.first_seen.items():
+            cluster = other.duplicates.get(digest)
+            if digest not in self.first_seen:
+                self.first_seen[digest] = first_id
+                if cluster:
+                    self.duplicates[digest] = cluster
+                continue
+            # Duplicate across ranges: the preview is filled in by fill_previews()
+            merged = self.duplicates.setdefault(digest, {'duplicate_ids': [self.first_seen[digest]], 'preview': None})
+            merged['duplicate_ids'].extend(cluster['duplicate_ids'] if cluster else [first_id])
+    
+    def fill_previews(self, client):
+        """Fetch previews for clusters that only formed when ranges were merged."""
+        clusters = {c['duplicate_ids'][0]: c for c in self.duplicates.values() if c['preview'] is None}
+        ids = list(clusters)
+        for i in range(0, len(ids), 100):
+            rows = client.table("rag_documents").select("id, content").in_("id", ids[i:i + 100]).execute().data
+            for row in rows or []:
+                clusters[row['id']]['preview'] = (row.get('content') or '')[:500].strip()[:100]
+    
+    def finish(self, issues, stats):
+        if self.duplicates:
+            issues['duplicate_content'] = list(self.duplicates.values())
         
-        print(f"   Duplicate clusters found: {len(duplicates)}\n")
+        print(f"   Duplicate clusters found: {len(self.duplicates)}")
+
+
+def iter_records(client, batch_size=1000, start_id=None, stop_id=None):
+    """
+    Records of rag_documents with start_id <= id < stop_id (None: unbounded),
+    one batch in memory at a time.
+    
+    Keyset pagination (id > last id) instead of OFFSET: each batch is an
+    index range scan, so the last page costs the same as the first.
+    """
+    last_id = None
+    while True:
+        query = client.table("rag_documents") \
+            .select(AUDIT_COLUMNS) \
+            .order("id") \
+            .limit(batch_size)
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        elif start_id is not None:
+            query = query.gte("id", start_id)
+        if stop_id is not None:
+            query = query.lt("id", stop_id)
+        
+        batch = query.execute().data
+        if not batch:
+            break
+        
+        yield from batch
+        if len(batch) < batch_size:
+            break
+        last_id = batch[-1]['id']
+
+
+def audit_range(id_range, batch_size):
+    """Worker process: run every check over one id range, with its own client."""
+    client = create_client(SUPABASE_URL, SUPABASE_KEY)
+    checks = [check() for check in RAGDataAuditor.CHECKS]
+    total = 0
+    for record in iter_records(client, batch_size, *id_range):
+        for check in checks:
+            check.visit(record)
+        total += 1
+    return total, checks
+
+
+class RAGDataAuditor:
+    """Audits rag_documents table for data quality issues, in one streaming pass."""
+    
+    CHECKS = [MissingMetadataCheck, DocumentTypeCheck, LawCodeCheck, ContentQualityCheck, DuplicateCheck]
+    
+    def __init__(self, batch_size=1000, workers=1):
+        self.batch_size = batch_size
+        self.workers = max(1, workers)
+        self.checks = [check() for check in self.CHECKS]
+        self.issues = defaultdict(list)
+        self.stats = {}
+    
+    def iter_records(self):
+        """Every record of rag_documents, in id order."""
+        return iter_records(supabase, self.batch_size)
+    
+    def id_ranges(self):
+        """
+        Split the id space into up to self.workers ranges of equal row count.
+        
+        Each boundary is a one-row query at OFFSET k * step in id order: one
+        query per worker, but each still walks the id index up to its offset
+        (ids only, no row data).
+        """
+        total = supabase.table("rag_documents").select("id", count="exact").limit(1).execute().count or 0
+        workers = max(1, min(self.workers, -(-total // self.batch_size)))
+        step = -(-total // workers) if total else 1
+        bounds = []
+        for offset in range(step, total, step):
+            rows = supabase.table("rag_documents").select("id").order("id").range(offset, offset).execute().data
+            if rows:
+                bounds.append(rows[0]['id'])
+        return list(zip([None] + bounds, bounds + [None]))
+    
+    def audit_records(self, records):
+        """Visit every record with every check, in this process."""
+        print("📥 Streaming records from rag_documents...")
+        
+        total = 0
+        for record in records:
+            for check in self.checks:
+                check.visit(record)
+            total += 1
+            if total % (self.batch_size * 10) == 0:
+                print(f"   Audited {total} records...")
+        return total
+    
+    def audit_parallel(self):
+        """Audit id ranges in a process pool and merge the checks in id order."""
+        ranges = self.id_ranges()
+        if len(ranges) < 2:
+            return self.audit_records(self.iter_records())
+        
+        print(f"📥 Streaming records from rag_documents in {len(ranges)} processes...")
+        total = 0
+        with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+            for count, checks in pool.map(audit_range, ranges, repeat(self.batch_size)):
+                total += count
+                for check, other in zip(self.checks, checks):
+                    check.merge(other)
+                print(f"   Audited {total} records...")
+        
+        for check in self.checks:
+            if isinstance(check, DuplicateCheck):
+                check.fill_previews(supabase)
+        return total
+    
+    def collect(self, total, seconds):
+        """Move every check's findings into issues/stats and print them."""
+        self.stats['total_records'] = total
+        print(f"✅ Total records audited: {total} in {seconds:.1f}s\n")
+        
+        for check in self.checks:
+            print(f"🔍 Checking {check.title}...")
+            check.finish(self.issues, self.stats)
+            print()
         return self
     
     def generate_report(self):
@@ -316,15 +493,12 @@ class RAGDataAuditor:
     
     def run_full_audit(self):
         """Run all checks and generate report."""
-        return (
-            self.fetch_all_records()
-                .check_missing_metadata()
-                .check_invalid_document_types()
-                .check_law_code_format()
-                .check_content_quality()
-                .check_duplicates()
-                .generate_report()
-        )
+        start = time.perf_counter()
+        if self.workers > 1:
+            total = self.audit_parallel()
+        else:
+            total = self.audit_records(self.iter_records())
+        return self.collect(total, time.perf_counter() - start).generate_report()
 
 
 # ==========================================
@@ -0,0 +1,164 @@
+# ==========================================
+# Background Re-embedding Into the Shadow Index
+# ==========================================
+# Embeds every rag_documents chunk with a new model and upserts the
+# vectors into rag_documents_shadow (database/embedding_shadow.sql) while
+# the API keeps serving the current column.
+#
+# Walks rag_documents in id order (keyset pagination) and skips chunks that
+# already have a shadow vector from the same model, so the job can be
+# stopped and restarted at any time, and re-running it after an ingest only
+# embeds new or changed chunks.
+#
+# Migration:
+#   1. Run database/embedding_shadow.sql (with the new model's dimension)
+#   2. Set SHADOW_EMBEDDING_MODEL and run this script until coverage is 100%
+#   3. Set SHADOW_DUAL_READ_RATE (e.g. 0.05) and watch the dual-read
+#      overlap / latency metrics on /metrics
+#   4. Set EMBEDDING_CUTOVER=True to serve the shadow index
+#
+# Usage (from backend/):
+#   python scripts/reembed_corpus.py --model BAAI/bge-small-en-v1.5
+#   python scripts/reembed_corpus.py --sleep-ms 200         # Throttle next to live traffic
+#   python scripts/reembed_corpus.py --status --json        # Coverage only
+# ==========================================
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.config import settings  # noqa: E402
+from app.core.database import supabase  # noqa: E402
+
+PAGE_SIZE = 1000
+BATCH_SIZE = 64
+
+
+def pages(page_size: int):
+    """rag_documents (id, content) in id order, one page at a time."""
+    last_id = None
+    while True:
+        query = supabase.table("rag_documents") \
+            .select("id, content") \
+            .order("id") \
+            .limit(page_size)
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        batch = query.execute().data or []
+        if batch:
+            yield batch
+        if len(batch) < page_size:
+            return
+        last_id = batch[-1]["id"]
+
+
+def done_ids(batch, model: str) -> set:
+    """Ids in this page's id range that already have a shadow vector from model."""
+    # Shadow rows reference rag_documents, so the range holds at most len(batch)
+    result = supabase.table("rag_documents_shadow") \
+        .select("id") \
+        .gte("id", batch[0]["id"]) \
+        .lte("id", batch[-1]["id"]) \
+        .eq("model", model) \
+        .limit(len(batch)) \
+        .execute()
+    return {row["id"] for row in result.data or []}
+
+
+def coverage(model: str, page_size: int) -> dict:
+    """Share of chunks with a shadow vector from model. Empty chunks are never embedded, so not counted."""
+    total = embedded = 0
+    for batch in pages(page_size):
+        done = done_ids(batch, model)
+        for row in batch:
+            if row.get("content"):
+                total += 1
+                embedded += row["id"] in done
+    return {"model": model, "chunks": total, "embedded": embedded,
+            "coverage": embedded / total if total else 1.0}
+
+
+def reembed(model: str, page_size: int, batch_size: int, sleep_ms: int, limit: int = None, quiet: bool = False) -> dict:
+    from app.services.embedding_backends import SentenceTransformerBackend
+
+    backend = SentenceTransformerBackend(model)
+    stats = {"model": model, "scanned": 0, "skipped": 0, "embedded": 0, "seconds": 0.0}
+    start = time.perf_counter()
+
+    for batch in pages(page_size):
+        stats["scanned"] += len(batch)
+        done = done_ids(batch, model)
+        todo = [row for row in batch if row["id"] not in done and row.get("content")]
+        stats["skipped"] += len(batch) - len(todo)
+        if limit is not None:
+            todo = todo[:max(0, limit - stats["embedded"])]
+
+        for i in range(0, len(todo), batch_size):
+            rows = todo[i:i + batch_size]
+            vectors = backend.encode([row["content"] for row in rows])
+            supabase.table("rag_documents_shadow").upsert([
+                {"id": row["id"], "embedding": vector.tolist(), "model": model}
+                for row, vector in zip(rows, vectors)
+            ]).execute()
+            stats["embedded"] += len(rows)
+            if sleep_ms:
+                time.sleep(sleep_ms / 1000)
+
+        if not quiet:
+            print(f"   Scanned {stats['scanned']}, embedded {stats['embedded']}, skipped {stats['skipped']}...")
+        if limit is not None and stats["embedded"] >= limit:
+            break
+
+    stats["seconds"] = round(time.perf_counter() - start, 1)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-embed rag_documents into the shadow index")
+    parser.add_argument("--model", default=settings.SHADOW_EMBEDDING_MODEL,
+                        help="Target model (default: SHADOW_EMBEDDING_MODEL)")
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--sleep-ms", type=int, default=0, help="Pause between batches")
+    parser.add_argument("--limit", type=int, help="Stop after embedding this many chunks")
+    parser.add_argument("--status", action="store_true", help="Report coverage without embedding")
+    parser.add_argument("--json", action="store_true", help="Print the result as JSON")
+    args = parser.parse_args()
+
+    if not args.model:
+        print("❌ No target model: pass --model or set SHADOW_EMBEDDING_MODEL")
+        return 2
+
+    if args.status:
+        result = coverage(args.model, args.page_size)
+    else:
+        if not args.json:
+            print(f"🔄 Re-embedding rag_documents with {args.model}...")
+        result = reembed(args.model, args.page_size, args.batch_size, args.sleep_ms, args.limit, quiet=args.json)
+        result.update(coverage(args.model, args.page_size))
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print("\n" + "=" * 60)
+        print(f"📊 SHADOW INDEX: {args.model}")
+        print("=" * 60)
+        for key, value in result.items():
+            if key != "model":
+                print(f"   {key:<10} {value:.1%}" if key == "coverage" else f"   {key:<10} {value}")
+
+    if result["coverage"] < 1.0:
+        if not args.json:
+            print("\n⚠️  Shadow index incomplete; keep EMBEDDING_CUTOVER off")
+        return 1
+    if not args.json:
+        print("\n✅ Shadow index complete")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
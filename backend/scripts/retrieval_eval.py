@@ -0,0 +1,305 @@
+# ==========================================
+# Retrieval Evaluation Harness
+# ==========================================
+# Runs RAGEngine.retrieve() over a labeled query set against a local
+# corpus snapshot and reports, per configuration and mode:
+#   - recall@k over expected law codes (and sections, where labeled)
+#   - MRR of the first relevant chunk
+#   - retrieval latency (p50/p95) and DB calls per query
+#
+# Configurations vary MODE_CONFIG (top_k, similarity_threshold), the
+# Law Router's HYBRID_BOOST and LAW_ROUTING_RULES; see DEFAULT_CONFIGS or
+# pass --configs configs.json with the same shape.
+#
+# Usage (from backend/):
+#   # 1. One-time: dump rag_documents (with embeddings) to a local snapshot
+#   python scripts/retrieval_eval.py --export-snapshot corpus.jsonl
+#   # 2. Optionally add candidate queries from the fine-tuning dialogues
+#   python scripts/retrieval_eval.py --seed-from ../fine-tuning/datasets/raw_dialogues.json
+#   # 3. Evaluate
+#   python scripts/retrieval_eval.py --corpus corpus.jsonl --json eval.json
+#
+# Queries seeded from dialogues are labeled from the laws the answer cited
+# and marked "reviewed": false; only reviewed queries are scored unless
+# --include-unreviewed is given.
+# ==========================================
+
+import argparse
+import asyncio
+import copy
+import json
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from bench_fakes import FakeSupabase, HashEmbeddingBackend, install_fakes, load_corpus_snapshot  # noqa: E402
+
+DEFAULT_GOLDEN = Path(__file__).with_name("golden_queries.json")
+SNAPSHOT_COLUMNS = "id, content, source, document_type, law_code, section_ref, chunk_index, embedding"
+
+DEFAULT_CONFIGS = [
+    {"name": "baseline"},
+    {"name": "no_law_router", "routing_rules": {}},
+    {"name": "boost_0.00", "hybrid_boost": 0.0},
+    {"name": "boost_0.30", "hybrid_boost": 0.30},
+    {"name": "threshold_0.20", "mode_overrides": {"*": {"similarity_threshold": 0.20}}},
+    {"name": "threshold_0.40", "mode_overrides": {"*": {"similarity_threshold": 0.40}}},
+    {"name": "top_k_4", "mode_overrides": {"*": {"top_k": 4}}},
+    {"name": "top_k_16", "mode_overrides": {"*": {"top_k": 16}}},
+]
+
+# Citations in assistant answers, e.g. "RA 9514", "PD_1096", "Section 805"
+LAW_CITATION = re.compile(r"\b(RA|PD|BP)[\s_-]?(\d{2,5})\b", re.IGNORECASE)
+SECTION_CITATION = re.compile(r"\bSec(?:tion|\.)?\s*(\d+(?:\.\d+)*)", re.IGNORECASE)
+
+
+def normalize_law(code: str) -> str:
+    return re.sub(r"\s+", " ", (code or "").replace("_", " ")).strip().upper()
+
+
+def normalize_section(section: str) -> str:
+    match = SECTION_CITATION.search(section or "")
+    return match.group(1) if match else (section or "").strip().lower()
+
+
+# ------------------------------------------
+# Golden set
+# ------------------------------------------
+
+def load_golden(path: Path, include_unreviewed: bool):
+    with open(path, encoding="utf-8") as f:
+        queries = json.load(f)
+    return [q for q in queries if include_unreviewed or q.get("reviewed", True)]
+
+
+def _dialogue_turns(dialogue):
+    """(user_text, assistant_text) from the chat formats we have used for fine-tuning."""
+    if "messages" in dialogue:
+        turns = [(m.get("role"), m.get("content", "")) for m in dialogue["messages"]]
+    elif "conversations" in dialogue:
+        roles = {"human": "user", "gpt": "assistant"}
+        turns = [(roles.get(m.get("from"), m.get("from")), m.get("value", "")) for m in dialogue["conversations"]]
+    else:
+        question = dialogue.get("instruction") or dialogue.get("question") or dialogue.get("input")
+        answer = dialogue.get("output") or dialogue.get("answer") or dialogue.get("response", "")
+        turns = [("user", question), ("assistant", answer)] if question else []
+
+    user_text = next((text for role, text in turns if role == "user"), None)
+    assistant_text = " ".join(text for role, text in turns if role == "assistant")
+    return user_text, assistant_text
+
+
+def seed_from_dialogues(dialogue_path: str, golden_path: Path):
+    with open(dialogue_path, encoding="utf-8") as f:
+        dialogues = json.load(f)
+    with open(golden_path, encoding="utf-8") as f:
+        golden = json.load(f)
+
+    known = {q["query"].strip().lower() for q in golden}
+    added = 0
+    for index, dialogue in enumerate(dialogues):
+        query, answer = _dialogue_turns(dialogue)
+        if not query or query.strip().lower() in known:
+            continue
+        laws = sorted({f"{kind.upper()} {number}" for kind, number in LAW_CITATION.findall(answer)})
+        if not laws:
+            continue  # Nothing to score against
+        golden.append({
+            "id": f"dialogue-{index}",
+            "query": query.strip(),
+            "expected_law_codes": laws,
+            "expected_sections": sorted({f"Section {s}" for s in SECTION_CITATION.findall(answer)}),
+            "source": "raw_dialogues",
+            "reviewed": False,
+        })
+        known.add(query.strip().lower())
+        added += 1
+
+    with open(golden_path, "w", encoding="utf-8") as f:
+        json.dump(golden, f, indent=2, ensure_ascii=False)
+    print(f"🌱 Added {added} unreviewed queries from {len(dialogues)} dialogues to {golden_path}")
+
+
+# ------------------------------------------
+# Snapshot export (talks to the real database)
+# ------------------------------------------
+
+def export_snapshot(path: str, page_size: int = 500):
+    from app.core.database import supabase
+
+    written = 0
+    last_id = None
+    with open(path, "w", encoding="utf-8") as f:
+        while True:
+            query = supabase.table("rag_documents").select(SNAPSHOT_COLUMNS).order("id").limit(page_size)
+            if last_id is not None:
+                query = query.gt("id", last_id)
+            batch = query.execute().data
+            if not batch:
+                break
+            for row in batch:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            written += len(batch)
+            last_id = batch[-1]["id"]
+            print(f"   📥 {written} chunks...")
+    print(f"✅ Snapshot written to {path} ({written} chunks)")
+
+
+# ------------------------------------------
+# Evaluation
+# ------------------------------------------
+
+def build_engine(config: dict):
+    """RAGEngine subclass with this configuration's class-level knobs."""
+    from app.services.rag_engine import RAGEngine
+
+    mode_config = copy.deepcopy(RAGEngine.MODE_CONFIG)
+    for mode, overrides in config.get("mode_overrides", {}).items():
+        for name in (mode_config if mode == "*" else [mode]):
+            mode_config[name].update(overrides)
+
+    attributes = {
+        "MODE_CONFIG": mode_config,
+        "HYBRID_BOOST": config.get("hybrid_boost", RAGEngine.HYBRID_BOOST),
+    }
+    rules = config.get("routing_rules")
+    if isinstance(rules, str):
+        with open(rules, encoding="utf-8") as f:
+            rules = json.load(f)
+    if rules is not None:
+        attributes["LAW_ROUTING_RULES"] = rules
+
+    return type(f"RAGEngine_{config['name']}", (RAGEngine,), attributes)()
+
+
+def score(sources, expected, ks):
+    expected_laws = {normalize_law(code) for code in expected["expected_law_codes"]}
+    expected_sections = {normalize_section(s) for s in expected.get("expected_sections", [])}
+
+    ranked = [(normalize_law(s.law_code), normalize_section(s.section)) for s in sources]
+
+    def relevant(law, section):
+        return law in expected_laws and (not expected_sections or section in expected_sections)
+
+    first = next((rank for rank, (law, section) in enumerate(ranked, 1) if relevant(law, section)), None)
+    row = {"mrr": 1 / first if first else 0.0}
+    for k in ks:
+        laws_found = {law for law, _ in ranked[:k]} & expected_laws
+        row[f"recall@{k}"] = len(laws_found) / len(expected_laws)
+        if expected_sections:
+            sections_found = {section for law, section in ranked[:k] if law in expected_laws} & expected_sections
+            row[f"section_recall@{k}"] = len(sections_found) / len(expected_sections)
+    return row
+
+
+async def evaluate(engine, queries, mode, ks, supabase: FakeSupabase):
+    rows = []
+    for query in queries:
+        supabase.reset_calls()
+        start = time.perf_counter()
+        sources = await engine.retrieve(query["query"], user_id="eval", mode=query.get("mode", mode))
+        latency = time.perf_counter() - start
+        row = score(sources, query, ks)
+        row.update({"id": query["id"], "latency_ms": latency * 1000, "db_calls": sum(supabase.calls.values())})
+        rows.append(row)
+    return rows
+
+
+def summarize(rows, ks):
+    latencies = sorted(r["latency_ms"] for r in rows)
+    summary = {
+        "queries": len(rows),
+        "mrr": statistics.mean(r["mrr"] for r in rows),
+        "latency_p50_ms": statistics.median(latencies),
+        "latency_p95_ms": latencies[min(len(latencies) - 1, int(round(0.95 * (len(latencies) - 1))))],
+        "db_calls_per_query": statistics.mean(r["db_calls"] for r in rows),
+    }
+    for k in ks:
+        summary[f"recall@{k}"] = statistics.mean(r[f"recall@{k}"] for r in rows)
+        sectioned = [r[f"section_recall@{k}"] for r in rows if f"section_recall@{k}" in r]
+        if sectioned:
+            summary[f"section_recall@{k}"] = statistics.mean(sectioned)
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate retrieval quality and cost per configuration")
+    parser.add_argument("--corpus", help="JSONL snapshot from --export-snapshot")
+    parser.add_argument("--golden", default=str(DEFAULT_GOLDEN))
+    parser.add_argument("--configs", help="JSON list of configurations (default: built-in grid)")
+    parser.add_argument("--modes", nargs="+", default=["quick_answer", "compliance"])
+    parser.add_argument("--k", nargs="+", type=int, default=[1, 3, 5, 10])
+    parser.add_argument("--embedder", choices=["real", "hash"], default="real",
+                        help="real: EMBEDDING_BACKEND (must match the snapshot); hash: quick smoke runs")
+    parser.add_argument("--db-latency-ms", type=float, default=0.0, help="Simulated per-call DB latency")
+    parser.add_argument("--include-unreviewed", action="store_true")
+    parser.add_argument("--json", help="Write per-query and summary results to this file")
+    parser.add_argument("--export-snapshot", metavar="PATH", help="Dump rag_documents to PATH and exit")
+    parser.add_argument("--seed-from", metavar="DIALOGUES", help="Add candidate queries from a dialogue dataset and exit")
+    args = parser.parse_args()
+
+    if args.export_snapshot:
+        export_snapshot(args.export_snapshot)
+        return 0
+    if args.seed_from:
+        seed_from_dialogues(args.seed_from, Path(args.golden))
+        return 0
+    if not args.corpus:
+        parser.error("--corpus is required (create one with --export-snapshot)")
+
+    supabase = FakeSupabase(latency_ms=args.db_latency_ms)
+    install_fakes(supabase)
+
+    # Only now is it safe to import the app
+    from app.services.rag_engine import EmbeddingService
+
+    if args.embedder == "hash":
+        EmbeddingService._backend = HashEmbeddingBackend()
+    embedder = EmbeddingService()
+
+    supabase.tables["rag_documents"] = load_corpus_snapshot(args.corpus, embedder)
+    queries = load_golden(Path(args.golden), args.include_unreviewed)
+    configs = DEFAULT_CONFIGS
+    if args.configs:
+        with open(args.configs, encoding="utf-8") as f:
+            configs = json.load(f)
+    print(f"🔍 {len(queries)} queries × {len(configs)} configs × {len(args.modes)} modes "
+          f"over {len(supabase.tables['rag_documents'])} chunks")
+
+    # Hybrid search logs every fetched document at INFO; keep the report readable
+    import logging
+    logging.getLogger("app").setLevel(logging.WARNING)
+
+    results = []
+    for config in configs:
+        engine = build_engine(config)
+        for mode in args.modes:
+            rows = asyncio.run(evaluate(engine, queries, mode, args.k, supabase))
+            results.append({"config": config["name"], "mode": mode, "summary": summarize(rows, args.k), "queries": rows})
+
+    recall_columns = [f"recall@{k}" for k in args.k]
+    print("\n" + "=" * (54 + 10 * len(recall_columns)))
+    print(f"{'config':<18}{'mode':<15}" + "".join(f"{c:>10}" for c in recall_columns)
+          + f"{'MRR':>8}{'p50 ms':>9}{'p95 ms':>9}{'db/q':>6}")
+    print("-" * (54 + 10 * len(recall_columns)))
+    for result in results:
+        s = result["summary"]
+        print(
+            f"{result['config']:<18}{result['mode']:<15}"
+            + "".join(f"{s[c]:>10.3f}" for c in recall_columns)
+            + f"{s['mrr']:>8.3f}{s['latency_p50_ms']:>9.1f}{s['latency_p95_ms']:>9.1f}{s['db_calls_per_query']:>6.1f}"
+        )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"configs": configs, "k": args.k, "results": results}, f, indent=2)
+        print(f"\n📄 Results written to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
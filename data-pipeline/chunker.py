@@ -0,0 +1,179 @@
+"""
+Structure-aware chunking.
+
+Philippine statutes and IRRs are organised as PART / RULE / CHAPTER /
+ARTICLE / SECTION. The chunker splits at those headings. A chunk never
+spans two sections, and each chunk records where it sits:
+
+    section_ref   "Section 10.2.5"                  (deepest heading, for citations)
+    section_key   "section:10.2.5"                  (normalized; Roman numerals -> digits)
+    heading_path  ["RULE 10 - ...", "SECTION 10.2.5. Fire Exits"]
+
+A section longer than chunk_chars is split into overlapping windows. A
+heading's title line ("RULE III" / "FIRE SAFETY") joins the heading. A
+heading followed directly by another heading is carried into the next
+chunk instead of becoming a chunk of its own.
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional, Set, Tuple
+
+from parsers import Page
+
+# Keyword is case-insensitive, the Roman numeral is not ("Rule civil" is not a heading)
+HEADING = re.compile(
+    r"^(?P<kind>(?i:PART|TITLE|BOOK|RULE|CHAPTER|ARTICLE|DIVISION|SECTION|SEC\.))\s*"
+    r"(?P<number>\d+(?:\.\d+)*|[IVXLC]+)\b\s*(?P<rest>.*)$"
+)
+HEADING_LEVELS = {
+    "part": 0, "title": 0, "book": 0,
+    "rule": 1, "chapter": 1,
+    "article": 2, "division": 2,
+    "section": 3,
+}
+HEADING_MAX_CHARS = 80          # Heading text kept in heading_path
+ROMAN = {"I": 1, "V": 5, "X": 10, "L": 50, "C": 100}
+
+
+@dataclass
+class Heading:
+    level: int
+    ref: str          # "Section 3.2"
+    key: str          # "section:3.2"
+    text: str         # The heading line, truncated
+
+
+@dataclass
+class Piece:
+    text: str
+    page_start: int
+    section_ref: str = ""
+    section_key: str = ""
+    heading_path: List[str] = field(default_factory=list)
+
+
+def roman_to_int(numeral: str) -> int:
+    total = 0
+    for current, following in zip(numeral, numeral[1:] + " "):
+        value = ROMAN[current]
+        total += -value if ROMAN.get(following, 0) > value else value
+    return total
+
+
+def parse_heading(line: str, hinted: Set[str]) -> Optional[Heading]:
+    """
+    A structural heading, or None.
+
+    "Section 5 of this Act ..." at the start of a wrapped line is body text,
+    so a match only counts if the layout marked the line as a heading, the
+    keyword is upper case, or the number is followed by punctuation
+    ("Section 5. Definitions. - ...") or nothing.
+    """
+    match = HEADING.match(line)
+    if not match:
+        return None
+    kind, number, rest = match.group("kind"), match.group("number"), match.group("rest")
+    if not (line in hinted or kind.isupper() or not rest or rest[0] in ".:-–—"):
+        return None
+
+    kind = "section" if kind.lower() == "sec." else kind.lower()
+    normalized = str(roman_to_int(number)) if number.isalpha() else number
+    return Heading(
+        level=HEADING_LEVELS[kind],
+        ref=f"{kind.title()} {number}",
+        key=f"{kind}:{normalized}",
+        text=line[:HEADING_MAX_CHARS].rstrip(),
+    )
+
+
+class SectionChunker:
+    """Streams one document's pages in, yields Pieces that never cross a section boundary."""
+
+    def __init__(self, chunk_chars: int, overlap_chars: int):
+        self.chunk_chars = chunk_chars
+        self.overlap_chars = overlap_chars
+        self.path: List[Heading] = []
+        self.buffer = ""
+        self.buffer_page = 1
+        self.has_body = False         # Buffer holds more than heading lines
+
+    def feed(self, page: Page) -> Iterator[Piece]:
+        hinted = {heading.strip() for heading in page.headings}
+        for paragraph in re.split(r"\n\s*\n", page.text):
+            separator = "\n\n"
+            for line in paragraph.splitlines():
+                line = line.strip()
+                if not line:
+                    continue
+                heading = parse_heading(line, hinted)
+                if heading is not None:
+                    if self.has_body:
+                        yield from self.finish()
+                    self._enter(heading)
+                    self._append(line, "\n\n", page.page_number)
+                elif self._is_title(line, hinted):
+                    self.path[-1].text = f"{self.path[-1].text} - {line}"[:HEADING_MAX_CHARS]
+                    self._append(line, "\n", page.page_number)
+                else:
+                    self._append(line, separator, page.page_number)
+                    self.has_body = True
+                    yield from self._windows(page.page_number)
+                separator = "\n"
+
+    def finish(self) -> Iterator[Piece]:
+        """Flush the rest of the current section."""
+        if self.buffer.strip():
+            yield self._piece(self.buffer)
+        self.buffer, self.has_body = "", False
+
+    def _is_title(self, line: str, hinted: Set[str]) -> bool:
+        """An upper-case or layout-marked line right after a bare heading line."""
+        if self.has_body or not self.path or not self.buffer.endswith(self.path[-1].text):
+            return False
+        return len(line) <= HEADING_MAX_CHARS and (line in hinted or line.isupper())
+
+    def _enter(self, heading: Heading):
+        while self.path and self.path[-1].level >= heading.level:
+            self.path.pop()
+        self.path.append(heading)
+
+    def _append(self, line: str, separator: str, page_number: int):
+        if not self.buffer:
+            self.buffer_page = page_number
+            self.buffer = line
+        else:
+            self.buffer = f"{self.buffer}{separator}{line}"
+
+    def _windows(self, page_number: int) -> Iterator[Piece]:
+        while len(self.buffer) >= self.chunk_chars:
+            cut = self.buffer.rfind(" ", 0, self.chunk_chars)
+            cut = cut if cut > self.chunk_chars // 2 else self.chunk_chars
+            yield self._piece(self.buffer[:cut])
+            start = self.buffer.find(" ", max(0, cut - self.overlap_chars), cut)
+            self.buffer = self.buffer[start + 1 if start >= 0 else cut:]
+            self.buffer_page = page_number
+
+    def _piece(self, text: str) -> Piece:
+        leaf: Optional[Heading] = self.path[-1] if self.path else None
+        return Piece(
+            text=text.strip(),
+            page_start=self.buffer_page,
+            section_ref=leaf.ref if leaf else "",
+            section_key=leaf.key if leaf else "",
+            heading_path=[heading.text for heading in self.path],
+        )
+
+
+def chunk_pages(pages: Iterator[Page], chunk_chars: int, overlap_chars: int) -> Iterator[Tuple[Page, Piece]]:
+    """(page, piece) pairs; a fresh chunker per source file."""
+    chunker = None
+    for page in pages:
+        if chunker is None:
+            chunker = SectionChunker(chunk_chars, overlap_chars)
+        for piece in chunker.feed(page):
+            yield page, piece
+        if page.is_last:
+            for piece in chunker.finish():
+                yield page, piece
+            chunker = None
@@ -1,30 +1,662 @@
+"""
+Corpus ingestion pipeline.
+
+    raw_docs/*.pdf -> parse -> normalize -> chunk -> embed -> upsert (rag_documents)
+
+Every stage is a generator running on its own thread, linked to the next
+by a bounded queue. At most QUEUE_SIZE items wait between two stages, so
+memory stays flat however many PDFs are in raw_docs/, and parsing the next
+file overlaps with embedding and uploading the previous one.
+
+With PyMuPDF, parsing is sharded into page ranges (PAGES_PER_SHARD) spread
+over a process pool (--parse-workers, default: all cores). Shards are
+yielded back in page order, and only a few per worker are in flight.
+
+Embedding works on windows of EMBED_WINDOW chunks. Each window is sorted
+by estimated token length into buckets, so a batch never pads short
+chunks out to the longest one. Short buckets get bigger batches (a fixed
+token budget per batch). Batches are encoded across --embed-workers
+processes into one preallocated float32 array per window.
+
+Before chunking, OCR artifacts (mojibake, bullet glyphs, null bytes,
+runs of whitespace) are normalized away (see normalize.py). Characters
+and estimated tokens saved are logged per document and written to
+processed/normalize_report.json.
+
+Chunking is structure-aware (see chunker.py). Chunks never cross a
+SECTION / Article / Rule boundary, and each row stores its section_ref, a
+normalized section_key and, in metadata, the heading path.
+
+Runs are incremental (see manifest.py). Unchanged PDFs are not parsed.
+Only new or changed chunks are embedded and upserted. Chunks that a
+changed or removed PDF no longer produces are deleted.
+
+Row ids are deterministic (law_code, section_ref, content hash and an
+occurrence counter for repeated text), so upserts are idempotent and a
+chunk keeps its id when chunks before it change. Batches of UPLOAD_BATCH_SIZE rows go out
+over --upload-concurrency parallel requests, with retry and exponential
+backoff. Each finished batch is journaled, so a crashed run resumes
+instead of starting over.
+
+Usage:
+    python ingest.py                        # PyMuPDF parsing (offline) + upload
+    python ingest.py --parser llamaparse    # LlamaParse cloud parsing
+    python ingest.py --no-upload            # dry run: every chunk to processed/chunks.jsonl, manifest untouched
+    python ingest.py --parse-workers 1      # parse in-process, one page at a time
+    python ingest.py --embed-workers 4      # encode batches in 4 processes
+    python ingest.py --full                 # ignore the manifest, rebuild everything
+    python ingest.py --snapshot snapshots   # then publish a corpus snapshot (snapshot.py)
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
 import os
+import queue
+import random
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Optional
+import numpy as np
 from dotenv import load_dotenv
 
+from chunker import chunk_pages
+from manifest import Manifest, UploadJournal, content_hash, file_hash
+from normalize import NORMALIZE_VERSION, NormalizeReport, normalize_text
+from parsers import PARSERS, Page, document_type_for, law_code_for, page_count, parse_pymupdf_range
+
 load_dotenv()
 
-class DataPipeline:
-    def __init__(self):
-        self.raw_docs_dir = Path("raw_docs")
-        self.processed_dir = Path("processed")
-    
-    def parse_pdfs(self):
-        # Your LlamaParse logic here
-        pass
-    
-    def chunk_documents(self):
-        # Your chunking logic here
-        pass
-    
-    def generate_embeddings(self):
-        # Your embedding logic here
-        pass
-    
-    def upload_to_supabase(self):
-        # Your Supabase upload logic here
+logger = logging.getLogger("ingest")
+
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"  # Must match the backend's EMBEDDING_MODEL
+EMBEDDING_DIMENSION = 384
+CHUNK_CHARS = 1200
+CHUNK_OVERLAP_CHARS = 200
+PAGES_PER_SHARD = 16
+SHARDS_IN_FLIGHT_PER_WORKER = 2
+
+EMBED_WINDOW = 4096                        # Chunks sorted and embedded together
+EMBED_TOKEN_BUCKETS = (32, 64, 128, 256)   # MiniLM truncates at 256 word pieces
+EMBED_TOKENS_PER_BATCH = 16384
+CHARS_PER_TOKEN = 4                        # Rough estimate, good enough for bucketing
+
+UPLOAD_BATCH_SIZE = 500
+UPLOAD_CONCURRENCY = 4
+UPLOAD_RETRIES = 5
+UPLOAD_BACKOFF_SECONDS = 0.5
+
+
+@dataclass
+class Chunk:
+    source: str
+    law_code: str
+    document_type: str
+    chunk_index: int
+    content: str
+    page_start: int
+    section_ref: str = ""
+    section_key: str = ""
+    occurrence: int = 0                      # Earlier chunks in the file with the same content hash
+    embedding: Optional[np.ndarray] = None   # Row of the window's float32 array
+    metadata: dict = field(default_factory=dict)   # heading_path, page_start
+
+    @property
+    def id(self) -> str:
+        """
+        Deterministic, so re-uploading the same chunk overwrites its own row.
+
+        Not positional: adding or removing a chunk earlier in the file
+        leaves every other chunk's id (and its vector) as it was.
+        """
+        law = _slug(self.law_code) or _slug(Path(self.source).stem)
+        return f"{law}:{_slug(self.section_ref) or '-'}:{self.content_hash[:16]}:{self.occurrence}"
+
+    @property
+    def content_hash(self) -> str:
+        heading_path = "/".join(self.metadata.get("heading_path", []))
+        return content_hash(self.law_code, self.section_ref, heading_path, self.content)
+
+    def to_row(self) -> dict:
+        return {
+            "id": self.id,
+            "content": self.content,
+            "source": self.source,
+            "document_type": self.document_type,
+            "law_code": self.law_code,
+            "section_ref": self.section_ref,
+            "section_key": self.section_key,
+            "chunk_index": self.chunk_index,
+            "metadata": self.metadata,
+            "embedding": None if self.embedding is None else self.embedding.tolist(),
+        }
+
+
+# ------------------------------------------
+# Stage runner
+# ------------------------------------------
+
+_DONE = object()
+_POLL_SECONDS = 0.1
+
+
+class _Cancelled(Exception):
+    pass
+
+
+def _put(q: queue.Queue, item, stop: threading.Event):
+    while True:
+        if stop.is_set():
+            raise _Cancelled()
+        try:
+            q.put(item, timeout=_POLL_SECONDS)
+            return
+        except queue.Full:
+            continue
+
+
+def _drain(q: queue.Queue, stop: threading.Event) -> Iterator:
+    while True:
+        if stop.is_set():
+            raise _Cancelled()
+        try:
+            item = q.get(timeout=_POLL_SECONDS)
+        except queue.Empty:
+            continue
+        if item is _DONE:
+            return
+        yield item
+
+
+def run_stages(source: Iterable, stages: List[Callable[[Iterator], Iterator]], queue_size: int) -> Iterator:
+    """
+    Chain generator stages, each on its own thread, through bounded queues.
+    Yields what the last stage yields; the first failure cancels every stage
+    and is re-raised here.
+    """
+    stop = threading.Event()
+    errors: List[BaseException] = []
+    queues = [queue.Queue(maxsize=queue_size) for _ in stages]
+
+    def work(stage, inputs, output):
+        try:
+            for item in stage(inputs):
+                _put(output, item, stop)
+            _put(output, _DONE, stop)
+        except _Cancelled:
+            pass
+        except BaseException as e:
+            errors.append(e)
+            stop.set()
+
+    threads = []
+    for index, stage in enumerate(stages):
+        inputs = iter(source) if index == 0 else _drain(queues[index - 1], stop)
+        thread = threading.Thread(
+            target=work, args=(stage, inputs, queues[index]), name=getattr(stage, "__name__", f"stage-{index}"), daemon=True
+        )
+        thread.start()
+        threads.append(thread)
+
+    try:
+        yield from _drain(queues[-1], stop)
+    except _Cancelled:
         pass
+    finally:
+        stop.set()  # Also unblocks stages if the consumer stopped early
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
+
+
+# ------------------------------------------
+# Pipeline
+# ------------------------------------------
+
+class DataPipeline:
+    def __init__(
+        self,
+        raw_docs_dir: str = "raw_docs",
+        processed_dir: str = "processed",
+        parser: str = "pymupdf",
+        parse_workers: int = 1,
+        pages_per_shard: int = PAGES_PER_SHARD,
+        queue_size: int = 32,
+        embed_workers: int = 1,
+        embed_window: int = EMBED_WINDOW,
+        embed_tokens_per_batch: int = EMBED_TOKENS_PER_BATCH,
+        upload_batch_size: int = UPLOAD_BATCH_SIZE,
+        upload_concurrency: int = UPLOAD_CONCURRENCY,
+        upload: bool = True,
+        manifest_path: Optional[str] = None,
+        full: bool = False,
+    ):
+        self.raw_docs_dir = Path(raw_docs_dir)
+        self.processed_dir = Path(processed_dir)
+        self.parser = parser
+        self.parse_file = PARSERS[parser]
+        self.parse_workers = parse_workers
+        self.pages_per_shard = pages_per_shard
+        self.queue_size = queue_size
+        self.embed_workers = embed_workers
+        self.embed_window = embed_window
+        self.embed_tokens_per_batch = embed_tokens_per_batch
+        self.upload_batch_size = upload_batch_size
+        self.upload_concurrency = upload_concurrency
+        self.upload = upload
+        self.manifest_path = Path(manifest_path) if manifest_path else self.processed_dir / "manifest.json"
+        # A dry run writes every chunk and must not record anything as ingested
+        self.full = full or not upload
+        self.manifest: Optional[Manifest] = None
+        self.journal = UploadJournal(self.manifest_path.with_suffix(".journal"))
+        self._journaled = set()   # Ids a crashed run already upserted
+        self._file_hashes = {}    # name -> sha256 of files being re-ingested this run
+        self._seen_chunks = {}    # name -> {chunk id: content hash} produced this run
+        self._client = None
+        self.normalize_reports: List[dict] = []
+        self.stats = {
+            "files": 0,
+            "skipped_files": 0,
+            "pages": 0,
+            "chunks": 0,
+            "unchanged_chunks": 0,
+            "resumed_chunks": 0,
+            "embed_batches": 0,
+            "uploaded": 0,
+            "deleted": 0,
+            "chars_saved": 0,
+            "tokens_saved": 0,
+        }
+
+    def source_files(self) -> Iterator[Path]:
+        yield from sorted(self.raw_docs_dir.glob("**/*.pdf"))
+
+    def source_key(self, path: Path) -> str:
+        """Manifest key and chunk source: the path under raw_docs, so same-named files in subfolders stay apart."""
+        return path.relative_to(self.raw_docs_dir).as_posix()
+
+    def changed_files(self) -> Iterator[Path]:
+        """Source files whose bytes differ from the manifest (all of them with --full)."""
+        for path in self.source_files():
+            sha256 = file_hash(path)
+            if not self.full and self.manifest.file_unchanged(self.source_key(path), sha256):
+                self.stats["skipped_files"] += 1
+                continue
+            self._file_hashes[self.source_key(path)] = sha256
+            yield path
+
+    def parse_pdfs(self, paths: Iterator[Path]) -> Iterator[Page]:
+        if self.parser == "pymupdf" and self.parse_workers > 1:
+            yield from self._parse_sharded(paths)
+            return
+
+        for path in paths:
+            logger.info(f"📄 Parsing {path.name}")
+            self.stats["files"] += 1
+            for page in self.parse_file(path):
+                self.stats["pages"] += 1
+                yield page
+
+    def _shards(self, paths: Iterator[Path]) -> Iterator[tuple]:
+        for path in paths:
+            logger.info(f"📄 Parsing {path.name}")
+            self.stats["files"] += 1
+            for start in range(0, page_count(path), self.pages_per_shard):
+                yield path, start, start + self.pages_per_shard
+
+    def _parse_sharded(self, paths: Iterator[Path]) -> Iterator[Page]:
+        """Page-range shards parsed across a process pool, yielded in page order."""
+        # spawn, not fork: this runs on a stage thread of a multi-threaded process
+        pool = ProcessPoolExecutor(max_workers=self.parse_workers, mp_context=multiprocessing.get_context("spawn"))
+        pending = deque()
+        max_in_flight = self.parse_workers * SHARDS_IN_FLIGHT_PER_WORKER
+        try:
+            for shard in self._shards(paths):
+                pending.append(pool.submit(parse_pymupdf_range, *shard))
+                if len(pending) >= max_in_flight:
+                    yield from self._shard_pages(pending.popleft())
+            while pending:
+                yield from self._shard_pages(pending.popleft())
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _shard_pages(self, future) -> Iterator[Page]:
+        pages = future.result()
+        self.stats["pages"] += len(pages)
+        yield from pages
+
+    def normalize_pages(self, pages: Iterator[Page]) -> Iterator[Page]:
+        """Fix OCR artifacts (see normalize.py), reporting what that saved per document."""
+        report = None
+        for page in pages:
+            if report is None:
+                report = NormalizeReport(page.source.name)
+            text, fixes = normalize_text(page.text)
+            report.add(page.text, text, fixes)
+            page.text = text
+            if page.is_last:
+                self._finish_normalize_report(report)
+                report = None
+            yield page
+
+    def _finish_normalize_report(self, report: NormalizeReport):
+        self.normalize_reports.append(report.to_dict())
+        self.stats["chars_saved"] += report.chars_saved
+        self.stats["tokens_saved"] += report.tokens_saved
+        share = report.chars_saved / report.chars_before if report.chars_before else 0.0
+        logger.info(
+            f"🧹 {report.source}: {report.chars_saved} chars ({share:.1%}), "
+            f"~{report.tokens_saved} tokens saved by normalization"
+        )
+
+    def chunk_documents(self, pages: Iterator[Page]) -> Iterator[Chunk]:
+        """Section-aware windows (see chunker.py), indexed per source file."""
+        source, chunk_index, occurrences = None, 0, {}
+        for page, piece in chunk_pages(pages, CHUNK_CHARS, CHUNK_OVERLAP_CHARS):
+            if page.source != source:
+                source, chunk_index, occurrences = page.source, 0, {}
+            law_code = law_code_for(page.source)
+            self.stats["chunks"] += 1
+            chunk = Chunk(
+                source=self.source_key(page.source),
+                law_code=law_code,
+                document_type=document_type_for(law_code),
+                chunk_index=chunk_index,
+                content=piece.text,
+                page_start=piece.page_start,
+                section_ref=piece.section_ref,
+                section_key=piece.section_key,
+                metadata={"heading_path": piece.heading_path, "page_start": piece.page_start},
+            )
+            # Identical text repeated in one section (boilerplate) still needs distinct ids
+            chunk.occurrence = occurrences.get(chunk.content_hash, 0)
+            occurrences[chunk.content_hash] = chunk.occurrence + 1
+            chunk_index += 1
+            yield chunk
+
+    def skip_unchanged_chunks(self, chunks: Iterator[Chunk]) -> Iterator[Chunk]:
+        """Record every chunk for the manifest; pass on only new or changed ones."""
+        for chunk in chunks:
+            digest = chunk.content_hash
+            self._seen_chunks.setdefault(chunk.source, {})[chunk.id] = digest
+            if not self.full and self.manifest.chunk_hash(chunk.source, chunk.id) == digest:
+                self.stats["unchanged_chunks"] += 1
+                continue
+            if chunk.id in self._journaled:
+                self.stats["resumed_chunks"] += 1
+                continue
+            yield chunk
+
+    def generate_embeddings(self, chunks: Iterator[Chunk]) -> Iterator[Chunk]:
+        """Length-bucketed batches, encoded by a worker pool into one float32 array per window."""
+        pool = self._embedding_pool()
+        try:
+            for window in _batched(chunks, self.embed_window):
+                vectors = np.empty((len(window), EMBEDDING_DIMENSION), dtype=np.float32)
+                batches = [
+                    (indices, pool.submit(_encode_batch, [window[i].content for i in indices]))
+                    for indices in length_buckets(window, self.embed_tokens_per_batch)
+                ]
+                for indices, future in batches:
+                    vectors[indices] = future.result()
+                self.stats["embed_batches"] += len(batches)
+                # Original order, so a file's chunks still reach the upload stage together
+                for chunk, vector in zip(window, vectors):
+                    chunk.embedding = vector
+                    yield chunk
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _embedding_pool(self):
+        if self.embed_workers <= 1:
+            return ThreadPoolExecutor(max_workers=1, initializer=_init_embedding_worker, initargs=(0,))
+        # Split the cores between workers instead of every process grabbing all of them
+        threads = max(1, (os.cpu_count() or 1) // self.embed_workers)
+        return ProcessPoolExecutor(
+            max_workers=self.embed_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_embedding_worker,
+            initargs=(threads,),
+        )
+
+    def upload_to_supabase(self, chunks: Iterator[Chunk]) -> Iterator[int]:
+        if not self.upload:
+            yield from self._write_jsonl(chunks)
+            return
+
+        client = self.supabase()
+        pool = ThreadPoolExecutor(max_workers=self.upload_concurrency, thread_name_prefix="upload")
+        pending = deque()
+        try:
+            for batch in _batched(chunks, self.upload_batch_size):
+                rows = [c.to_row() for c in batch]
+                upsert = client.table("rag_documents").upsert(rows)
+                pending.append((batch, pool.submit(_with_retry, upsert.execute, f"Upsert of {len(rows)} rows")))
+                if len(pending) >= self.upload_concurrency:
+                    yield self._finish_upload(*pending.popleft())
+            while pending:
+                yield self._finish_upload(*pending.popleft())
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _finish_upload(self, batch: List[Chunk], future) -> int:
+        future.result()
+        self.journal.append(c.id for c in batch)
+        self.stats["uploaded"] += len(batch)
+        return len(batch)
+
+    def supabase(self):
+        if self._client is None:
+            from supabase import create_client
+
+            self._client = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+        return self._client
+
+    def _write_jsonl(self, chunks: Iterator[Chunk]) -> Iterator[int]:
+        self.processed_dir.mkdir(parents=True, exist_ok=True)
+        path = self.processed_dir / "chunks.jsonl"
+        with open(path, "w", encoding="utf-8") as f:
+            for chunk in chunks:
+                f.write(json.dumps(chunk.to_row()) + "\n")
+                self.stats["uploaded"] += 1
+                yield 1
+        logger.info(f"💾 Wrote {path}")
+
+    def delete_chunks(self, ids: List[str]):
+        if not ids:
+            return
+        if self.upload:
+            client = self.supabase()
+            for batch in _batched(ids, self.upload_batch_size):
+                delete = client.table("rag_documents").delete().in_("id", batch)
+                _with_retry(delete.execute, f"Delete of {len(batch)} rows")
+        else:
+            self.processed_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.processed_dir / "deleted_ids.txt", "w", encoding="utf-8") as f:
+                f.writelines(f"{chunk_id}\n" for chunk_id in ids)
+        self.stats["deleted"] += len(ids)
+
+    def update_manifest(self):
+        """Delete vanished chunks and record this run. Only called after every stage succeeded."""
+        present = {self.source_key(path) for path in self.source_files()}
+        vanished = []
+        for name in sorted(set(self.manifest.files) - present):
+            logger.info(f"🗑️  {name} removed from raw_docs")
+            vanished += sorted(self.manifest.chunk_ids(name))
+            self.manifest.forget(name)
+
+        for name, sha256 in self._file_hashes.items():
+            chunks = self._seen_chunks.get(name, {})
+            vanished += sorted(self.manifest.chunk_ids(name) - set(chunks))
+            self.manifest.record(name, sha256, chunks)
+
+        # Rows a crashed run upserted for content that has changed again since
+        current = set().union(*(self.manifest.chunk_ids(name) for name in self.manifest.files))
+        vanished += sorted(self._journaled - current)
+
+        self.delete_chunks(vanished)
+        self.manifest.save()
+        self.journal.clear()
+
+    def run(self):
+        self.manifest = Manifest.load(self.manifest_path, EMBEDDING_MODEL, NORMALIZE_VERSION)
+        self._journaled = self.journal.load() if self.upload else set()
+        if self._journaled:
+            logger.info(f"↩️  Resuming: {len(self._journaled)} chunks already uploaded by an unfinished run")
+        stages = [
+            self.parse_pdfs,
+            self.normalize_pages,
+            self.chunk_documents,
+            self.skip_unchanged_chunks,
+            self.generate_embeddings,
+            self.upload_to_supabase,
+        ]
+        for _ in run_stages(self.changed_files(), stages, self.queue_size):
+            pass
+        if self.upload:
+            self.update_manifest()
+        if self.normalize_reports:
+            self.processed_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.processed_dir / "normalize_report.json", "w", encoding="utf-8") as f:
+                json.dump(self.normalize_reports, f, indent=1)
+        logger.info(
+            f"✅ {self.stats['files']} files parsed ({self.stats['skipped_files']} unchanged), "
+            f"{self.stats['chunks']} chunks ({self.stats['unchanged_chunks']} unchanged, "
+            f"{self.stats['resumed_chunks']} resumed), "
+            f"{self.stats['uploaded']} rows written, {self.stats['deleted']} deleted, "
+            f"{self.stats['chars_saved']} chars (~{self.stats['tokens_saved']} tokens) of artifacts removed"
+        )
+        return self.stats
+
+
+def _slug(value: str) -> str:
+    return re.sub(r"[^A-Za-z0-9.]+", "_", value).strip("_")
+
+
+def _with_retry(call: Callable, what: str):
+    """Run call(), retrying with exponential backoff and jitter."""
+    for attempt in range(1, UPLOAD_RETRIES + 1):
+        try:
+            return call()
+        except Exception as e:
+            if attempt == UPLOAD_RETRIES:
+                raise
+            delay = UPLOAD_BACKOFF_SECONDS * 2 ** (attempt - 1) * (0.5 + random.random())
+            logger.warning(f"⚠️ {what} failed ({e}); retry {attempt}/{UPLOAD_RETRIES - 1} in {delay:.1f}s")
+            time.sleep(delay)
+
+
+def estimated_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 2   # + [CLS]/[SEP]
+
+
+def length_buckets(chunks: List[Chunk], tokens_per_batch: int) -> Iterator[List[int]]:
+    """
+    Chunk indices sorted by estimated token length, grouped into batches.
+
+    Each bucket's batch size is tokens_per_batch // bucket length, so short
+    chunks are encoded in much larger batches than long ones.
+    """
+    lengths = [estimated_tokens(chunk.content) for chunk in chunks]
+    order = sorted(range(len(chunks)), key=lengths.__getitem__)
+    bucket, batch = None, []
+    for index in order:
+        limit = next((b for b in EMBED_TOKEN_BUCKETS if lengths[index] <= b), EMBED_TOKEN_BUCKETS[-1])
+        if batch and (limit != bucket or len(batch) >= max(1, tokens_per_batch // bucket)):
+            yield batch
+            batch = []
+        bucket = limit
+        batch.append(index)
+    if batch:
+        yield batch
+
+
+# Per-worker model, loaded once by the pool initializer
+_model = None
+
+
+def _init_embedding_worker(threads: int):
+    global _model
+    from sentence_transformers import SentenceTransformer
+
+    if threads:
+        import torch
+
+        torch.set_num_threads(threads)
+    _model = SentenceTransformer(EMBEDDING_MODEL)
+
+
+def _encode_batch(texts: List[str]) -> np.ndarray:
+    vectors = _model.encode(texts, batch_size=len(texts), normalize_embeddings=True, convert_to_numpy=True)
+    return vectors.astype(np.float32, copy=False)
+
+
+def _batched(items: Iterable, size: int) -> Iterator[list]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest raw_docs/ into rag_documents")
+    parser.add_argument("--raw-dir", default="raw_docs")
+    parser.add_argument("--processed-dir", default="processed")
+    parser.add_argument("--parser", choices=sorted(PARSERS), default="pymupdf")
+    parser.add_argument(
+        "--parse-workers", type=int, default=os.cpu_count() or 1, help="Processes parsing page ranges (pymupdf only)"
+    )
+    parser.add_argument("--pages-per-shard", type=int, default=PAGES_PER_SHARD)
+    parser.add_argument("--queue-size", type=int, default=32, help="Max items buffered between stages")
+    parser.add_argument("--embed-workers", type=int, default=1, help="Processes encoding embedding batches")
+    parser.add_argument("--embed-window", type=int, default=EMBED_WINDOW, help="Chunks sorted and embedded together")
+    parser.add_argument("--embed-tokens-per-batch", type=int, default=EMBED_TOKENS_PER_BATCH)
+    parser.add_argument("--upload-batch-size", type=int, default=UPLOAD_BATCH_SIZE)
+    parser.add_argument("--upload-concurrency", type=int, default=UPLOAD_CONCURRENCY, help="Upsert requests in flight")
+    parser.add_argument(
+        "--no-upload", action="store_true",
+        help="Write every chunk to processed/chunks.jsonl instead of upserting; the manifest is not updated"
+    )
+    parser.add_argument("--manifest", default=None, help="Defaults to <processed-dir>/manifest.json")
+    parser.add_argument("--full", action="store_true", help="Ignore the manifest and re-embed everything")
+    parser.add_argument("--snapshot", metavar="DIR", help="After uploading, export a corpus snapshot to DIR")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(threadName)s - %(message)s")
+    pipeline = DataPipeline(
+        raw_docs_dir=args.raw_dir,
+        processed_dir=args.processed_dir,
+        parser=args.parser,
+        parse_workers=args.parse_workers,
+        pages_per_shard=args.pages_per_shard,
+        queue_size=args.queue_size,
+        embed_workers=args.embed_workers,
+        embed_window=args.embed_window,
+        embed_tokens_per_batch=args.embed_tokens_per_batch,
+        upload_batch_size=args.upload_batch_size,
+        upload_concurrency=args.upload_concurrency,
+        upload=not args.no_upload,
+        manifest_path=args.manifest,
+        full=args.full,
+    )
+    pipeline.run()
+
+    if args.snapshot and not args.no_upload:
+        from snapshot import build_snapshot, export_rows
+
+        build_snapshot(export_rows(pipeline.supabase()), Path(args.snapshot), EMBEDDING_MODEL)
+
 
 if __name__ == "__main__":
-    pipeline = DataPipeline()
-    # Run your pipeline steps here
+    main()
@@ -0,0 +1,122 @@
+"""
+Ingest manifest: what is already in rag_documents, by content hash.
+
+    {
+      "embedding_model": "all-MiniLM-L6-v2",
+      "normalize_version": 1,
+      "files": {
+        "RA_9514 IRR.pdf": {"sha256": "...", "chunks": {"<chunk id>": "<content hash>"}},
+        "ordinances/Zoning.pdf": {...}
+      }
+    }
+
+Files are keyed by their path under raw_docs, so PDFs with the same name
+in different subfolders get separate entries.
+
+A source file whose sha256 is unchanged is skipped before parsing. A
+changed file is re-chunked, but only chunks whose content hash changed
+are re-embedded and upserted. Ids that are no longer produced are
+deleted. The manifest is only written after a run succeeds.
+
+When NORMALIZE_VERSION (normalize.py) changes, every file is re-parsed,
+but chunks whose normalized content is unchanged are still not
+re-embedded.
+
+Until then, UploadJournal appends the ids of every upserted batch. Chunk
+ids include the content hash, so after a crash the next run skips every
+chunk the journal already has and resumes where the upload stopped.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+HASH_BLOCK_BYTES = 1 << 20
+
+
+def file_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_BYTES), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def content_hash(*parts: str) -> str:
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()[:32]
+
+
+class Manifest:
+    def __init__(self, path: Path, embedding_model: str, normalize_version: int = 0):
+        self.path = Path(path)
+        self.embedding_model = embedding_model
+        self.normalize_version = normalize_version
+        self.files: Dict[str, dict] = {}
+
+    @classmethod
+    def load(cls, path: Path, embedding_model: str, normalize_version: int = 0) -> "Manifest":
+        manifest = cls(path, embedding_model, normalize_version)
+        if manifest.path.exists():
+            data = json.loads(manifest.path.read_text(encoding="utf-8"))
+            # Vectors from another model can't be reused: start from scratch
+            if data.get("embedding_model") == embedding_model:
+                manifest.files = data.get("files", {})
+            # Text would come out differently: re-parse, keep chunk hashes
+            if data.get("normalize_version", 0) != normalize_version:
+                for entry in manifest.files.values():
+                    entry["sha256"] = ""
+        return manifest
+
+    def file_unchanged(self, name: str, sha256: str) -> bool:
+        entry = self.files.get(name)
+        return entry is not None and entry["sha256"] == sha256
+
+    def chunk_hash(self, name: str, chunk_id: str) -> Optional[str]:
+        return self.files.get(name, {}).get("chunks", {}).get(chunk_id)
+
+    def chunk_ids(self, name: str) -> set:
+        return set(self.files.get(name, {}).get("chunks", {}))
+
+    def record(self, name: str, sha256: str, chunks: Dict[str, str]):
+        self.files[name] = {"sha256": sha256, "chunks": chunks}
+
+    def forget(self, name: str):
+        self.files.pop(name, None)
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(
+            json.dumps({
+                "embedding_model": self.embedding_model,
+                "normalize_version": self.normalize_version,
+                "files": self.files,
+            }, indent=1),
+            encoding="utf-8"
+        )
+        os.replace(tmp, self.path)
+
+
+class UploadJournal:
+    """Append-only list of chunk ids already upserted by an unfinished run."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def load(self) -> set:
+        if not self.path.exists():
+            return set()
+        with open(self.path, encoding="utf-8") as f:
+            return {line.strip() for line in f if line.strip()}
+
+    def append(self, ids: Iterable[str]):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.writelines(f"{chunk_id}\n" for chunk_id in ids)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def clear(self):
+        self.path.unlink(missing_ok=True)
@@ -0,0 +1,104 @@
+"""
+Text normalization before chunking.
+
+Fixes the OCR / extraction artifacts that backend/scripts/rag_data_audit.py
+reports (OCR_ISSUES), so they are not embedded and never reach the prompt:
+
+    mojibake      "â€™" -> "'", "Ã©" -> "é" (UTF-8 read as cp1252)
+    glyphs        bullets (• · ■ □ ▪ ●) -> "-", smart quotes/dashes -> ASCII,
+                  ligatures (ﬁ ﬂ) -> letters, NBSP -> space
+    junk          null bytes, U+FFFD/U+FFFE/U+FFFF, soft hyphens, zero-width chars
+    whitespace    runs of spaces, trailing spaces, 3+ newlines, hyphenated
+                  line breaks ("regu-\\nlation" -> "regulation")
+
+Each step is one precompiled pass over the text: an alternation regex
+each for mojibake and for single characters (replacement looked up by
+match), and one regex with named groups for whitespace. Bump
+NORMALIZE_VERSION when the rules change; the manifest then re-parses
+every PDF (see manifest.py).
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, Tuple
+
+NORMALIZE_VERSION = 1
+
+# UTF-8 decoded as cp1252. Longest sequences first, so "â€œ" wins over "â€".
+MOJIBAKE_FIXES = {
+    "â€™": "'", "â€˜": "'", "â€œ": '"', "â€\x9d": '"', "â€": '"',
+    "â€“": "-", "â€”": "-", "â€¦": "...", "â€¢": "-",
+    "Ã¡": "á", "Ã©": "é", "Ã\xad": "í", "Ã³": "ó", "Ãº": "ú", "Ã±": "ñ", "Ã‘": "Ñ",
+    "Â°": "°", "Â§": "§", "Â\xa0": " ", "Â": "",
+}
+MOJIBAKE = re.compile("|".join(re.escape(bad) for bad in sorted(MOJIBAKE_FIXES, key=len, reverse=True)))
+
+CHARACTER_FIXES = {
+    "\x00": "", "\ufffd": "", "\ufffe": "", "\uffff": "",
+    "\u00ad": "", "\u200b": "", "\u200c": "", "\u200d": "", "\ufeff": "",
+    "\u2022": "-", "\u00b7": "-", "\u25a0": "-", "\u25a1": "-", "\u25aa": "-", "\u25cf": "-", "\u25e6": "-",
+    "\u2018": "'", "\u2019": "'", "\u201c": '"', "\u201d": '"',
+    "\u2013": "-", "\u2014": "-", "\u2026": "...",
+    "\ufb01": "fi", "\ufb02": "fl", "\u00a0": " ",
+}
+CHARACTERS = re.compile("[" + "".join(re.escape(char) for char in CHARACTER_FIXES) + "]")
+
+WHITESPACE = re.compile(
+    r"(?P<hyphen>-\n(?=[a-z]))"                      # Re-join hyphenated line breaks
+    r"|(?P<blank>[ \t]*\n[ \t]*(?:\n[ \t]*){2,})"    # 3+ newlines -> one paragraph break
+    r"|(?P<eol>[ \t]+\n)"                            # Trailing spaces
+    r"|(?P<space>[ \t]{2,}|\t)"                      # Runs of spaces
+)
+WHITESPACE_FIXES = {"hyphen": "", "blank": "\n\n", "eol": "\n", "space": " "}
+
+# Word pieces and punctuation: a closer proxy for LLM prompt tokens than
+# characters / 4, since artifacts are mostly punctuation and stray glyphs
+TOKEN_ESTIMATE = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text: str) -> int:
+    return sum(1 for _ in TOKEN_ESTIMATE.finditer(text))
+
+
+def normalize_text(text: str) -> Tuple[str, Dict[str, int]]:
+    """Normalized text and the number of fixes per kind."""
+    fixes = {}
+    text, fixes["mojibake"] = MOJIBAKE.subn(lambda m: MOJIBAKE_FIXES[m.group()], text)
+    text, fixes["characters"] = CHARACTERS.subn(lambda m: CHARACTER_FIXES[m.group()], text)
+    text, fixes["whitespace"] = WHITESPACE.subn(lambda m: WHITESPACE_FIXES[m.lastgroup], text)
+    return text.strip(), fixes
+
+
+@dataclass
+class NormalizeReport:
+    """What normalization saved on one document."""
+    source: str
+    chars_before: int = 0
+    chars_after: int = 0
+    tokens_before: int = 0
+    tokens_after: int = 0
+    fixes: Dict[str, int] = field(default_factory=dict)
+
+    def add(self, before: str, after: str, fixes: Dict[str, int]):
+        self.chars_before += len(before)
+        self.chars_after += len(after)
+        self.tokens_before += estimate_tokens(before)
+        self.tokens_after += estimate_tokens(after)
+        for kind, count in fixes.items():
+            self.fixes[kind] = self.fixes.get(kind, 0) + count
+
+    @property
+    def chars_saved(self) -> int:
+        return self.chars_before - self.chars_after
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+    def to_dict(self) -> dict:
+        return {
+            "source": self.source,
+            "chars_before": self.chars_before, "chars_saved": self.chars_saved,
+            "tokens_before": self.tokens_before, "tokens_saved": self.tokens_saved,
+            "fixes": self.fixes,
+        }
@@ -0,0 +1,143 @@
+"""
+PDF parsers for the ingestion pipeline.
+
+Both parsers stream one Page at a time so a 600-page IRR never sits in
+memory whole:
+
+    pymupdf     local text extraction with PyMuPDF (offline, fast)
+    llamaparse  LlamaParse cloud parsing (better on scanned/complex layouts)
+
+PyMuPDF pages also carry heading hints for the chunker: lines set larger or
+bolder than the body text, or starting with SECTION/Article/Rule/...
+parse_pymupdf_range() parses one page range so big files can be sharded
+across a process pool.
+"""
+
+import os
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, List
+
+
+@dataclass
+class Page:
+    source: Path
+    page_number: int                     # 1-based
+    text: str
+    headings: List[str] = field(default_factory=list)
+    is_last: bool = False                # Last page of its source file
+
+
+# "RA 9514 Revised IRR.pdf" -> "RA 9514", "PD_1096.pdf" -> "PD 1096"
+LAW_CODE_PATTERNS = [
+    re.compile(r"\b(RA|PD|BP)[\s_-]*(\d{2,5})\b", re.IGNORECASE),
+    re.compile(r"\b(DPWH|DOLE)[\s_-]*DO[\s_-]*(\d+)\b", re.IGNORECASE),
+    re.compile(r"\b(JMC)[\s_-]*(\d{4}-\d{2,3})\b", re.IGNORECASE),
+]
+
+
+def law_code_for(path: Path) -> str:
+    """Best-effort law code from the file name; falls back to the file stem."""
+    name = path.stem.replace("_", " ")
+    for pattern in LAW_CODE_PATTERNS:
+        match = pattern.search(name)
+        if match:
+            prefix, number = match.groups()
+            prefix = prefix.upper()
+            if prefix in ("DPWH", "DOLE"):
+                return f"{prefix} DO {number}"
+            return f"{prefix} {number}"
+    return name.strip()
+
+
+def document_type_for(law_code: str) -> str:
+    """Matches the doc_types used by RAGEngine.MODE_CONFIG."""
+    if re.match(r"^(RA|PD|BP) ", law_code):
+        return "statutory"
+    if re.match(r"^(DPWH|DOLE|JMC|GPPB)", law_code):
+        return "procedural"
+    if "Ord" in law_code or "Zoning" in law_code:
+        return "specialized_planning"
+    return "statutory"
+
+
+HEADING_PATTERN = re.compile(r"^(SECTION|ARTICLE|RULE|CHAPTER|DIVISION|TITLE|PART)\s+[\dIVXLC]+\b", re.IGNORECASE)
+HEADING_SIZE_RATIO = 1.15      # Font size vs. body text to count as a heading
+HEADING_MAX_CHARS = 120
+BOLD_FLAG = 16                 # PyMuPDF span flag bit
+
+
+def _headings(page) -> List[str]:
+    lines = []
+    sizes = {}
+    for block in page.get_text("dict")["blocks"]:
+        for line in block.get("lines", []):
+            spans = [span for span in line["spans"] if span["text"].strip()]
+            if not spans:
+                continue
+            text = " ".join(span["text"].strip() for span in spans)
+            size = max(span["size"] for span in spans)
+            bold = all(span["flags"] & BOLD_FLAG for span in spans)
+            lines.append((text, size, bold))
+            for span in spans:
+                rounded = round(span["size"], 1)
+                sizes[rounded] = sizes.get(rounded, 0) + len(span["text"])
+
+    if not lines:
+        return []
+    body_size = max(sizes, key=sizes.get)
+    return [
+        text for text, size, bold in lines
+        if len(text) <= HEADING_MAX_CHARS
+        and (HEADING_PATTERN.match(text) or bold or size >= body_size * HEADING_SIZE_RATIO)
+    ]
+
+
+def _pymupdf_page(path: Path, doc, index: int) -> Page:
+    page = doc[index]
+    return Page(
+        path,
+        index + 1,
+        page.get_text("text"),
+        headings=_headings(page),
+        is_last=index + 1 == doc.page_count,
+    )
+
+
+def page_count(path: Path) -> int:
+    import fitz  # PyMuPDF
+
+    with fitz.open(path) as doc:
+        return doc.page_count
+
+
+def parse_pymupdf(path: Path) -> Iterator[Page]:
+    import fitz  # PyMuPDF
+
+    with fitz.open(path) as doc:
+        for index in range(doc.page_count):
+            yield _pymupdf_page(path, doc, index)
+
+
+def parse_pymupdf_range(path: Path, start: int, stop: int) -> List[Page]:
+    """Pages [start, stop) (0-based) of one file. Runs in a pool worker, so returns a list."""
+    import fitz  # PyMuPDF
+
+    with fitz.open(path) as doc:
+        return [_pymupdf_page(path, doc, index) for index in range(start, min(stop, doc.page_count))]
+
+
+def parse_llamaparse(path: Path) -> Iterator[Page]:
+    from llama_parse import LlamaParse
+
+    parser = LlamaParse(api_key=os.getenv("LLAMAPARSE_API_KEY"), result_type="markdown")
+    documents = parser.load_data(str(path))
+    for index, document in enumerate(documents):
+        yield Page(path, index + 1, document.text, is_last=index + 1 == len(documents))
+
+
+PARSERS = {
+    "pymupdf": parse_pymupdf,
+    "llamaparse": parse_llamaparse,
+}
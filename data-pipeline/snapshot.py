@@ -0,0 +1,199 @@
+"""
+Versioned corpus snapshots for the API.
+
+Exports rag_documents (keyset-paginated on id) into a self-contained
+directory that API workers memory-map and hot-swap without a restart:
+
+    snapshots/
+      CURRENT                   version of the snapshot to serve (replaced atomically)
+      <version>/
+        manifest.json           version, embedding model, dimension, row count, columns
+        embeddings.npy          float32 (count, dimension), L2-normalized, np.load(mmap_mode="r")
+        columns.json            {"id": [...], "content": [...], "law_code": [...], ...}
+        lexical_terms.json      sorted vocabulary
+        lexical_offsets.npy     int64 (terms + 1): postings of term t are [offsets[t], offsets[t+1])
+        lexical_postings.npy    int32 row numbers
+        lexical_tf.npy          uint16 term frequency per posting
+        doc_lengths.npy         int32 tokens per row
+
+The version is a hash of the embedding model and every row id. Ids
+already include each chunk's content hash, so an unchanged corpus keeps
+its version and nothing is rewritten. The directory is built under a
+temporary name and renamed into place before CURRENT moves, so readers
+never see a partial snapshot.
+
+With --shadow-model, vectors come from rag_documents_shadow instead
+(backend/database/embedding_shadow.sql), for serving after an embedding
+model cut-over.
+
+Usage:
+    python snapshot.py                      # -> snapshots/
+    python snapshot.py --out /srv/rule7/snapshots
+    python snapshot.py --shadow-model BAAI/bge-small-en-v1.5
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger("snapshot")
+
+FORMAT_VERSION = 1
+EMBEDDING_DIMENSION = 384
+COLUMNS = ["id", "content", "source", "document_type", "law_code", "section_ref", "section_key", "chunk_index"]
+PAGE_SIZE = 1000
+
+# Must match app/services/corpus_snapshot.py
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:\.[0-9]+)*")
+
+
+def tokenize(text: str) -> list:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def export_rows(client, page_size: int = PAGE_SIZE, shadow_model: Optional[str] = None) -> Iterator[dict]:
+    """Every rag_documents row in id order, one page in memory at a time."""
+    shadow = shadow_model is not None
+    embedding = "rag_documents_shadow(embedding)" if shadow else "embedding"
+    last_id = None
+    while True:
+        query = client.table("rag_documents") \
+            .select(", ".join(COLUMNS + [embedding])) \
+            .order("id") \
+            .limit(page_size)
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        if shadow:
+            query = query.eq("rag_documents_shadow.model", shadow_model)
+        batch = query.execute().data or []
+        for row in batch:
+            if shadow:
+                vector = row.pop("rag_documents_shadow", None)
+                if isinstance(vector, list):
+                    vector = vector[0] if vector else None
+                row["embedding"] = vector.get("embedding") if vector else None
+            yield row
+        if len(batch) < page_size:
+            return
+        last_id = batch[-1]["id"]
+
+
+def _write_npy(path: Path, raw_path: Path, shape: tuple, dtype: str):
+    """Prefix raw little-endian array bytes with an .npy header, streaming."""
+    with open(path, "wb") as out, open(raw_path, "rb") as raw:
+        np.lib.format.write_array_header_1_0(out, {"descr": dtype, "fortran_order": False, "shape": shape})
+        shutil.copyfileobj(raw, out)
+
+
+def build_snapshot(rows: Iterable[dict], out_root: Path, embedding_model: str) -> str:
+    """Write a snapshot of rows (in id order) under out_root and point CURRENT at it."""
+    out_root.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(prefix=".building-", dir=out_root))
+    digest = hashlib.sha256(embedding_model.encode("utf-8"))
+    columns = {name: [] for name in COLUMNS}
+    postings = {}
+    doc_lengths = []
+    dimension = EMBEDDING_DIMENSION
+
+    try:
+        # Vectors go straight to disk; only metadata and postings are held in memory
+        with open(tmp / "embeddings.raw", "wb") as raw:
+            for row in rows:
+                embedding = row.get("embedding")
+                if not embedding:
+                    continue
+                if isinstance(embedding, str):
+                    embedding = json.loads(embedding)
+                vector = np.asarray(embedding, dtype=np.float32)
+                dimension = vector.shape[0]
+                norm = np.linalg.norm(vector)
+                raw.write((vector / norm if norm else vector).astype("<f4").tobytes())
+
+                index = len(doc_lengths)
+                for name in COLUMNS:
+                    columns[name].append(row.get(name) or ("" if name != "chunk_index" else 0))
+                digest.update(f"\0{row['id']}".encode("utf-8"))
+
+                terms = Counter(tokenize(row.get("content") or ""))
+                doc_lengths.append(sum(terms.values()))
+                for term, tf in terms.items():
+                    postings.setdefault(term, []).append((index, min(tf, 65535)))
+
+        count = len(doc_lengths)
+        version = digest.hexdigest()[:16]
+        _write_npy(tmp / "embeddings.npy", tmp / "embeddings.raw", (count, dimension), "<f4")
+        (tmp / "embeddings.raw").unlink()
+
+        with open(tmp / "columns.json", "w", encoding="utf-8") as f:
+            json.dump(columns, f)
+
+        terms = sorted(postings)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        for t, term in enumerate(terms):
+            offsets[t + 1] = offsets[t] + len(postings[term])
+        flat = [posting for term in terms for posting in postings[term]]
+        np.save(tmp / "lexical_offsets.npy", offsets)
+        np.save(tmp / "lexical_postings.npy", np.array([row for row, _ in flat], dtype=np.int32))
+        np.save(tmp / "lexical_tf.npy", np.array([tf for _, tf in flat], dtype=np.uint16))
+        np.save(tmp / "doc_lengths.npy", np.array(doc_lengths, dtype=np.int32))
+        with open(tmp / "lexical_terms.json", "w", encoding="utf-8") as f:
+            json.dump(terms, f)
+
+        with open(tmp / "manifest.json", "w", encoding="utf-8") as f:
+            json.dump({
+                "format": FORMAT_VERSION,
+                "version": version,
+                "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "embedding_model": embedding_model,
+                "dimension": dimension,
+                "count": count,
+                "columns": COLUMNS,
+            }, f, indent=2)
+
+        target = out_root / version
+        if target.exists():
+            logger.info(f"✅ Corpus unchanged, snapshot {version} already built")
+        else:
+            os.replace(tmp, target)
+            logger.info(f"✅ Built snapshot {version}: {count} rows, {len(terms)} terms")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    pointer = out_root / "CURRENT.tmp"
+    pointer.write_text(version, encoding="utf-8")
+    os.replace(pointer, out_root / "CURRENT")
+    return version
+
+
+def main():
+    from supabase import create_client
+
+    from ingest import EMBEDDING_MODEL
+
+    parser = argparse.ArgumentParser(description="Export rag_documents as a versioned corpus snapshot")
+    parser.add_argument("--out", default="snapshots")
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE)
+    parser.add_argument("--shadow-model", help="Export rag_documents_shadow vectors, embedded with this model")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+    client = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+    rows = export_rows(client, args.page_size, shadow_model=args.shadow_model)
+    build_snapshot(rows, Path(args.out), args.shadow_model or EMBEDDING_MODEL)
+
+
+if __name__ == "__main__":
+    main()